@@ -27,11 +27,15 @@ def consensus_address_from_pubkey(consensus_pubkey_hex, prefix):
     # Perform SHA256 hashing on the consensus public key
     sha256_digest = hashlib.sha256(pubkey_bytes).digest()
 
-    # Perform RIPEMD160 hashing on the SHA256 digest
-    ripemd160_digest = hashlib.new('ripemd160', sha256_digest).digest()
+    if len(pubkey_bytes) == 32:
+        # ed25519 keys: the address is the first 20 bytes of the SHA256 digest
+        address_bytes = sha256_digest[:20]
+    else:
+        # secp256k1 keys: RIPEMD160 of the SHA256 digest
+        address_bytes = hashlib.new('ripemd160', sha256_digest).digest()
 
     # Convert to 5-bit words
-    five_bit_words = convertbits(ripemd160_digest, 8, 5, pad=True)
+    five_bit_words = convertbits(address_bytes, 8, 5, pad=True)
     if five_bit_words is None:
         raise ValueError("Error converting bytes to 5-bit words")
 
@@ -39,25 +43,33 @@ def consensus_address_from_pubkey(consensus_pubkey_hex, prefix):
     bech32_address = bech32_encode(prefix, five_bit_words)
     return bech32_address
 
-# Example usage
+def consensus_address_from_hex(address_hex, prefix):
+    # The hex validator address reported by /status and /validators is already hashed
+    five_bit_words = convertbits(bytes.fromhex(address_hex), 8, 5, pad=True)
+    if five_bit_words is None:
+        raise ValueError("Error converting bytes to 5-bit words")
 
-# Replace these with your actual public keys in hex format
-account_pubkey_hex = '...'          # Account public key in hex
-consensus_pubkey_hex = '...'        # Consensus public key in hex
+    return bech32_encode(prefix, five_bit_words)
+
+# Example usage
+if __name__ == "__main__":
+    # Replace these with your actual public keys in hex format
+    account_pubkey_hex = '...'          # Account public key in hex
+    consensus_pubkey_hex = '...'        # Consensus public key in hex
 
-# Generate wallet address (account address)
-wallet_prefix = 'quick'
-wallet_address = address_from_pubkey(account_pubkey_hex, wallet_prefix)
-print('Wallet Address:', wallet_address)
+    # Generate wallet address (account address)
+    wallet_prefix = 'quick'
+    wallet_address = address_from_pubkey(account_pubkey_hex, wallet_prefix)
+    print('Wallet Address:', wallet_address)
 
-# Generate validator operator address
-valoper_prefix = 'quickvaloper'
-valoper_address = address_from_pubkey(account_pubkey_hex, valoper_prefix)
-print('Validator Operator Address:', valoper_address)
+    # Generate validator operator address
+    valoper_prefix = 'quickvaloper'
+    valoper_address = address_from_pubkey(account_pubkey_hex, valoper_prefix)
+    print('Validator Operator Address:', valoper_address)
 
-# Generate validator consensus address
-valcons_prefix = 'quickvalcons'
-valcons_address = consensus_address_from_pubkey(consensus_pubkey_hex, valcons_prefix)
-print('Validator Consensus Address:', valcons_address)
+    # Generate validator consensus address
+    valcons_prefix = 'quickvalcons'
+    valcons_address = consensus_address_from_pubkey(consensus_pubkey_hex, valcons_prefix)
+    print('Validator Consensus Address:', valcons_address)
 
-# this one need public keys ad hex
+    # this one need public keys ad hex
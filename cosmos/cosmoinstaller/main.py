@@ -20,6 +20,11 @@ from modules.sync import NodeSync
 from modules.cosmovisor import CosmovisorSetup
 from modules.caddy import CaddySetup
 from modules.service import ServiceManager
+from modules.upgrade import UpgradeWatcher
+from modules.backup import DataBackup
+from modules.binary import BinaryProvisioner
+from modules.logprofile import LoggingProfile, LOG_PROFILES
+from modules.installbench import InstallBenchmark
 
 class CosmosNodeInstaller:
     """Main class for the Cosmos Node Installer."""
@@ -39,6 +44,11 @@ class CosmosNodeInstaller:
             'node_home': "",
             'moniker': f"node-{int(__import__('time').time())}",
             'go_version': "1.21.0",
+            'binary_repo': "",
+            'binary_tag': "",
+            'build_cache_dir': "",
+            'build_jobs': 0,
+            'build_allow_unverified': False,
             'genesis_url': "",
             'addrbook_url': "",
             'peers': "",
@@ -70,6 +80,69 @@ class CosmosNodeInstaller:
             'expose_json_rpc': False,
             'domain': "",
             'domain_pattern': "",
+            'caddy_admin': "http://localhost:2019",
+            'caddy_upstreams': {},
+            'caddy_health_interval': "10s",
+            'caddy_keepalive_conns': 32,
+            'caddy_encode': True,
+            'rpc_cache_enabled': False,
+            'rpc_cache_listen': "127.0.0.1",
+            'rpc_cache_rpc_port': 36657,
+            'rpc_cache_api_port': 11317,
+            'rpc_cache_size_mb': 256,
+            'rpc_cache_latest_ttl': 1.0,
+            'loadtest_targets': {},
+            'loadtest_mix': [],
+            'loadtest_rates': [50, 100, 200, 400, 800],
+            'loadtest_duration': 30,
+            'loadtest_slo_p99_ms': 500,
+            'loadtest_tolerance': 0.25,
+            'loadtest_report_file': "loadtest-report.json",
+            'loadtest_baseline_file': "",
+            'sim_chain_id': "sim-1",
+            'sim_validators': 100,
+            'sim_block_time': 6.0,
+            'sim_miss_rate': 0.01,
+            'sim_history': 10000,
+            'sim_listen': "127.0.0.1",
+            'sim_rpc_port': 46657,
+            'sim_api_port': 41317,
+            'sim_latency_ms': 0,
+            'sim_jitter_ms': 0,
+            'sim_error_rate': 0,
+            'sim_lag': 0,
+            'sim_stall_at_height': 0,
+            'sim_stall_seconds': 0,
+            'sim_offline_at_height': 0,
+            'sim_signed_blocks_window': 100,
+            'sim_min_signed_per_window': 0.5,
+            'sim_downtime_jail_duration': 600,
+            'bench_work_dir': "",
+            'bench_iterations': 3,
+            'bench_genesis_mb': 5,
+            'bench_addrbook_peers': 2000,
+            'bench_snapshot_mb': 100,
+            'bench_tolerance': 0.2,
+            'bench_report_file': "install-bench.json",
+            'bench_baseline_file': "",
+            'upgrade_rpc': "",
+            'upgrade_api': "",
+            'upgrade_prestage_hours': 24,
+            'upgrade_poll_interval': 300,
+            'upgrade_block_window': 1000,
+            'upgrade_build_repo': "",
+            'upgrade_allow_unverified': False,
+            'backup_enabled': False,
+            'backup_retain': 3,
+            'backup_dir': "",
+            'unit_profile': "default",
+            'colocated_nodes': 1,
+            'node_slot': 0,
+            'log_profile': "",
+            'log_measure_window': 60,
+            'log_metrics_interval': 60,
+            'log_metrics_prom_file': "",
+            'log_metrics_json_file': "",
             'should_install_prerequisites': True,
             'setup_node_config': True,
             'setup_cosmovisor_config': True,
@@ -83,10 +156,14 @@ class CosmosNodeInstaller:
         
         # Initialize modules
         self.node_setup = NodeSetup(self.config)
+        self.binary_provisioner = BinaryProvisioner(self.config)
         self.node_sync = NodeSync(self.config)
         self.cosmovisor_setup = CosmovisorSetup(self.config)
         self.caddy_setup = CaddySetup(self.config)
         self.service_manager = ServiceManager(self.config)
+        self.logging_profile = LoggingProfile(self.config)
+        self.upgrade_watcher = UpgradeWatcher(self.config)
+        self.data_backup = DataBackup(self.config)
     
     def _load_configuration(self, config_path: str) -> None:
         """
@@ -124,6 +201,15 @@ class CosmosNodeInstaller:
             self.config['moniker'] = node_config.get('moniker', self.config['moniker'])
             self.config['go_version'] = node_config.get('go_version', self.config['go_version'])
         
+        # Build configuration
+        if 'build' in yaml_config:
+            build_config = yaml_config['build']
+            self.config['binary_repo'] = build_config.get('repo', self.config['binary_repo'])
+            self.config['binary_tag'] = build_config.get('tag', self.config['binary_tag'])
+            self.config['build_cache_dir'] = build_config.get('cache_dir', self.config['build_cache_dir'])
+            self.config['build_jobs'] = build_config.get('jobs', self.config['build_jobs'])
+            self.config['build_allow_unverified'] = build_config.get('allow_unverified', self.config['build_allow_unverified'])
+        
         # Files configuration
         if 'files' in yaml_config:
             files_config = yaml_config['files']
@@ -177,6 +263,105 @@ class CosmosNodeInstaller:
             self.config['expose_json_rpc'] = caddy_config.get('expose_json_rpc', self.config['expose_json_rpc'])
             self.config['domain'] = caddy_config.get('domain', self.config['domain'])
             self.config['domain_pattern'] = caddy_config.get('domain_pattern', self.config['domain_pattern'])
+            self.config['caddy_admin'] = caddy_config.get('admin', self.config['caddy_admin'])
+            self.config['caddy_upstreams'] = caddy_config.get('upstreams', self.config['caddy_upstreams'])
+            self.config['caddy_health_interval'] = caddy_config.get('health_interval', self.config['caddy_health_interval'])
+            self.config['caddy_keepalive_conns'] = caddy_config.get('keepalive_conns', self.config['caddy_keepalive_conns'])
+            self.config['caddy_encode'] = caddy_config.get('encode', self.config['caddy_encode'])
+        
+        # RPC cache configuration
+        if 'rpc_cache' in yaml_config:
+            rpc_cache_config = yaml_config['rpc_cache']
+            self.config['rpc_cache_enabled'] = rpc_cache_config.get('enabled', self.config['rpc_cache_enabled'])
+            self.config['rpc_cache_listen'] = rpc_cache_config.get('listen', self.config['rpc_cache_listen'])
+            self.config['rpc_cache_rpc_port'] = rpc_cache_config.get('rpc_port', self.config['rpc_cache_rpc_port'])
+            self.config['rpc_cache_api_port'] = rpc_cache_config.get('api_port', self.config['rpc_cache_api_port'])
+            self.config['rpc_cache_size_mb'] = rpc_cache_config.get('size_mb', self.config['rpc_cache_size_mb'])
+            self.config['rpc_cache_latest_ttl'] = rpc_cache_config.get('latest_ttl', self.config['rpc_cache_latest_ttl'])
+        
+        # Load test configuration
+        if 'loadtest' in yaml_config:
+            loadtest_config = yaml_config['loadtest']
+            self.config['loadtest_targets'] = loadtest_config.get('targets', self.config['loadtest_targets'])
+            self.config['loadtest_mix'] = loadtest_config.get('mix', self.config['loadtest_mix'])
+            self.config['loadtest_rates'] = loadtest_config.get('rates', self.config['loadtest_rates'])
+            self.config['loadtest_duration'] = loadtest_config.get('duration', self.config['loadtest_duration'])
+            self.config['loadtest_slo_p99_ms'] = loadtest_config.get('slo_p99_ms', self.config['loadtest_slo_p99_ms'])
+            self.config['loadtest_tolerance'] = loadtest_config.get('tolerance', self.config['loadtest_tolerance'])
+            self.config['loadtest_report_file'] = loadtest_config.get('report_file', self.config['loadtest_report_file'])
+            self.config['loadtest_baseline_file'] = loadtest_config.get('baseline_file', self.config['loadtest_baseline_file'])
+        
+        # Simulator configuration
+        if 'simulator' in yaml_config:
+            simulator_config = yaml_config['simulator']
+            self.config['sim_chain_id'] = simulator_config.get('chain_id', self.config['sim_chain_id'])
+            self.config['sim_validators'] = simulator_config.get('validators', self.config['sim_validators'])
+            self.config['sim_block_time'] = simulator_config.get('block_time', self.config['sim_block_time'])
+            self.config['sim_miss_rate'] = simulator_config.get('miss_rate', self.config['sim_miss_rate'])
+            self.config['sim_history'] = simulator_config.get('history', self.config['sim_history'])
+            self.config['sim_listen'] = simulator_config.get('listen', self.config['sim_listen'])
+            self.config['sim_rpc_port'] = simulator_config.get('rpc_port', self.config['sim_rpc_port'])
+            self.config['sim_api_port'] = simulator_config.get('api_port', self.config['sim_api_port'])
+            self.config['sim_latency_ms'] = simulator_config.get('latency_ms', self.config['sim_latency_ms'])
+            self.config['sim_jitter_ms'] = simulator_config.get('jitter_ms', self.config['sim_jitter_ms'])
+            self.config['sim_error_rate'] = simulator_config.get('error_rate', self.config['sim_error_rate'])
+            self.config['sim_lag'] = simulator_config.get('lag', self.config['sim_lag'])
+            self.config['sim_stall_at_height'] = simulator_config.get('stall_at_height', self.config['sim_stall_at_height'])
+            self.config['sim_stall_seconds'] = simulator_config.get('stall_seconds', self.config['sim_stall_seconds'])
+            self.config['sim_offline_at_height'] = simulator_config.get('offline_at_height', self.config['sim_offline_at_height'])
+            self.config['sim_signed_blocks_window'] = simulator_config.get('signed_blocks_window', self.config['sim_signed_blocks_window'])
+            self.config['sim_min_signed_per_window'] = simulator_config.get('min_signed_per_window', self.config['sim_min_signed_per_window'])
+            self.config['sim_downtime_jail_duration'] = simulator_config.get('downtime_jail_duration', self.config['sim_downtime_jail_duration'])
+        
+        # Install benchmark configuration
+        if 'bench' in yaml_config:
+            bench_config = yaml_config['bench']
+            self.config['bench_work_dir'] = bench_config.get('work_dir', self.config['bench_work_dir'])
+            self.config['bench_iterations'] = bench_config.get('iterations', self.config['bench_iterations'])
+            self.config['bench_genesis_mb'] = bench_config.get('genesis_mb', self.config['bench_genesis_mb'])
+            self.config['bench_addrbook_peers'] = bench_config.get('addrbook_peers', self.config['bench_addrbook_peers'])
+            self.config['bench_snapshot_mb'] = bench_config.get('snapshot_mb', self.config['bench_snapshot_mb'])
+            self.config['bench_tolerance'] = bench_config.get('tolerance', self.config['bench_tolerance'])
+            self.config['bench_report_file'] = bench_config.get('report_file', self.config['bench_report_file'])
+            self.config['bench_baseline_file'] = bench_config.get('baseline_file', self.config['bench_baseline_file'])
+        
+        # Upgrade configuration
+        if 'upgrade' in yaml_config:
+            upgrade_config = yaml_config['upgrade']
+            self.config['upgrade_rpc'] = upgrade_config.get('rpc', self.config['upgrade_rpc'])
+            self.config['upgrade_api'] = upgrade_config.get('api', self.config['upgrade_api'])
+            self.config['upgrade_prestage_hours'] = upgrade_config.get('prestage_hours', self.config['upgrade_prestage_hours'])
+            self.config['upgrade_poll_interval'] = upgrade_config.get('poll_interval', self.config['upgrade_poll_interval'])
+            self.config['upgrade_block_window'] = upgrade_config.get('block_window', self.config['upgrade_block_window'])
+            self.config['upgrade_build_repo'] = upgrade_config.get('build_repo', self.config['upgrade_build_repo'])
+            self.config['upgrade_allow_unverified'] = upgrade_config.get('allow_unverified', self.config['upgrade_allow_unverified'])
+        
+        # Backup configuration
+        if 'backup' in yaml_config:
+            backup_config = yaml_config['backup']
+            self.config['backup_enabled'] = backup_config.get('enabled', self.config['backup_enabled'])
+            self.config['backup_retain'] = backup_config.get('retain', self.config['backup_retain'])
+            self.config['backup_dir'] = backup_config.get('dir', self.config['backup_dir'])
+        
+        # Resource configuration
+        if 'resources' in yaml_config:
+            resources_config = yaml_config['resources']
+            self.config['unit_profile'] = resources_config.get('profile', self.config['unit_profile'])
+            self.config['colocated_nodes'] = resources_config.get('colocated_nodes', self.config['colocated_nodes'])
+            self.config['node_slot'] = resources_config.get('node_slot', self.config['node_slot'])
+        
+        # Logging configuration
+        if 'logging' in yaml_config:
+            logging_config = yaml_config['logging']
+            self.config['log_profile'] = logging_config.get('profile', self.config['log_profile'])
+            self.config['log_measure_window'] = logging_config.get('measure_window', self.config['log_measure_window'])
+        
+        # Log metrics configuration
+        if 'log_metrics' in yaml_config:
+            log_metrics_config = yaml_config['log_metrics']
+            self.config['log_metrics_interval'] = log_metrics_config.get('interval', self.config['log_metrics_interval'])
+            self.config['log_metrics_prom_file'] = log_metrics_config.get('prom_file', self.config['log_metrics_prom_file'])
+            self.config['log_metrics_json_file'] = log_metrics_config.get('json_file', self.config['log_metrics_json_file'])
         
         # Installation configuration
         if 'install' in yaml_config:
@@ -193,10 +378,14 @@ class CosmosNodeInstaller:
     def _update_module_configs(self) -> None:
         """Update module configurations with current config."""
         self.node_setup = NodeSetup(self.config)
+        self.binary_provisioner = BinaryProvisioner(self.config)
         self.node_sync = NodeSync(self.config)
         self.cosmovisor_setup = CosmovisorSetup(self.config)
         self.caddy_setup = CaddySetup(self.config)
         self.service_manager = ServiceManager(self.config)
+        self.logging_profile = LoggingProfile(self.config)
+        self.upgrade_watcher = UpgradeWatcher(self.config)
+        self.data_backup = DataBackup(self.config)
     
     def display_config_summary(self) -> None:
         """Display a summary of the current configuration."""
@@ -210,6 +399,12 @@ class CosmosNodeInstaller:
         print(f"Moniker: {self.config['moniker']}")
         print(f"Go Version: {self.config['go_version']}")
         
+        print("\nBuild:")
+        print(f"Repository: {self.config['binary_repo']}")
+        print(f"Tag: {self.config['binary_tag']}")
+        print(f"Cache Directory: {self.binary_provisioner.build_cache_dir}")
+        print(f"Jobs: {self.binary_provisioner.build_jobs}")
+        
         print("\nFiles:")
         print(f"Genesis URL: {self.config['genesis_url']}")
         print(f"Addrbook URL: {self.config['addrbook_url']}")
@@ -253,6 +448,62 @@ class CosmosNodeInstaller:
         print(f"Expose JSON-RPC: {'Yes' if self.config['expose_json_rpc'] else 'No'}")
         print(f"Domain: {self.config['domain']}")
         print(f"Domain Pattern: {self.config['domain_pattern']}")
+        print(f"Admin API: {self.config['caddy_admin']}")
+        for service, upstreams in (self.config['caddy_upstreams'] or {}).items():
+            print(f"Upstreams ({service}): {', '.join(upstreams) if isinstance(upstreams, list) else upstreams}")
+        print(f"Compression: {'Yes' if self.config['caddy_encode'] else 'No'}")
+        
+        print("\nRPC Cache:")
+        print(f"Enabled: {'Yes' if self.config['rpc_cache_enabled'] else 'No'}")
+        print(f"RPC Port: {self.config['rpc_cache_rpc_port']}")
+        print(f"API Port: {self.config['rpc_cache_api_port']}")
+        print(f"Size: {self.config['rpc_cache_size_mb']} MiB")
+        print(f"Latest TTL: {self.config['rpc_cache_latest_ttl']}s")
+        
+        print("\nLoad Test:")
+        print(f"Rates: {', '.join(str(rate) for rate in self.config['loadtest_rates'])} req/s")
+        print(f"Duration: {self.config['loadtest_duration']}s per rate")
+        print(f"p99 SLO: {self.config['loadtest_slo_p99_ms']}ms")
+        print(f"Report File: {self.config['loadtest_report_file']}")
+        print(f"Baseline File: {self.config['loadtest_baseline_file']}")
+        
+        print("\nSimulator:")
+        print(f"Chain ID: {self.config['sim_chain_id']}")
+        print(f"Validators: {self.config['sim_validators']}")
+        print(f"Block Time: {self.config['sim_block_time']}s")
+        print(f"RPC Port: {self.config['sim_rpc_port']}")
+        print(f"API Port: {self.config['sim_api_port']}")
+        
+        print("\nInstall Benchmark:")
+        print(f"Iterations: {self.config['bench_iterations']}")
+        print(f"Artifacts: genesis {self.config['bench_genesis_mb']} MB, {self.config['bench_addrbook_peers']} peers, snapshot {self.config['bench_snapshot_mb']} MB")
+        print(f"Report File: {self.config['bench_report_file']}")
+        print(f"Baseline File: {self.config['bench_baseline_file']}")
+        
+        print("\nUpgrade:")
+        print(f"Pre-stage Hours: {self.config['upgrade_prestage_hours']}")
+        print(f"Poll Interval: {self.config['upgrade_poll_interval']}")
+        print(f"Block Window: {self.config['upgrade_block_window']}")
+        print(f"Build Repository: {self.config['upgrade_build_repo']}")
+        
+        print("\nBackup:")
+        print(f"Pre-upgrade Backups: {'Yes' if self.config['backup_enabled'] else 'No'}")
+        print(f"Retain: {self.config['backup_retain']}")
+        print(f"Directory: {self.config['backup_dir'] or self.config['node_home'] + '/backups'}")
+        
+        print("\nResources:")
+        print(f"Unit Profile: {self.config['unit_profile']}")
+        print(f"Co-located Nodes: {self.config['colocated_nodes']}")
+        print(f"Node Slot: {self.config['node_slot']}")
+        
+        print("\nLogging:")
+        print(f"Profile: {self.config['log_profile'] or 'unchanged'}")
+        print(f"Measure Window: {self.config['log_measure_window']}")
+        
+        print("\nLog Metrics:")
+        print(f"Interval: {self.config['log_metrics_interval']}")
+        print(f"Prometheus File: {self.config['log_metrics_prom_file']}")
+        print(f"JSON Lines File: {self.config['log_metrics_json_file']}")
         
         print("\nInstallation:")
         print(f"Install Prerequisites: {'Yes' if self.config['should_install_prerequisites'] else 'No'}")
@@ -278,9 +529,13 @@ class CosmosNodeInstaller:
         print("7. Display configuration")
         print("8. Start/enable node service")
         print("9. Show node logs")
-        print("10. Exit")
+        print("10. Watch upgrades and pre-stage binaries")
+        print("11. Manage data backups")
+        print("12. Show node log metrics")
+        print("13. Apply logging profile")
+        print("14. Exit")
         
-        choice = input("\nEnter your choice (1-10): ")
+        choice = input("\nEnter your choice (1-14): ")
         return choice
     
     def gather_all_input(self) -> None:
@@ -352,6 +607,35 @@ class CosmosNodeInstaller:
             else:
                 self.config['domain_pattern'] = get_user_input("Domain pattern for wildcard SSL", self.config['domain_pattern'])
     
+    def _gather_logging_input(self) -> None:
+        """Gather input for the logging profile."""
+        print_header("Logging Profile")
+        
+        for name, profile in LOG_PROFILES.items():
+            print(f"{name} - log_level \"{profile['log_level']}\", {profile['log_format']} format, "
+                  f"journald burst {profile['rate_limit_burst']} per {profile['rate_limit_interval']}")
+        
+        self.config['log_profile'] = get_user_input("Logging profile", self.config['log_profile'] or "metrics")
+    
+    def _manage_backups(self) -> None:
+        """Show data backups and create or roll back to one."""
+        self.data_backup.show_backups()
+        
+        print("\n1. Create backup now")
+        print("2. Roll back to a backup")
+        print("3. Back")
+        
+        backup_choice = get_user_input("Choose an action (1-3)", "3")
+        
+        if backup_choice == "1":
+            self.data_backup.create_backup()
+        elif backup_choice == "2":
+            backups = self.data_backup.list_backups()
+            default_name = backups[0]['name'] if backups else ""
+            name = get_user_input("Backup name", default_name)
+            if name and get_yes_no_input(f"Stop the node and roll back data to {name}", False):
+                self.data_backup.rollback(name)
+    
     def _gather_install_input(self) -> None:
         """Gather input for installation options."""
         print_header("Installation Options")
@@ -388,6 +672,13 @@ class CosmosNodeInstaller:
                 "moniker": self.config['moniker'],
                 "go_version": self.config['go_version']
             },
+            "build": {
+                "repo": self.config['binary_repo'],
+                "tag": self.config['binary_tag'],
+                "cache_dir": self.config['build_cache_dir'],
+                "jobs": self.config['build_jobs'],
+                "allow_unverified": self.config['build_allow_unverified']
+            },
             "files": {
                 "genesis_url": self.config['genesis_url'],
                 "addrbook_url": self.config['addrbook_url'],
@@ -426,7 +717,88 @@ class CosmosNodeInstaller:
                 "expose_grpc": self.config['expose_grpc'],
                 "expose_json_rpc": self.config['expose_json_rpc'],
                 "domain": self.config['domain'],
-                "domain_pattern": self.config['domain_pattern']
+                "domain_pattern": self.config['domain_pattern'],
+                "admin": self.config['caddy_admin'],
+                "upstreams": self.config['caddy_upstreams'],
+                "health_interval": self.config['caddy_health_interval'],
+                "keepalive_conns": self.config['caddy_keepalive_conns'],
+                "encode": self.config['caddy_encode']
+            },
+            "rpc_cache": {
+                "enabled": self.config['rpc_cache_enabled'],
+                "listen": self.config['rpc_cache_listen'],
+                "rpc_port": self.config['rpc_cache_rpc_port'],
+                "api_port": self.config['rpc_cache_api_port'],
+                "size_mb": self.config['rpc_cache_size_mb'],
+                "latest_ttl": self.config['rpc_cache_latest_ttl']
+            },
+            "loadtest": {
+                "targets": self.config['loadtest_targets'],
+                "mix": self.config['loadtest_mix'],
+                "rates": self.config['loadtest_rates'],
+                "duration": self.config['loadtest_duration'],
+                "slo_p99_ms": self.config['loadtest_slo_p99_ms'],
+                "tolerance": self.config['loadtest_tolerance'],
+                "report_file": self.config['loadtest_report_file'],
+                "baseline_file": self.config['loadtest_baseline_file']
+            },
+            "simulator": {
+                "chain_id": self.config['sim_chain_id'],
+                "validators": self.config['sim_validators'],
+                "block_time": self.config['sim_block_time'],
+                "miss_rate": self.config['sim_miss_rate'],
+                "history": self.config['sim_history'],
+                "listen": self.config['sim_listen'],
+                "rpc_port": self.config['sim_rpc_port'],
+                "api_port": self.config['sim_api_port'],
+                "latency_ms": self.config['sim_latency_ms'],
+                "jitter_ms": self.config['sim_jitter_ms'],
+                "error_rate": self.config['sim_error_rate'],
+                "lag": self.config['sim_lag'],
+                "stall_at_height": self.config['sim_stall_at_height'],
+                "stall_seconds": self.config['sim_stall_seconds'],
+                "offline_at_height": self.config['sim_offline_at_height'],
+                "signed_blocks_window": self.config['sim_signed_blocks_window'],
+                "min_signed_per_window": self.config['sim_min_signed_per_window'],
+                "downtime_jail_duration": self.config['sim_downtime_jail_duration']
+            },
+            "bench": {
+                "work_dir": self.config['bench_work_dir'],
+                "iterations": self.config['bench_iterations'],
+                "genesis_mb": self.config['bench_genesis_mb'],
+                "addrbook_peers": self.config['bench_addrbook_peers'],
+                "snapshot_mb": self.config['bench_snapshot_mb'],
+                "tolerance": self.config['bench_tolerance'],
+                "report_file": self.config['bench_report_file'],
+                "baseline_file": self.config['bench_baseline_file']
+            },
+            "upgrade": {
+                "rpc": self.config['upgrade_rpc'],
+                "api": self.config['upgrade_api'],
+                "prestage_hours": self.config['upgrade_prestage_hours'],
+                "poll_interval": self.config['upgrade_poll_interval'],
+                "block_window": self.config['upgrade_block_window'],
+                "build_repo": self.config['upgrade_build_repo'],
+                "allow_unverified": self.config['upgrade_allow_unverified']
+            },
+            "backup": {
+                "enabled": self.config['backup_enabled'],
+                "retain": self.config['backup_retain'],
+                "dir": self.config['backup_dir']
+            },
+            "resources": {
+                "profile": self.config['unit_profile'],
+                "colocated_nodes": self.config['colocated_nodes'],
+                "node_slot": self.config['node_slot']
+            },
+            "logging": {
+                "profile": self.config['log_profile'],
+                "measure_window": self.config['log_measure_window']
+            },
+            "log_metrics": {
+                "interval": self.config['log_metrics_interval'],
+                "prom_file": self.config['log_metrics_prom_file'],
+                "json_file": self.config['log_metrics_json_file']
             },
             "install": {
                 "prerequisites": self.config['should_install_prerequisites'],
@@ -459,6 +831,7 @@ class CosmosNodeInstaller:
                     self.node_setup.install_prerequisites()
                 
                 if self.config['setup_node_config']:
+                    self.binary_provisioner.provision()
                     self.node_setup.setup_node()
                 
                 if self.config['setup_cosmovisor_config']:
@@ -488,6 +861,7 @@ class CosmosNodeInstaller:
                 self.node_setup.gather_pruning_input()
                 self.node_setup.gather_ports_input()
                 self._update_config_from_node_setup()
+                self.binary_provisioner.provision()
                 self.node_setup.setup_node()
             elif choice == "6":  # Cosmovisor setup only
                 if not self.config['binary_name'] or not self.config['node_home']:
@@ -501,7 +875,17 @@ class CosmosNodeInstaller:
                 self.service_manager.start_enable_service()
             elif choice == "9":  # Show node logs
                 self.service_manager.show_node_logs()
-            elif choice == "10":  # Exit
+            elif choice == "10":  # Watch upgrades
+                self.upgrade_watcher.watch()
+            elif choice == "11":  # Manage data backups
+                self._manage_backups()
+            elif choice == "12":  # Show node log metrics
+                self.service_manager.show_log_metrics()
+            elif choice == "13":  # Apply logging profile
+                self._gather_logging_input()
+                self._update_module_configs()
+                self.logging_profile.apply_profile()
+            elif choice == "14":  # Exit
                 print_header("Exiting")
                 break
             else:
@@ -511,6 +895,15 @@ def main():
     """Main function."""
     parser = argparse.ArgumentParser(description="Cosmos Node Installer")
     parser.add_argument("--config", help="Path to configuration file")
+    parser.add_argument("--watch-upgrades", action="store_true", help="Watch for pending upgrades and pre-stage binaries, without the menu")
+    parser.add_argument("--log-metrics", nargs="?", const="", metavar="JOURNAL", help="Stream node log metrics, or replay a saved `journalctl -o json` file, without the menu")
+    parser.add_argument("--rpc-cache", action="store_true", help="Run the caching proxy in front of the node's RPC and API, without the menu")
+    parser.add_argument("--rpc-cache-bench", action="store_true", help="Benchmark the caching proxy against a stub node")
+    parser.add_argument("--load-test", action="store_true", help="Load test the node's endpoints at the configured rates and compare with the baseline")
+    parser.add_argument("--load-test-stub", action="store_true", help="Run the load test against the bundled stub server")
+    parser.add_argument("--simulate-node", action="store_true", help="Serve a simulated node's RPC, websocket and REST endpoints for testing")
+    parser.add_argument("--bench-install", action="store_true", help="Benchmark the install phases against a stub binary and local artifacts")
+    parser.add_argument("--rollback-backup", metavar="NAME", help="Roll the node data back to the named backup, without the menu")
     args = parser.parse_args()
     
     config_path = args.config
@@ -521,6 +914,47 @@ def main():
             print(f"Found configuration file: {config_path}")
     
     installer = CosmosNodeInstaller(config_path)
+    
+    if args.log_metrics is not None:
+        installer.service_manager.show_log_metrics(args.log_metrics)
+        return
+    
+    if args.rpc_cache or args.rpc_cache_bench:
+        # aiohttp is only needed for the proxy
+        from modules.rpccache import RpcCache
+        rpc_cache = RpcCache(installer.config)
+        if args.rpc_cache_bench:
+            rpc_cache.benchmark()
+        else:
+            rpc_cache.run()
+        return
+    
+    if args.load_test or args.load_test_stub:
+        # aiohttp is only needed for the load test
+        from modules.loadtest import EndpointLoadTest
+        if not EndpointLoadTest(installer.config).run(stub=args.load_test_stub):
+            sys.exit(1)
+        return
+    
+    if args.simulate_node:
+        # aiohttp is only needed for the simulator
+        from modules.simnode import SimulatedNode
+        SimulatedNode(installer.config).run()
+        return
+    
+    if args.bench_install:
+        if not InstallBenchmark(installer.config).run():
+            sys.exit(1)
+        return
+    
+    if args.rollback_backup:
+        installer.data_backup.rollback(args.rollback_backup)
+        return
+    
+    if args.watch_upgrades:
+        installer.upgrade_watcher.watch()
+        return
+    
     installer.run()
 
 if __name__ == "__main__":
@@ -0,0 +1,290 @@
+"""
+Cosmos Node Installer - Backup Module
+
+This module handles fast pre-upgrade backups of the node data directory
+using copy-on-write or hardlink snapshots, and rollback to a backup.
+"""
+
+import os
+import shutil
+from typing import Dict, Any, List
+
+from .utils import (
+    print_header, print_step, print_success, print_warning, print_error,
+    run_command
+)
+
+HOOK_NAME = "pre-upgrade-backup.sh"
+
+# Cosmovisor runs this from $DAEMON_HOME/cosmovisor with the upgrade name and
+# height as arguments, after the node has halted and before the binary switch.
+HOOK_TEMPLATE = """#!/bin/bash
+# Pre-upgrade data backup, generated by the Cosmos Node Installer
+set -euo pipefail
+
+DATA_DIR="{data_dir}"
+BACKUP_DIR="{backup_dir}"
+RETAIN={retain}
+CURRENT_LINK="{current_link}"
+
+NAME="${{1:-manual}}-${{2:-$(date +%s)}}"
+TARGET="$BACKUP_DIR/$NAME"
+STAGING="$TARGET.partial"
+
+mkdir -p "$BACKUP_DIR"
+rm -rf "$STAGING"
+mkdir -p "$STAGING"
+
+# Bytes that must be physically copied when reflinks are unavailable
+COPY_BYTES=$(find "$DATA_DIR" -type f ! -name '*.sst' ! -name '*.ldb' -printf '%s\\n' | awk '{{s+=$1}} END {{print s+0}}')
+FREE_BYTES=$(df -B1 --output=avail "$BACKUP_DIR" | tail -n 1)
+if [ "$COPY_BYTES" -gt "$FREE_BYTES" ]; then
+    echo "Not enough free space for backup: need $COPY_BYTES bytes, have $FREE_BYTES" >&2
+    rm -rf "$STAGING"
+    exit 1
+fi
+
+START=$(date +%s.%N)
+if cp -a --reflink=always "$DATA_DIR" "$STAGING/data" 2>/dev/null; then
+    METHOD=reflink
+else
+    # Table files are immutable once written, so they can share inodes with
+    # the live data. Everything else (WAL, MANIFEST, state json) is copied.
+    rm -rf "$STAGING/data"
+    cp -al "$DATA_DIR" "$STAGING/data"
+    (cd "$DATA_DIR" && find . -type f ! -name '*.sst' ! -name '*.ldb' -print0) |
+        while IFS= read -r -d '' f; do
+            cp -a --remove-destination "$DATA_DIR/$f" "$STAGING/data/$f"
+        done
+    METHOD=hardlink
+fi
+END=$(date +%s.%N)
+
+cat > "$STAGING/backup.info" <<EOF
+name=$NAME
+upgrade=${{1:-}}
+height=${{2:-}}
+created=$(date -u +%Y-%m-%dT%H:%M:%SZ)
+method=$METHOD
+binary=$(readlink -f "$CURRENT_LINK" || true)
+EOF
+# A backup taken again for the same upgrade replaces the earlier one, mv would nest inside it
+rm -rf "$TARGET"
+mv "$STAGING" "$TARGET"
+
+echo "Backup $NAME created with $METHOD in $(awk -v s="$START" -v e="$END" 'BEGIN {{printf "%.1f", e - s}}')s"
+
+# Keep only the newest $RETAIN backups
+ls -1dt "$BACKUP_DIR"/*/ 2>/dev/null | grep -v '\\.partial/$' | tail -n +$((RETAIN + 1)) | xargs -r rm -rf
+"""
+
+class DataBackup:
+    """Class for fast data directory backups of a Cosmos-based blockchain node."""
+
+    def __init__(self, config: Dict[str, Any]):
+        """
+        Initialize the data backup with configuration.
+
+        Args:
+            config: Dictionary containing node configuration
+        """
+        # Node configuration
+        self.binary_name = config.get('binary_name', "")
+        self.node_home = config.get('node_home', "")
+
+        # Backup configuration
+        self.backup_enabled = config.get('backup_enabled', False)
+        self.backup_retain = int(config.get('backup_retain', 3))
+        self.backup_dir = config.get('backup_dir', "") or f"{self.node_home}/backups"
+
+    @property
+    def hook_path(self) -> str:
+        """Path of the Cosmovisor pre-upgrade hook."""
+        return f"{self.node_home}/cosmovisor/{HOOK_NAME}"
+
+    def install_hook(self) -> bool:
+        """
+        Install the pre-upgrade backup hook into the Cosmovisor directory.
+
+        Returns:
+            True if the hook was installed, False if the backup directory cannot hold link-based backups
+        """
+        print_step("Installing pre-upgrade backup hook")
+
+        # Hardlinks and reflinks cannot cross filesystems, and a failing cp in the hook aborts the upgrade
+        data_dir = f"{self.node_home}/data"
+        backup_parent = os.path.abspath(self.backup_dir)
+        while not os.path.exists(backup_parent):
+            backup_parent = os.path.dirname(backup_parent)
+        if os.path.exists(data_dir) and os.stat(backup_parent).st_dev != os.stat(data_dir).st_dev:
+            print_error(f"Backup directory {self.backup_dir} is not on the same filesystem as {data_dir}, "
+                        "not installing the pre-upgrade backup hook")
+            return False
+
+        os.makedirs(os.path.dirname(self.hook_path), exist_ok=True)
+        with open(self.hook_path, "w") as f:
+            f.write(HOOK_TEMPLATE.format(
+                data_dir=data_dir,
+                backup_dir=self.backup_dir,
+                retain=self.backup_retain,
+                current_link=f"{self.node_home}/cosmovisor/current",
+            ))
+        os.chmod(self.hook_path, 0o755)
+
+        print_success(f"Pre-upgrade backup hook installed at {self.hook_path}")
+        return True
+
+    def create_backup(self, label: str = "manual") -> None:
+        """
+        Take a backup now using the same hook Cosmovisor runs at the halt height.
+
+        The node is stopped for the duration of the backup so the databases are consistent.
+
+        Args:
+            label: Label used as the first part of the backup name
+        """
+        print_header("Creating Data Backup")
+
+        if not os.path.exists(self.hook_path) and not self.install_hook():
+            return
+
+        _, height, _ = run_command(
+            f"jq -r .height {self.node_home}/data/priv_validator_state.json 2>/dev/null || true",
+            exit_on_error=False
+        )
+
+        print_step("Stopping node service")
+        run_command(f"sudo systemctl stop {self.binary_name} || true")
+        try:
+            run_command(f"{self.hook_path} {label} {height.strip() or ''}")
+        finally:
+            print_step("Starting node service")
+            run_command(f"sudo systemctl start {self.binary_name}")
+
+        self.show_backups()
+
+    def list_backups(self) -> List[Dict[str, str]]:
+        """
+        List backups, newest first.
+
+        Returns:
+            List of dictionaries with the fields of each backup.info file
+        """
+        if not os.path.isdir(self.backup_dir):
+            return []
+
+        backups = []
+        for name in os.listdir(self.backup_dir):
+            info_path = f"{self.backup_dir}/{name}/backup.info"
+            if name.endswith(".partial") or not os.path.isfile(info_path):
+                continue
+
+            with open(info_path, "r") as f:
+                info = dict(line.rstrip("\n").split("=", 1) for line in f if "=" in line)
+            info['name'] = name
+            backups.append(info)
+
+        return sorted(backups, key=lambda b: b.get('created', ""), reverse=True)
+
+    def show_backups(self) -> None:
+        """Show backups with the disk space each one uses exclusively."""
+        print_header("Data Backups")
+
+        backups = self.list_backups()
+        if not backups:
+            print_warning(f"No backups found in {self.backup_dir}")
+            return
+
+        exclusive = self._exclusive_sizes([b['name'] for b in backups])
+        for backup in backups:
+            size = exclusive.get(backup['name'], 0)
+            print(f"{backup['name']}: created {backup.get('created', '?')}, "
+                  f"{backup.get('method', '?')}, {_format_bytes(size)} exclusive")
+
+        usage = shutil.disk_usage(self.backup_dir)
+        print(f"\nTotal exclusive: {_format_bytes(sum(exclusive.values()))}, "
+              f"filesystem free: {_format_bytes(usage.free)} of {_format_bytes(usage.total)}")
+
+    def rollback(self, name: str) -> None:
+        """
+        Roll the node data back to a backup.
+
+        The live data directory is kept as data.rollback-<name> until the next
+        rollback, and the current validator signing state is preserved so the
+        node can never sign at a height it has already signed.
+
+        Args:
+            name: Name of the backup to restore
+        """
+        print_header(f"Rolling Back to Backup {name}")
+
+        backup_data = f"{self.backup_dir}/{name}/data"
+        if not os.path.isdir(backup_data):
+            print_error(f"Backup {name} not found in {self.backup_dir}")
+            return
+
+        data_dir = f"{self.node_home}/data"
+        aside_dir = f"{self.node_home}/data.rollback-{name}"
+        state_file = "priv_validator_state.json"
+
+        print_step("Stopping node service")
+        run_command(f"sudo systemctl stop {self.binary_name} || true")
+
+        if os.path.exists(f"{data_dir}/{state_file}"):
+            print_step("Backing up validator state")
+            run_command(f"cp {data_dir}/{state_file} {self.node_home}/{state_file}.rollback")
+
+        print_step("Moving current data aside")
+        run_command(f"rm -rf {self.node_home}/data.rollback-*")
+        run_command(f"mv {data_dir} {aside_dir}")
+
+        print_step("Restoring data from backup")
+        exit_code, _, _ = run_command(f"cp -a --reflink=always {backup_data} {data_dir}", exit_on_error=False)
+        if exit_code != 0:
+            run_command(f"rm -rf {data_dir} && cp -al {backup_data} {data_dir}")
+            for root, _, files in os.walk(data_dir):
+                for filename in files:
+                    if not filename.endswith((".sst", ".ldb")):
+                        path = os.path.join(root, filename)
+                        shutil.copy2(path, f"{path}.tmp")
+                        os.replace(f"{path}.tmp", path)
+
+        if os.path.exists(f"{self.node_home}/{state_file}.rollback"):
+            print_step("Restoring validator state")
+            run_command(f"mv {self.node_home}/{state_file}.rollback {data_dir}/{state_file}")
+
+        info = next((b for b in self.list_backups() if b['name'] == name), {})
+        if info.get('binary'):
+            print_warning(f"Backup was taken while running {info['binary']}, "
+                          f"check {self.node_home}/cosmovisor/current before restarting")
+
+        print_step("Starting node service")
+        run_command(f"sudo systemctl start {self.binary_name}")
+
+        print_success(f"Rolled back to backup {name}, previous data kept in {aside_dir}")
+
+    def _exclusive_sizes(self, names: List[str]) -> Dict[str, int]:
+        """
+        Measure the bytes used only by each backup.
+
+        du counts a hardlinked inode once, at its first occurrence, so listing
+        the live data directory first leaves each backup with the bytes it
+        does not share. Reflinked extents cannot be seen this way and are
+        reported at their apparent size.
+        """
+        paths = " ".join(f"{self.backup_dir}/{name}" for name in names)
+        _, stdout, _ = run_command(f"du -sb {self.node_home}/data {paths}", exit_on_error=False)
+
+        sizes = {}
+        for line in stdout.splitlines():
+            size, path = line.split("\t", 1)
+            sizes[os.path.basename(path.rstrip("/"))] = int(size)
+        return {name: sizes.get(name, 0) for name in names}
+
+def _format_bytes(size: int) -> str:
+    """Format a byte count for display."""
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TiB"
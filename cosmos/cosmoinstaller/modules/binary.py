@@ -0,0 +1,325 @@
+"""
+Cosmos Node Installer - Binary Module
+
+This module provisions the node binary, either from a prebuilt release asset
+or by building a git tag from source with a persistent Go build cache.
+"""
+
+import os
+import re
+import fcntl
+import shutil
+import hashlib
+import platform
+import tempfile
+import requests
+from typing import Dict, Any, Optional
+
+from .utils import (
+    print_header, print_step, print_success, print_warning, print_error,
+    run_command
+)
+
+class BinaryProvisioner:
+    """Class for provisioning the binary of a Cosmos-based blockchain node."""
+
+    def __init__(self, config: Dict[str, Any]):
+        """
+        Initialize the binary provisioner with configuration.
+
+        Args:
+            config: Dictionary containing node configuration
+        """
+        # Node configuration
+        self.binary_name = config.get('binary_name', "")
+        self.binary_path = config.get('binary_path', "")
+        self.go_version = config.get('go_version', "1.21.0")
+
+        # Build configuration
+        self.binary_repo = config.get('binary_repo', "")
+        self.binary_tag = config.get('binary_tag', "")
+        self.build_cache_dir = os.path.expanduser(config.get('build_cache_dir', "") or "~/.cache/cosmoinstaller")
+        self.build_jobs = int(config.get('build_jobs', 0)) or os.cpu_count() or 1
+        # Install release assets whose release publishes no checksum for them
+        self.allow_unverified = bool(config.get('build_allow_unverified', False))
+
+    @property
+    def go_env(self) -> str:
+        """Environment prefix that points Go at the shared, persistent caches."""
+        return (f"GOCACHE={self.build_cache_dir}/go-build "
+                f"GOMODCACHE={self.build_cache_dir}/go-mod "
+                f"GOFLAGS=-p={self.build_jobs}")
+
+    def provision(self) -> None:
+        """Install the configured tag of the node binary at binary_path."""
+        print_header("Provisioning Node Binary")
+
+        if not self.binary_repo or not self.binary_tag:
+            if os.path.isfile(self.binary_path):
+                print_success(f"Using existing binary {self.binary_path}")
+            else:
+                print_warning(f"No binary repository configured and {self.binary_path} does not exist")
+            return
+
+        cached = self.acquire(self.binary_tag)
+        if not cached:
+            print_error(f"Failed to provision {self.binary_name} {self.binary_tag}")
+            return
+
+        print_step(f"Installing {self.binary_name} to {self.binary_path}")
+        sudo = "" if os.access(os.path.dirname(self.binary_path) or ".", os.W_OK) else "sudo "
+        run_command(f"{sudo}install -m 755 {cached} {self.binary_path}")
+
+        print_success(f"{self.binary_name} {self.binary_tag} installed at {self.binary_path}")
+
+    def acquire(self, tag: str) -> Optional[str]:
+        """
+        Get a cached binary for a tag, fetching or building it on a cache miss.
+
+        Builds are keyed by (repo, tag, go version) and guarded by a lock file,
+        so concurrent installs on one host wait for a single build.
+
+        Args:
+            tag: Git tag of the release to acquire
+
+        Returns:
+            Path to the cached binary, or None on failure
+        """
+        go_version = self._installed_go_version()
+        key = hashlib.sha256(f"{self.binary_repo}@{tag}@{go_version}".encode()).hexdigest()[:16]
+        build_dir = f"{self.build_cache_dir}/builds/{key}"
+        cached = f"{build_dir}/{self.binary_name}"
+
+        os.makedirs(f"{self.build_cache_dir}/builds", exist_ok=True)
+        with open(f"{build_dir}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+            if os.path.isfile(cached):
+                print_success(f"Found cached {self.binary_name} {tag} ({go_version})")
+                return cached
+
+            staging_dir = tempfile.mkdtemp(dir=self.build_cache_dir)
+            try:
+                staged = self._fetch_release(tag, staging_dir) or self._build_from_source(tag, staging_dir)
+                if not staged or not smoke_test_binary(staged):
+                    return None
+
+                os.makedirs(build_dir, exist_ok=True)
+                shutil.move(staged, cached)
+            finally:
+                shutil.rmtree(staging_dir, ignore_errors=True)
+
+        print_success(f"Cached {self.binary_name} {tag} as {key}")
+        return cached
+
+    def install_go_tool(self, package: str) -> None:
+        """
+        Install a Go tool with `go install` using the shared caches.
+
+        Args:
+            package: Package path with version, e.g. cosmossdk.io/tools/cosmovisor/cmd/cosmovisor@latest
+        """
+        run_command(f"{self.go_env} go install {package}")
+
+    def _installed_go_version(self) -> str:
+        """Get the version of the Go toolchain that would build the binary."""
+        _, stdout, _ = run_command("go env GOVERSION 2>/dev/null || true", exit_on_error=False)
+        return stdout.strip() or f"go{self.go_version}"
+
+    def _fetch_release(self, tag: str, staging_dir: str) -> Optional[str]:
+        """
+        Download a prebuilt binary for this platform from the repository's GitHub release.
+
+        Args:
+            tag: Release tag
+            staging_dir: Directory to download into
+
+        Returns:
+            Path to the downloaded binary, or None if no usable asset exists
+        """
+        match = re.match(r"https://github\.com/([^/]+)/([^/]+?)(?:\.git)?/?$", self.binary_repo)
+        if not match:
+            return None
+
+        owner, repo = match.groups()
+        headers = {"Accept": "application/vnd.github+json"}
+        if os.environ.get("GITHUB_TOKEN"):
+            headers["Authorization"] = f"Bearer {os.environ['GITHUB_TOKEN']}"
+
+        try:
+            response = requests.get(
+                f"https://api.github.com/repos/{owner}/{repo}/releases/tags/{tag}", headers=headers, timeout=30
+            )
+            if response.status_code != 200:
+                print_step(f"No GitHub release for {tag}, building from source")
+                return None
+            assets = response.json().get('assets', [])
+        except requests.RequestException as e:
+            print_warning(f"Could not query GitHub releases: {e}")
+            return None
+
+        asset = _select_asset(assets, self.binary_name)
+        if not asset:
+            print_step(f"Release {tag} has no {_platform_suffix()} asset, building from source")
+            return None
+
+        expected = _release_checksum(assets, asset['name'])
+        if not expected and not self.allow_unverified:
+            print_warning(f"Release {tag} publishes no checksum for {asset['name']}, building from source instead "
+                          f"(set build.allow_unverified to install it unverified)")
+            return None
+
+        download_path = f"{staging_dir}/{asset['name']}"
+        print_step(f"Downloading release asset {asset['name']}")
+        digest = hashlib.sha256()
+        try:
+            with requests.get(asset['browser_download_url'], stream=True, timeout=60) as response:
+                response.raise_for_status()
+                with open(download_path, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=1 << 20):
+                        f.write(chunk)
+                        digest.update(chunk)
+        except requests.RequestException as e:
+            print_warning(f"Could not download {asset['name']}: {e}, building from source")
+            return None
+
+        if not expected:
+            print_warning(f"UNVERIFIED: release {tag} publishes no checksum for {asset['name']}, "
+                          f"installing it because build.allow_unverified is set (sha256 {digest.hexdigest()})")
+        elif expected != digest.hexdigest():
+            print_error(f"Checksum mismatch for {asset['name']}: expected {expected}, got {digest.hexdigest()}")
+            return None
+        else:
+            print_success("Release checksum verified")
+
+        return extract_binary(download_path, staging_dir, self.binary_name)
+
+    def _build_from_source(self, tag: str, staging_dir: str) -> Optional[str]:
+        """
+        Build a tag from source with the shared Go caches and parallel compilation.
+
+        Args:
+            tag: Git tag to build
+            staging_dir: Directory to build in
+
+        Returns:
+            Path to the built binary, or None on failure
+        """
+        print_step(f"Building {self.binary_name} {tag} from {self.binary_repo} with {self.build_jobs} jobs")
+
+        src_dir = f"{staging_dir}/src"
+        exit_code, _, _ = run_command(
+            f"git clone --depth 1 --branch {tag} {self.binary_repo} {src_dir}", exit_on_error=False
+        )
+        if exit_code != 0:
+            return None
+
+        exit_code, _, _ = run_command(
+            f"cd {src_dir} && {self.go_env} GOBIN={staging_dir} make install", exit_on_error=False
+        )
+        if exit_code != 0:
+            return None
+
+        binary_path = f"{staging_dir}/{self.binary_name}"
+        if not os.path.isfile(binary_path):
+            print_error(f"Build did not produce {self.binary_name}")
+            return None
+
+        return binary_path
+
+def extract_binary(download_path: str, staging_dir: str, binary_name: str) -> Optional[str]:
+    """
+    Extract a binary from a downloaded archive, or use the download as the binary.
+
+    Args:
+        download_path: Path of the downloaded file
+        staging_dir: Directory to extract into
+        binary_name: Name of the binary to look for
+
+    Returns:
+        Path to the executable binary, or None if the archive is damaged or does not contain it
+    """
+    if download_path.endswith((".tar.gz", ".tgz")):
+        exit_code, _, _ = run_command(f"tar -xzf {download_path} -C {staging_dir}", exit_on_error=False)
+    elif download_path.endswith(".zip"):
+        exit_code, _, _ = run_command(f"unzip -o {download_path} -d {staging_dir}", exit_on_error=False)
+    else:
+        binary_path = f"{staging_dir}/{binary_name}"
+        if download_path != binary_path:
+            shutil.move(download_path, binary_path)
+        os.chmod(binary_path, 0o755)
+        return binary_path
+
+    # A damaged archive must not exit the upgrade watcher
+    if exit_code != 0:
+        print_error(f"Could not extract {os.path.basename(download_path)}")
+        return None
+
+    for root, _, files in os.walk(staging_dir):
+        if binary_name in files:
+            binary_path = os.path.join(root, binary_name)
+            os.chmod(binary_path, 0o755)
+            return binary_path
+
+    print_error(f"Binary {binary_name} not found in {os.path.basename(download_path)}")
+    return None
+
+def smoke_test_binary(binary_path: str) -> bool:
+    """Check that a binary runs on this host by running its version command."""
+    print_step("Running version smoke test")
+    exit_code, stdout, stderr = run_command(f"{binary_path} version", exit_on_error=False)
+    if exit_code != 0:
+        print_error("Binary failed the version smoke test")
+        return False
+
+    print_success(f"Binary version: {(stdout or stderr).strip()}")
+    return True
+
+def platform_key() -> str:
+    """Get the Cosmovisor platform key for this host, e.g. linux/amd64."""
+    machine = platform.machine().lower()
+    arch = {"x86_64": "amd64", "aarch64": "arm64"}.get(machine, machine)
+    return f"{platform.system().lower()}/{arch}"
+
+def _platform_suffix() -> str:
+    """Get the platform as it usually appears in release asset names, e.g. linux-amd64."""
+    return platform_key().replace("/", "-")
+
+def _select_asset(assets: list, binary_name: str) -> Optional[Dict[str, Any]]:
+    """Pick the release asset for this platform, skipping checksum and signature files."""
+    system, arch = platform_key().split("/")
+    arch_names = {"amd64": ("amd64", "x86_64"), "arm64": ("arm64", "aarch64")}.get(arch, (arch,))
+
+    candidates = []
+    for asset in assets:
+        name = asset['name'].lower()
+        if name.endswith((".txt", ".sha256", ".sig", ".asc", ".pem", ".sbom", ".json")):
+            continue
+        if system in name and any(a in name for a in arch_names):
+            candidates.append(asset)
+
+    # Prefer assets named after the binary over bundles of other tools
+    candidates.sort(key=lambda a: binary_name not in a['name'])
+    return candidates[0] if candidates else None
+
+def _release_checksum(assets: list, asset_name: str) -> Optional[str]:
+    """Look up an asset's sha256 in a checksums file published with the release."""
+    for asset in assets:
+        name = asset['name'].lower()
+        if "checksum" not in name and "sha256" not in name:
+            continue
+
+        try:
+            response = requests.get(asset['browser_download_url'], timeout=30)
+            response.raise_for_status()
+        except requests.RequestException:
+            continue
+
+        for line in response.text.splitlines():
+            parts = line.split()
+            if len(parts) == 2 and parts[1].lstrip("*") == asset_name:
+                return parts[0].lower()
+            if len(parts) == 1 and name == f"{asset_name.lower()}.sha256":
+                return parts[0].lower()
+
+    return None
@@ -5,13 +5,21 @@ This module handles Caddy installation and setup.
 """
 
 import os
-from typing import Dict, Any
+import requests
+from typing import Dict, Any, List, Optional
 
 from .utils import (
     print_header, print_step, print_success, print_warning, print_error,
     run_command
 )
 
+# Active health checks per service: path and a body regex a healthy, caught-up replica matches.
+# gRPC and JSON-RPC replicas are checked passively from failed requests.
+HEALTH_CHECKS = {
+    'rpc': {'uri': "/status", 'body': r'"catching_up":\s*false'},
+    'api': {'uri': "/cosmos/base/tendermint/v1beta1/syncing", 'body': r'"syncing":\s*false'},
+}
+
 class CaddySetup:
     """Class for setting up Caddy for a Cosmos-based blockchain node."""
     
@@ -32,6 +40,7 @@ class CaddySetup:
         # JSON-RPC configuration
         self.json_rpc_enabled = config.get('json_rpc_enabled', False)
         self.json_rpc_port = config.get('json_rpc_port', 8545)
+        self.json_rpc_ws_port = config.get('json_rpc_ws_port', 8546)
         
         # Caddy configuration
         self.expose_rpc = config.get('expose_rpc', False)
@@ -40,6 +49,18 @@ class CaddySetup:
         self.expose_json_rpc = config.get('expose_json_rpc', False)
         self.domain = config.get('domain', "")
         self.domain_pattern = config.get('domain_pattern', "")
+        self.caddy_admin = config.get('caddy_admin', "http://localhost:2019")
+        
+        # Cluster configuration: replicas per service, defaulting to the local node
+        self.caddy_upstreams = config.get('caddy_upstreams', {}) or {}
+        self.caddy_health_interval = config.get('caddy_health_interval', "10s")
+        self.caddy_keepalive_conns = int(config.get('caddy_keepalive_conns', 32))
+        self.caddy_encode = config.get('caddy_encode', True)
+        
+        # RPC cache configuration
+        self.rpc_cache_enabled = config.get('rpc_cache_enabled', False)
+        self.rpc_cache_rpc_port = config.get('rpc_cache_rpc_port', 36657)
+        self.rpc_cache_api_port = config.get('rpc_cache_api_port', 11317)
     
 
     def install_caddy(self) -> None:
@@ -73,21 +94,20 @@ class CaddySetup:
             print_warning("No domain specified, skipping Caddy setup")
             return
         
-        # Update Caddyfile
+        # Update Caddyfile so the configuration survives a Caddy restart
         print_step("Updating Caddyfile")
         self._update_caddyfile()
         
-        # Restart Caddy
-        print_step("Restarting Caddy")
-        run_command("sudo systemctl restart caddy")
+        # Apply the routes live, without restarting Caddy or touching other chains' routes
+        print_step("Applying configuration through the Caddy admin API")
+        if not self._apply_via_admin_api():
+            print_warning("Caddy admin API not available, reloading Caddy gracefully instead")
+            run_command("sudo systemctl reload caddy")
         
         print_success("Caddy setup completed successfully")
     
     def _update_caddyfile(self) -> None:
         """Update Caddyfile for Caddy, preserving existing configuration."""
-        # Use the full domain as provided in the configuration
-        full_domain = self.domain
-        
         # Check if Caddyfile exists
         caddyfile_path = "/etc/caddy/Caddyfile"
         temp_caddyfile_path = "/tmp/Caddyfile"
@@ -113,49 +133,13 @@ class CaddySetup:
         # Add comment header for this chain's configuration
         new_config += f"\n# {chain_identifier}\n\n"
         
-        # Prepare domain configurations
+        # Prepare domain configurations, replacing this chain's existing sites
         domain_configs = []
-        
-        # Add RPC configuration
-        if self.expose_rpc:
-            rpc_domain = f"rpc.{full_domain}"
-            if rpc_domain not in existing_content:
-                domain_configs.append(f"""{rpc_domain} {{
-    reverse_proxy localhost:{self.rpc_port}
-}}
-""")
-        
-        # Add API configuration
-        if self.expose_api:
-            api_domain = f"api.{full_domain}"
-            if api_domain not in existing_content:
-                domain_configs.append(f"""{api_domain} {{
-    reverse_proxy localhost:{self.api_port}
-}}
-""")
-        
-        # Add gRPC configuration
-        if self.expose_grpc:
-            grpc_domain = f"grpc.{full_domain}"
-            if grpc_domain not in existing_content:
-                domain_configs.append(f"""{grpc_domain} {{
-    reverse_proxy {{
-        to h2c://localhost:{self.grpc_port}
-        transport http {{
-            versions h2c 2
-        }}
-    }}
-}}
-""") 
-        
-        # Add JSON-RPC configuration if enabled
-        if self.expose_json_rpc and self.json_rpc_enabled:
-            jsonrpc_domain = f"jsonrpc.{full_domain}"
-            if jsonrpc_domain not in existing_content:
-                domain_configs.append(f"""{jsonrpc_domain} {{
-    reverse_proxy localhost:{self.json_rpc_port}
-}}
-""")
+        for site in self._site_specs():
+            if site['host'] in existing_content:
+                existing_content = self._remove_caddyfile_site(existing_content, site['host'])
+            domain_configs.append(self._render_caddyfile_site(site))
+        existing_content = existing_content.replace(new_config.strip() + "\n", "", 1)
         
         # Combine existing content with new configurations
         if domain_configs:
@@ -197,3 +181,258 @@ class CaddySetup:
             print_success("Caddyfile updated successfully")
         else:
             print_warning("No new Caddy configurations to add")
+    
+    def _chain_identifier(self) -> str:
+        """Get the identifier used to tag this chain's configuration."""
+        return self.chain_id or self.binary_name or "cosmos-node"
+    
+    def _site_specs(self) -> List[Dict[str, Any]]:
+        """
+        Describe the sites to expose for this chain.
+        
+        Returns:
+            List of site dictionaries with service, host, upstreams, transport and
+            the optional websocket upstreams
+        """
+        sites = []
+        
+        if self.expose_rpc:
+            if self.rpc_cache_enabled:
+                # The cache does not proxy websockets, so /websocket goes straight to the node
+                site = self._site("rpc", "rpc", self.rpc_cache_rpc_port)
+                site['ws_upstreams'] = [f"localhost:{self.rpc_port}"]
+                sites.append(site)
+            else:
+                sites.append(self._site("rpc", "rpc", self.rpc_port))
+        
+        if self.expose_api:
+            sites.append(self._site("api", "api", self.rpc_cache_api_port if self.rpc_cache_enabled else self.api_port))
+        
+        if self.expose_grpc:
+            sites.append(self._site("grpc", "grpc", self.grpc_port, transport="h2c"))
+        
+        if self.expose_json_rpc and self.json_rpc_enabled:
+            site = self._site("jsonrpc", "json_rpc", self.json_rpc_port)
+            site['ws_upstreams'] = self._upstreams("json_rpc_ws", self.json_rpc_ws_port)
+            sites.append(site)
+        
+        return sites
+    
+    def _site(self, service: str, upstream_key: str, port: int, transport: str = "http") -> Dict[str, Any]:
+        """Build the spec of one site."""
+        return {
+            'service': service,
+            'host': f"{service}.{self.domain}",
+            'upstreams': self._upstreams(upstream_key, port),
+            'transport': transport,
+            'ws_upstreams': [],
+        }
+    
+    def _upstreams(self, key: str, port: int) -> List[str]:
+        """Get the configured replicas of a service, or the local node."""
+        upstreams = self.caddy_upstreams.get(key) or [f"localhost:{port}"]
+        return [upstreams] if isinstance(upstreams, str) else list(upstreams)
+    
+    def _render_caddyfile_site(self, site: Dict[str, Any]) -> str:
+        """Render a site as a Caddyfile block."""
+        lines = [f"{site['host']} {{"]
+        
+        if site['ws_upstreams']:
+            lines += [
+                "    @websocket {",
+                "        header Connection *Upgrade*",
+                "        header Upgrade websocket",
+                "    }",
+            ]
+            lines += self._render_caddyfile_proxy(site, site['ws_upstreams'], "@websocket ")
+        
+        if self.caddy_encode and site['transport'] != "h2c":
+            lines.append("    encode zstd gzip")
+        
+        lines += self._render_caddyfile_proxy(site, site['upstreams'])
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+    
+    def _render_caddyfile_proxy(self, site: Dict[str, Any], upstreams: List[str], matcher: str = "") -> List[str]:
+        """Render the reverse_proxy directive of a site."""
+        scheme = "h2c://" if site['transport'] == "h2c" else ""
+        lines = [f"    reverse_proxy {matcher}{{", f"        to {' '.join(scheme + upstream for upstream in upstreams)}"]
+        
+        if len(upstreams) > 1:
+            lines += [
+                "        lb_policy least_conn",
+                "        fail_duration 30s",
+                "        max_fails 3",
+            ]
+            health = HEALTH_CHECKS.get(site['service'])
+            if health and not matcher:
+                lines += [
+                    f"        health_uri {health['uri']}",
+                    f"        health_body `{health['body']}`",
+                    f"        health_interval {self.caddy_health_interval}",
+                    "        health_timeout 5s",
+                ]
+        
+        lines.append("        transport http {")
+        if site['transport'] == "h2c":
+            lines.append("            versions h2c 2")
+        lines += [
+            "            keepalive 90s",
+            f"            keepalive_idle_conns_per_host {self.caddy_keepalive_conns}",
+            "        }",
+            "    }",
+        ]
+        return lines
+    
+    def _render_json_route(self, site: Dict[str, Any]) -> Dict[str, Any]:
+        """Render a site as a Caddy JSON route tagged with an @id for later updates."""
+        handlers = []
+        if self.caddy_encode and site['transport'] != "h2c":
+            handlers.append({
+                'handler': "encode",
+                'encodings': {'zstd': {}, 'gzip': {}},
+                'prefer': ["zstd", "gzip"],
+            })
+        handlers.append(self._render_json_proxy(site, site['upstreams']))
+        
+        routes = []
+        if site['ws_upstreams']:
+            routes.append({
+                'match': [{'header': {'Connection': ["*Upgrade*"], 'Upgrade': ["websocket"]}}],
+                'handle': [self._render_json_proxy(site, site['ws_upstreams'], websocket=True)],
+            })
+        routes.append({'handle': handlers})
+        
+        return {
+            '@id': self._route_id(site),
+            'match': [{'host': [site['host']]}],
+            'handle': [{'handler': "subroute", 'routes': routes}],
+            'terminal': True,
+        }
+    
+    def _render_json_proxy(self, site: Dict[str, Any], upstreams: List[str], websocket: bool = False) -> Dict[str, Any]:
+        """Render the reverse_proxy handler of a site."""
+        transport = {
+            'protocol': "http",
+            'keep_alive': {'idle_timeout': "90s", 'max_idle_conns_per_host': self.caddy_keepalive_conns},
+        }
+        if site['transport'] == "h2c":
+            transport['versions'] = ["h2c", "2"]
+        
+        proxy = {
+            'handler': "reverse_proxy",
+            'upstreams': [{'dial': upstream} for upstream in upstreams],
+            'transport': transport,
+        }
+        
+        if len(upstreams) > 1:
+            proxy['load_balancing'] = {'selection_policy': {'policy': "least_conn"}}
+            proxy['health_checks'] = {'passive': {'fail_duration': "30s", 'max_fails': 3}}
+            health = HEALTH_CHECKS.get(site['service'])
+            if health and not websocket:
+                proxy['health_checks']['active'] = {
+                    'uri': health['uri'],
+                    'expect_body': health['body'],
+                    'interval': self.caddy_health_interval,
+                    'timeout': "5s",
+                }
+        
+        return proxy
+    
+    @staticmethod
+    def _remove_caddyfile_site(content: str, host: str) -> str:
+        """Remove a site block from Caddyfile content."""
+        lines = content.split("\n")
+        kept_lines = []
+        brace_count = 0
+        
+        for line in lines:
+            if not brace_count and line.strip() == f"{host} {{":
+                brace_count = 1
+                continue
+            
+            if brace_count:
+                brace_count += line.count("{")
+                brace_count -= line.count("}")
+                continue
+            
+            kept_lines.append(line)
+        
+        return "\n".join(kept_lines)
+    
+    def _route_id(self, site: Dict[str, Any]) -> str:
+        """Get the admin API @id of a site's route."""
+        identifier = "".join(c if c.isalnum() else "-" for c in self._chain_identifier().lower())
+        return f"cosmoi-{identifier}-{site['service']}"
+    
+    def _apply_via_admin_api(self) -> bool:
+        """
+        Add or replace this chain's routes through the Caddy admin API.
+        
+        Routes are addressed by @id, so routes of other chains and sites are
+        never rewritten, and Caddy swaps the config in without a restart.
+        
+        Returns:
+            True if the admin API accepted every route
+        """
+        try:
+            response = requests.get(f"{self.caddy_admin}/config/", timeout=5)
+            response.raise_for_status()
+            caddy_config = response.json() or {}
+        except (requests.RequestException, ValueError):
+            return False
+        
+        routes = [self._render_json_route(site) for site in self._site_specs()]
+        if not routes:
+            print_warning("No Caddy routes to apply")
+            return True
+        
+        apps = caddy_config.get('apps', {})
+        servers = apps.get('http', {}).get('servers', {})
+        server_name = self._find_https_server(servers)
+        try:
+            if server_name is None:
+                # No HTTPS server yet, so there are no other routes to preserve
+                server = {'listen': [":443"], 'routes': routes}
+                if not caddy_config:
+                    response = requests.post(f"{self.caddy_admin}/load", json={
+                        'apps': {'http': {'servers': {"cosmoi": server}}}
+                    }, timeout=30)
+                else:
+                    # POST sets the key on the deepest existing parent object
+                    path, value = "apps/http/servers/cosmoi", server
+                    if 'http' not in apps:
+                        path, value = "apps/http", {'servers': {"cosmoi": server}}
+                    if 'apps' not in caddy_config:
+                        path, value = "apps", {'http': {'servers': {"cosmoi": server}}}
+                    response = requests.post(f"{self.caddy_admin}/config/{path}", json=value, timeout=30)
+                response.raise_for_status()
+                print_success(f"Created Caddy server cosmoi with {len(routes)} routes")
+                return True
+            
+            for route in routes:
+                # PATCH replaces an existing object by @id, and fails if the @id is unknown
+                response = requests.patch(f"{self.caddy_admin}/id/{route['@id']}", json=route, timeout=30)
+                if response.status_code == 200:
+                    print_success(f"Updated Caddy route {route['@id']}")
+                    continue
+                
+                # PUT on an array index inserts, ahead of any catch-all routes
+                response = requests.put(
+                    f"{self.caddy_admin}/config/apps/http/servers/{server_name}/routes/0", json=route, timeout=30
+                )
+                response.raise_for_status()
+                print_success(f"Added Caddy route {route['@id']}")
+        except requests.RequestException as e:
+            print_error(f"Caddy admin API rejected the configuration: {e}")
+            return False
+        
+        return True
+    
+    @staticmethod
+    def _find_https_server(servers: Dict[str, Any]) -> Optional[str]:
+        """Find the name of the Caddy server listening on :443."""
+        for name, server in servers.items():
+            if any(address.endswith(":443") for address in server.get('listen', [])):
+                return name
+        return None
@@ -5,13 +5,57 @@ This module handles Cosmovisor installation and setup.
 """
 
 import os
+import re
 import getpass
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 
 from .utils import (
     print_header, print_step, print_success, print_warning, print_error,
-    run_command, is_command_available
+    run_command, is_command_available, get_total_memory
 )
+from .backup import DataBackup, HOOK_NAME
+from .binary import BinaryProvisioner
+from .logprofile import get_log_profile, journald_unit_lines
+
+# Resource-control profiles for the node unit. Memory is split evenly between
+# the nodes co-located on the host after reserving a share for the OS.
+UNIT_PROFILES = {
+    "default": {
+        "nofile": 65535,
+        "nice": 0,
+        "io_class": "best-effort",
+        "io_priority": 4,
+        "gogc": 100,
+    },
+    "validator": {
+        "nofile": 65535,
+        "nice": -5,
+        "io_class": "best-effort",
+        "io_priority": 0,
+        "gogc": 100,
+    },
+    "rpc": {
+        "nofile": 1048576,
+        "nice": 0,
+        "io_class": "best-effort",
+        "io_priority": 4,
+        "gogc": 200,
+    },
+    "archive": {
+        "nofile": 1048576,
+        "nice": 5,
+        "io_class": "best-effort",
+        "io_priority": 7,
+        "gogc": 100,
+    },
+}
+
+# Share of host memory left to the OS and page cache
+HOST_MEMORY_RESERVE = 0.1
+
+# The old cosmos-sdk/cosmovisor module path stops at v1.0.0, COSMOVISOR_CUSTOM_PREUPGRADE needs v1.5.0
+COSMOVISOR_PACKAGE = "cosmossdk.io/tools/cosmovisor/cmd/cosmovisor@v1.5.0"
+PREUPGRADE_HOOK_VERSION = (1, 5)
 
 class CosmovisorSetup:
     """Class for setting up Cosmovisor for a Cosmos-based blockchain node."""
@@ -27,6 +71,22 @@ class CosmovisorSetup:
         self.binary_name = config.get('binary_name', "")
         self.binary_path = config.get('binary_path', "")
         self.node_home = config.get('node_home', "")
+        self.binary_provisioner = BinaryProvisioner(config)
+        
+        # Backup configuration
+        self.backup_enabled = config.get('backup_enabled', False)
+        self.data_backup = DataBackup(config)
+        
+        # Resource configuration
+        self.unit_profile = config.get('unit_profile', "default")
+        self.colocated_nodes = max(1, int(config.get('colocated_nodes', 1)))
+        self.node_slot = int(config.get('node_slot', 0))
+        
+        # Logging configuration
+        self.log_profile = config.get('log_profile', "")
+        
+        # Set once the pre-upgrade hook is installed and the Cosmovisor version runs it
+        self.backup_hook = False
     
     def install_cosmovisor(self) -> None:
         """Install Cosmovisor."""
@@ -34,15 +94,32 @@ class CosmovisorSetup:
         
         # Check if Cosmovisor is already installed
         if is_command_available("cosmovisor"):
-            print_success("Cosmovisor is already installed")
-            return
+            version = self._cosmovisor_version()
+            if not self.backup_enabled or (version or (0, 0)) >= PREUPGRADE_HOOK_VERSION:
+                print_success("Cosmovisor is already installed")
+                return
+            print_warning("Installed Cosmovisor is too old to run the pre-upgrade backup hook, upgrading it")
         
         # Install Cosmovisor
         print_step("Installing Cosmovisor")
-        run_command("go install github.com/cosmos/cosmos-sdk/cosmovisor/cmd/cosmovisor@latest")
+        self.binary_provisioner.install_go_tool(COSMOVISOR_PACKAGE)
         
         print_success("Cosmovisor installed successfully")
     
+    def _cosmovisor_version(self) -> Optional[Tuple[int, int]]:
+        """
+        Get the (major, minor) version of the installed Cosmovisor.
+        
+        Returns:
+            Version tuple, or None if it could not be determined
+        """
+        # The version command also runs the daemon's own version, which fails without DAEMON_* set
+        _, stdout, stderr = run_command("cosmovisor version 2>&1 || true", exit_on_error=False)
+        match = re.search(r"cosmovisor version:\s*v?(\d+)\.(\d+)", stdout + stderr, re.IGNORECASE)
+        if not match:
+            return None
+        return int(match.group(1)), int(match.group(2))
+    
     def setup_cosmovisor(self) -> None:
         """Set up Cosmovisor."""
         print_header("Setting Up Cosmovisor")
@@ -62,6 +139,15 @@ class CosmovisorSetup:
         run_command(f"ln -sf {cosmovisor_dir}/genesis {cosmovisor_dir}/current -f")
         run_command(f"sudo ln -sf {cosmovisor_dir}/current/bin/{self.binary_name} /usr/local/bin/{self.binary_name} -f")
         
+        # Install pre-upgrade backup hook
+        if self.backup_enabled:
+            version = self._cosmovisor_version()
+            if (version or (0, 0)) < PREUPGRADE_HOOK_VERSION:
+                print_warning("Cosmovisor is older than v1.5.0 and cannot run the pre-upgrade backup hook, "
+                              "keeping its own full backup of data/ instead")
+            else:
+                self.backup_hook = self.data_backup.install_hook()
+        
         # Create systemd service file
         self._create_systemd_service()
         
@@ -80,6 +166,23 @@ class CosmovisorSetup:
             cosmovisor_path = "/home/$(whoami)/go/bin/cosmovisor"
             print_warning(f"Cosmovisor binary not found, using default path: {cosmovisor_path}")
         
+        # Cosmovisor's own backup copies all of data/ and takes hours on big chains, so it is
+        # skipped when the pre-upgrade hook takes a link-based backup instead, and kept when
+        # backups were asked for but the hook could not be set up
+        if self.backup_hook:
+            backup_env = f'Environment="UNSAFE_SKIP_BACKUP=true"\nEnvironment="COSMOVISOR_CUSTOM_PREUPGRADE={HOOK_NAME}"\n'
+        elif self.backup_enabled:
+            backup_env = 'Environment="UNSAFE_SKIP_BACKUP=false"\n'
+        else:
+            backup_env = 'Environment="UNSAFE_SKIP_BACKUP=true"\n'
+        
+        resource_lines, runtime_env = self._resource_controls()
+        log_profile = get_log_profile(self.log_profile)
+        if log_profile:
+            resource_lines += journald_unit_lines(log_profile)
+        resource_settings = "\n".join(resource_lines)
+        runtime_settings = "".join(f'Environment="{name}={value}"\n' for name, value in runtime_env)
+        
         service_file = f"""[Unit]
 Description={self.binary_name} daemon
 After=network-online.target
@@ -89,14 +192,13 @@ User={getpass.getuser()}
 ExecStart={cosmovisor_path} run start --home {self.node_home}
 Restart=always
 RestartSec=3
-LimitNOFILE=4096
+{resource_settings}
 
-Environment="DAEMON_NAME={self.binary_name}"
+{runtime_settings}Environment="DAEMON_NAME={self.binary_name}"
 Environment="DAEMON_HOME={self.node_home}"
 Environment="DAEMON_ALLOW_DOWNLOAD_BINARIES=true"
 Environment="DAEMON_RESTART_AFTER_UPGRADE=true"
-Environment="UNSAFE_SKIP_BACKUP=true"
-Environment="PATH=/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin:/usr/games:/usr/local/games:/snap/bin:{self.node_home}/cosmovisor/current/bin"
+{backup_env}Environment="PATH=/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin:/usr/games:/usr/local/games:/snap/bin:{self.node_home}/cosmovisor/current/bin"
 
 [Install]
 WantedBy=multi-user.target
@@ -108,3 +210,52 @@ WantedBy=multi-user.target
         
         run_command(f"sudo mv {service_path} /etc/systemd/system/")
         run_command("sudo systemctl daemon-reload")
+    
+    def _resource_controls(self) -> Tuple[List[str], List[Tuple[str, str]]]:
+        """
+        Build the resource-control settings for the node unit.
+        
+        CPUs and memory are divided between the co-located nodes on the host, and
+        the node's slot picks which CPU range it is pinned to. The Go runtime is
+        sized to the same share so GC and scheduling stay inside the cgroup limits.
+        
+        Returns:
+            Tuple of (unit [Service] lines, Go runtime environment as (name, value) pairs)
+        """
+        profile = UNIT_PROFILES.get(self.unit_profile)
+        if profile is None:
+            print_warning(f"Unknown unit profile {self.unit_profile}, using default")
+            profile = UNIT_PROFILES["default"]
+        
+        cpu_count = os.cpu_count() or 1
+        cpus_per_node = max(1, cpu_count // self.colocated_nodes)
+        memory_mib = int(get_total_memory() * (1 - HOST_MEMORY_RESERVE) / self.colocated_nodes) // (1024 * 1024)
+        
+        lines = [
+            f"Slice=cosmos-{self.binary_name}.slice",
+            f"LimitNOFILE={profile['nofile']}",
+            f"Nice={profile['nice']}",
+            f"IOSchedulingClass={profile['io_class']}",
+            f"IOSchedulingPriority={profile['io_priority']}",
+            f"MemoryHigh={int(memory_mib * 0.9)}M",
+            f"MemoryMax={memory_mib}M",
+        ]
+        
+        # Only pin CPUs when the host is shared, a lone node may use every core
+        if self.colocated_nodes > 1 and cpu_count > 1:
+            first_cpu = (self.node_slot * cpus_per_node) % cpu_count
+            cpu_range = f"{first_cpu}-{first_cpu + cpus_per_node - 1}"
+            lines.append(f"CPUAffinity={cpu_range}")
+            lines.append(f"AllowedCPUs={cpu_range}")
+        
+        # GOMEMLIMIT sits below MemoryHigh so the Go GC works harder before the kernel throttles
+        runtime_env = [
+            ("GOMAXPROCS", str(cpus_per_node)),
+            ("GOGC", str(profile['gogc'])),
+            ("GOMEMLIMIT", f"{int(memory_mib * 0.8)}MiB"),
+        ]
+        
+        print_step(f"Using {self.unit_profile} unit profile: {cpus_per_node} CPUs, {memory_mib} MiB memory "
+                   f"(node {self.node_slot + 1} of {self.colocated_nodes} on this host)")
+        
+        return lines, runtime_env
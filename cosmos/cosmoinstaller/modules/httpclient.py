@@ -0,0 +1,251 @@
+"""
+Cosmos Node Installer - HTTP Client Module
+
+This module provides the HTTP client shared by the installer and the
+monitoring scripts: one keep-alive session with a per-host connection limit,
+timeouts on every request, retries with jittered backoff, short-lived
+memoization of GET responses and per-endpoint latency statistics.
+"""
+
+import time
+import random
+import threading
+from collections import deque
+from typing import Dict, Any, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import EmptyPoolError
+
+# Statuses worth retrying; anything else is returned to the caller right away
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class _PoolTimeout:
+    """Mixin for urllib3 pools that wait at most pool_timeout seconds for a free connection."""
+
+    pool_timeout: Optional[float] = None
+
+    def _get_conn(self, timeout: Optional[float] = None) -> Any:
+        # requests never passes a pool timeout, so a blocking pool would wait forever
+        return super()._get_conn(self.pool_timeout if timeout is None else timeout)
+
+class _TimedHTTPPool(_PoolTimeout, HTTPConnectionPool):
+    pass
+
+class _TimedHTTPSPool(_PoolTimeout, HTTPSConnectionPool):
+    pass
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter with a blocking pool of per_host connections and a bounded wait for one of them."""
+
+    __attrs__ = HTTPAdapter.__attrs__ + ["pool_timeout"]
+
+    def __init__(self, per_host: int, pool_timeout: float):
+        self.pool_timeout = pool_timeout
+        # pool_block makes callers wait for a free connection instead of opening more than per_host
+        super().__init__(pool_connections=32, pool_maxsize=per_host, pool_block=True)
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        timeout = self.pool_timeout
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": type("HTTPPool", (_TimedHTTPPool,), {"pool_timeout": timeout}),
+            "https": type("HTTPSPool", (_TimedHTTPSPool,), {"pool_timeout": timeout}),
+        }
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        try:
+            return super().send(request, **kwargs)
+        except EmptyPoolError as e:
+            raise requests.ConnectionError(f"No free connection in {self.pool_timeout}s: {e}", request=request)
+
+class HttpClient:
+    """Pooled, retrying HTTP client with memoized GETs and per-endpoint latency stats."""
+
+    def __init__(self, timeout: Union[float, Tuple[float, float]] = (5, 15), retries: int = 3,
+                 backoff: float = 0.5, max_backoff: float = 10, per_host: int = 4, memo_ttl: float = 1.0,
+                 pool_timeout: float = 30):
+        """
+        Initialize the client.
+
+        Args:
+            timeout: Default timeout in seconds, or a (connect, read) tuple
+            retries: Retries after the first attempt of an idempotent request
+            backoff: Base of the exponential backoff in seconds
+            max_backoff: Longest wait between attempts in seconds
+            per_host: Maximum number of connections to one host
+            memo_ttl: Default number of seconds a GET response is reused
+            pool_timeout: Longest wait in seconds for a free connection to a host
+        """
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.memo_ttl = memo_ttl
+
+        self.session = requests.Session()
+        adapter = PooledAdapter(per_host, pool_timeout)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._memo: Dict[str, Tuple[float, Any]] = {}
+        self._memo_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    def get_json(self, url: str, ttl: Optional[float] = None, **kwargs: Any) -> Any:
+        """
+        GET a URL and parse the JSON response, reusing a response fetched in the last ttl seconds.
+
+        Args:
+            url: URL to fetch
+            ttl: Seconds to reuse the response, the client default if None, 0 to always fetch
+            **kwargs: Passed to requests, such as params or headers
+
+        Returns:
+            Parsed JSON body
+
+        Raises:
+            requests.RequestException: If the request failed after the retries or returned an error status
+        """
+        ttl = self.memo_ttl if ttl is None else ttl
+        if ttl <= 0:
+            response = self.request("GET", url, **kwargs)
+            response.raise_for_status()
+            return response.json()
+
+        key = url + repr(sorted(kwargs.get('params', {}).items()) if kwargs.get('params') else "")
+        with self._lock:
+            lock = self._memo_locks.setdefault(key, threading.Lock())
+        # Concurrent callers of the same URL wait for one fetch instead of each making their own
+        with lock:
+            cached = self._memo.get(key)
+            if cached and time.monotonic() < cached[0]:
+                self._endpoint(url)['memo_hits'] += 1
+                return cached[1]
+
+            response = self.request("GET", url, **kwargs)
+            response.raise_for_status()
+            data = response.json()
+            with self._lock:
+                self._memo[key] = (time.monotonic() + ttl, data)
+                if len(self._memo) > 1024:
+                    now = time.monotonic()
+                    self._memo = {k: v for k, v in self._memo.items() if v[0] > now}
+            return data
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, retry: bool = False, **kwargs: Any) -> requests.Response:
+        """POST a request; it is only retried if retry is set, since a POST may not be idempotent."""
+        return self.request("POST", url, retry=retry, **kwargs)
+
+    def request(self, method: str, url: str, retry: Optional[bool] = None, **kwargs: Any) -> requests.Response:
+        """
+        Send a request with the default timeout, retrying connection errors, timeouts and retryable statuses.
+
+        Args:
+            method: HTTP method
+            url: URL
+            retry: Whether to retry, by default only for GET, HEAD and OPTIONS
+            **kwargs: Passed to requests
+
+        Returns:
+            The last response, which may still have an error status
+
+        Raises:
+            requests.RequestException: If the last attempt failed without a response
+        """
+        if retry is None:
+            retry = method in ("GET", "HEAD", "OPTIONS")
+        kwargs.setdefault('timeout', self.timeout)
+        stats = self._endpoint(url)
+        attempts = self.retries + 1 if retry else 1
+
+        for attempt in range(attempts):
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self._record(stats, time.perf_counter() - started, error=True)
+                if attempt == attempts - 1:
+                    raise
+                time.sleep(self._delay(attempt))
+                stats['retries'] += 1
+                continue
+
+            self._record(stats, time.perf_counter() - started, error=response.status_code >= 500)
+            if response.status_code not in RETRY_STATUSES or attempt == attempts - 1:
+                return response
+            # Give the connection back to the pool, a streamed response would otherwise hold it
+            response.close()
+            time.sleep(self._delay(attempt, response.headers.get("Retry-After")))
+            stats['retries'] += 1
+
+        raise requests.RequestException(f"{method} {url} failed")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get latency statistics per endpoint (host and path, without the query).
+
+        Returns:
+            Dictionary of endpoint to requests, errors, retries, memo hits and p50/p95/max latency in ms
+        """
+        result = {}
+        with self._lock:
+            for endpoint, stats in self._stats.items():
+                latencies = sorted(stats['latencies'])
+                result[endpoint] = {
+                    'requests': stats['requests'],
+                    'errors': stats['errors'],
+                    'retries': stats['retries'],
+                    'memo_hits': stats['memo_hits'],
+                    'p50_ms': round(latencies[len(latencies) // 2] * 1000, 1) if latencies else 0,
+                    'p95_ms': round(latencies[int(len(latencies) * 0.95)] * 1000, 1) if latencies else 0,
+                    'max_ms': round(latencies[-1] * 1000, 1) if latencies else 0,
+                }
+        return result
+
+    def print_stats(self) -> None:
+        print(f"{'endpoint':<60}{'reqs':>7}{'errs':>6}{'retry':>6}{'memo':>6}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}")
+        for endpoint, s in sorted(self.stats().items()):
+            print(f"{endpoint[:59]:<60}{s['requests']:>7}{s['errors']:>6}{s['retries']:>6}{s['memo_hits']:>6}"
+                  f"{s['p50_ms']:>9}{s['p95_ms']:>9}{s['max_ms']:>9}")
+
+    def _delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Full-jitter exponential backoff, or the server's Retry-After if it is longer."""
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), 60))
+            except ValueError:
+                pass
+        return delay
+
+    def _endpoint(self, url: str) -> Dict[str, Any]:
+        parts = urlsplit(url)
+        endpoint = f"{parts.netloc}{parts.path}"
+        with self._lock:
+            stats = self._stats.get(endpoint)
+            if stats is None:
+                stats = self._stats[endpoint] = {'requests': 0, 'errors': 0, 'retries': 0, 'memo_hits': 0,
+                                                 'latencies': deque(maxlen=1000)}
+            return stats
+
+    def _record(self, stats: Dict[str, Any], seconds: float, error: bool) -> None:
+        with self._lock:
+            stats['requests'] += 1
+            stats['errors'] += error
+            stats['latencies'].append(seconds)
+
+_default_client: Optional[HttpClient] = None
+
+def get_client() -> HttpClient:
+    """Get the process-wide client, so every caller shares one connection pool."""
+    global _default_client
+    if _default_client is None:
+        _default_client = HttpClient()
+    return _default_client
@@ -0,0 +1,464 @@
+"""
+Cosmos Node Installer - Install Benchmark Module
+
+This module times the installer end to end against a stub chain binary and a
+local artifact server with synthetic genesis, addrbook and snapshot files, and
+writes a JSON report that can be diffed between commits.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import datetime
+import functools
+import statistics
+import subprocess
+import contextlib
+import threading
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from typing import Dict, Any, List, Callable
+
+from .utils import print_header, print_step, print_success, print_warning, print_error, is_command_available
+from .node import NodeSetup
+from .sync import NodeSync
+from .cosmovisor import CosmovisorSetup
+from .caddy import CaddySetup
+
+BENCH_BINARY = "benchd"
+BENCH_CHAIN_ID = "bench-1"
+
+# Stub chain binary: enough of init, --help, version, tendermint unsafe-reset-all
+# and start for the installer, writing config files shaped like the real ones.
+STUB_BINARY = r"""#!/bin/bash
+HOME_DIR="$HOME/.benchd"
+CHAIN_ID="bench-1"
+args=("$@")
+for ((i = 0; i < ${#args[@]}; i++)); do
+    case "${args[$i]}" in
+        --home) HOME_DIR="${args[$((i + 1))]}" ;;
+        --chain-id) CHAIN_ID="${args[$((i + 1))]}" ;;
+    esac
+done
+
+reset_state() {
+    mkdir -p "$HOME_DIR/data"
+    echo '{"height": "0", "round": 0, "step": 0}' > "$HOME_DIR/data/priv_validator_state.json"
+}
+
+case "$1" in
+init)
+    mkdir -p "$HOME_DIR/config"
+    cat > "$HOME_DIR/config/config.toml" <<EOF
+proxy_app = "tcp://127.0.0.1:26658"
+moniker = "$2"
+log_level = "info"
+log_format = "plain"
+
+[rpc]
+laddr = "tcp://127.0.0.1:26657"
+pprof_laddr = "localhost:6060"
+
+[p2p]
+laddr = "tcp://0.0.0.0:26656"
+seeds = ""
+persistent_peers = ""
+
+[statesync]
+enable = false
+rpc_servers = ""
+trust_height = 0
+trust_hash = ""
+
+[tx_index]
+indexer = "kv"
+
+[instrumentation]
+prometheus = false
+prometheus_listen_addr = ":26660"
+EOF
+    cat > "$HOME_DIR/config/app.toml" <<EOF
+pruning = "default"
+pruning-keep-recent = "0"
+pruning-keep-every = "0"
+pruning-interval = "0"
+minimum-gas-prices = ""
+
+[api]
+enable = false
+address = "tcp://localhost:1317"
+
+[grpc]
+enable = true
+address = "localhost:9090"
+
+[grpc-web]
+enable = true
+address = "localhost:9091"
+EOF
+    echo "{\"chain_id\": \"$CHAIN_ID\", \"app_state\": {}}" > "$HOME_DIR/config/genesis.json"
+    echo '{"priv_key": {"type": "tendermint/PrivKeyEd25519", "value": ""}}' > "$HOME_DIR/config/node_key.json"
+    echo '{"address": "", "pub_key": {}, "priv_key": {}}' > "$HOME_DIR/config/priv_validator_key.json"
+    reset_state
+    ;;
+tendermint|comet)
+    if [ "$2" = "unsafe-reset-all" ]; then
+        rm -rf "$HOME_DIR/data"
+        reset_state
+    fi
+    ;;
+version)
+    echo "v0.0.0-bench"
+    ;;
+start)
+    exec sleep infinity
+    ;;
+*)
+    echo "Usage: benchd [command]"
+    echo "Available Commands: init start tendermint version"
+    ;;
+esac
+"""
+
+# Shims put first on PATH while the benchmark runs, so no phase touches systemd,
+# /etc or /usr/local. pv is only shimmed when it is not installed.
+SUDO_SHIM = "#!/bin/bash\nexit 0\n"
+PV_SHIM = "#!/bin/bash\nexec cat\n"
+
+PHASES = ["node_setup", "sync", "cosmovisor", "caddy_config"]
+
+class InstallBenchmark:
+    """Class for benchmarking the installation of a Cosmos-based blockchain node."""
+
+    def __init__(self, config: Dict[str, Any]):
+        """
+        Initialize the install benchmark with configuration.
+
+        Args:
+            config: Dictionary containing node configuration, used as the base
+                of the non-interactive benchmark configuration
+        """
+        self.config = config
+
+        # Benchmark configuration
+        self.work_dir = config.get('bench_work_dir', "")
+        self.iterations = max(1, int(config.get('bench_iterations', 3)))
+        self.genesis_mb = float(config.get('bench_genesis_mb', 5))
+        self.addrbook_peers = int(config.get('bench_addrbook_peers', 2000))
+        self.snapshot_mb = float(config.get('bench_snapshot_mb', 100))
+        self.report_file = config.get('bench_report_file', "") or "install-bench.json"
+        self.baseline_file = config.get('bench_baseline_file', "")
+        self.tolerance = float(config.get('bench_tolerance', 0.2))
+
+    def run(self) -> bool:
+        """
+        Run the benchmark iterations, write the report and compare it against the baseline.
+
+        Returns:
+            True unless a phase failed or the run regressed against the baseline
+        """
+        print_header("Install Benchmark")
+
+        work_dir = self.work_dir or tempfile.mkdtemp(prefix="cosmoi-bench-")
+        os.makedirs(work_dir, exist_ok=True)
+        print_step(f"Working in {work_dir}, installer output goes to {work_dir}/install.log")
+
+        artifacts_dir = f"{work_dir}/artifacts"
+        shim_dir = f"{work_dir}/shims"
+        binary_path = f"{work_dir}/bin/{BENCH_BINARY}"
+
+        started = time.perf_counter()
+        artifacts = self._prepare(artifacts_dir, shim_dir, binary_path)
+        prepare_seconds = time.perf_counter() - started
+        print_success(f"Prepared stub binary and artifacts in {prepare_seconds:.1f}s")
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_QuietHandler, directory=artifacts_dir))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+        original_path = os.environ.get("PATH", "")
+        os.environ["PATH"] = f"{shim_dir}:{original_path}"
+        runs: List[Dict[str, Dict[str, Any]]] = []
+        try:
+            for iteration in range(self.iterations):
+                print_step(f"Iteration {iteration + 1} of {self.iterations}")
+                config = self._bench_config(work_dir, binary_path, base_url, artifacts, iteration)
+                runs.append(self._run_phases(config, f"{work_dir}/install.log"))
+                shutil.rmtree(config['node_home'], ignore_errors=True)
+        finally:
+            os.environ["PATH"] = original_path
+            server.shutdown()
+            server.server_close()
+            # The unit file CosmovisorSetup would have moved into /etc/systemd/system
+            with contextlib.suppress(OSError):
+                os.remove(f"/tmp/{BENCH_BINARY}.service")
+
+        report = self._report(runs, artifacts, prepare_seconds)
+        with open(self.report_file, "w") as f:
+            json.dump(report, f, indent=2)
+
+        _print_report(report)
+        print_success(f"Report written to {self.report_file}")
+
+        if not self.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        ok = not any(phase['failures'] for phase in report['phases'].values())
+        if not ok:
+            print_error(f"Some phases failed, see {work_dir}/install.log" if self.work_dir else "Some phases failed, set bench.work_dir to keep the install log")
+
+        if self.baseline_file:
+            try:
+                with open(self.baseline_file, "r") as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                print_error(f"Could not read baseline {self.baseline_file}: {e}")
+                return ok
+            ok = compare_reports(baseline, report, self.tolerance) and ok
+
+        return ok
+
+    def _prepare(self, artifacts_dir: str, shim_dir: str, binary_path: str) -> Dict[str, Any]:
+        """
+        Write the stub binary, the PATH shims and the synthetic artifacts.
+
+        Returns:
+            Dictionary with the artifact file names and sizes
+        """
+        os.makedirs(os.path.dirname(binary_path), exist_ok=True)
+        _write_executable(binary_path, STUB_BINARY)
+
+        os.makedirs(shim_dir, exist_ok=True)
+        _write_executable(f"{shim_dir}/sudo", SUDO_SHIM)
+        if not is_command_available("pv"):
+            _write_executable(f"{shim_dir}/pv", PV_SHIM)
+
+        os.makedirs(artifacts_dir, exist_ok=True)
+        genesis_path = f"{artifacts_dir}/genesis.json"
+        if not os.path.exists(genesis_path):
+            _write_genesis(genesis_path, int(self.genesis_mb * (1 << 20)))
+
+        addrbook_path = f"{artifacts_dir}/addrbook.json"
+        if not os.path.exists(addrbook_path):
+            _write_addrbook(addrbook_path, self.addrbook_peers)
+
+        snapshot_name = "snapshot.tar.lz4" if is_command_available("lz4") else "snapshot.tar.gz"
+        snapshot_path = f"{artifacts_dir}/{snapshot_name}"
+        if not os.path.exists(snapshot_path):
+            _write_snapshot(snapshot_path, int(self.snapshot_mb * (1 << 20)))
+
+        return {
+            'genesis': "genesis.json",
+            'genesis_bytes': os.path.getsize(genesis_path),
+            'addrbook': "addrbook.json",
+            'addrbook_bytes': os.path.getsize(addrbook_path),
+            'snapshot': snapshot_name,
+            'snapshot_bytes': os.path.getsize(snapshot_path),
+        }
+
+    def _bench_config(self, work_dir: str, binary_path: str, base_url: str,
+                      artifacts: Dict[str, Any], iteration: int) -> Dict[str, Any]:
+        """Build the non-interactive configuration of one iteration on top of the installer's."""
+        config = dict(self.config)
+        config.update({
+            'chain_id': BENCH_CHAIN_ID,
+            'binary_name': BENCH_BINARY,
+            'binary_path': binary_path,
+            'node_home': f"{work_dir}/node-{iteration}",
+            'moniker': f"bench-{iteration}",
+            'genesis_url': f"{base_url}/{artifacts['genesis']}",
+            'addrbook_url': f"{base_url}/{artifacts['addrbook']}",
+            'sync_method': "snapshot",
+            'snapshot_url': f"{base_url}/{artifacts['snapshot']}",
+            'wasm_enabled': False,
+            'expose_rpc': True,
+            'expose_api': True,
+            'expose_grpc': True,
+            'domain': "bench.invalid",
+        })
+        return config
+
+    def _run_phases(self, config: Dict[str, Any], log_path: str) -> Dict[str, Dict[str, Any]]:
+        """Time every install phase of one iteration."""
+        node_setup = NodeSetup(config)
+        node_sync = NodeSync(config)
+        cosmovisor_setup = CosmovisorSetup(config)
+        caddy_setup = CaddySetup(config)
+
+        def render_caddy_config() -> None:
+            # Only the generation is timed, writing /etc/caddy and reloading Caddy is left out
+            sites = caddy_setup._site_specs()
+            "".join(caddy_setup._render_caddyfile_site(site) for site in sites)
+            json.dumps([caddy_setup._render_json_route(site) for site in sites])
+
+        steps: List[tuple] = [
+            ("node_setup", node_setup.setup_node),
+            ("sync", node_sync.perform_sync),
+            ("cosmovisor", cosmovisor_setup.setup_cosmovisor),
+            ("caddy_config", render_caddy_config),
+        ]
+
+        results = {}
+        with open(log_path, "a") as log, contextlib.redirect_stdout(log):
+            for name, step in steps:
+                results[name] = _time_phase(step)
+        for name in PHASES:
+            status = "ok" if results[name]['ok'] else "FAILED"
+            print(f"  {name:<14}{results[name]['seconds']:>9.3f}s  {status}")
+        return results
+
+    def _report(self, runs: List[Dict[str, Dict[str, Any]]], artifacts: Dict[str, Any], prepare_seconds: float) -> Dict[str, Any]:
+        """Aggregate the iterations into the JSON report."""
+        phases = {}
+        for name in PHASES:
+            seconds = [run[name]['seconds'] for run in runs]
+            phases[name] = _summarize(seconds)
+            phases[name]['failures'] = sum(1 for run in runs if not run[name]['ok'])
+
+        totals = [sum(run[name]['seconds'] for name in PHASES) for run in runs]
+        return {
+            'created': datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            'commit': _git_commit(),
+            'host': {'python': platform.python_version(), 'machine': platform.machine(), 'cpus': os.cpu_count()},
+            'iterations': len(runs),
+            'artifacts': artifacts,
+            'prepare_seconds': round(prepare_seconds, 3),
+            'phases': phases,
+            'total': _summarize(totals),
+        }
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    """Static file handler that does not log every request."""
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+def compare_reports(baseline: Dict[str, Any], report: Dict[str, Any], tolerance: float) -> bool:
+    """
+    Print the change of every phase's median time against a baseline.
+
+    Args:
+        baseline: Earlier report
+        report: Current report
+        tolerance: Allowed relative increase of a median before it counts as regressed
+
+    Returns:
+        True if nothing regressed
+    """
+    print_header("Comparison with Baseline")
+    print(f"Baseline {baseline.get('commit') or '?'} ({baseline.get('created', '?')}), "
+          f"current {report.get('commit') or '?'}\n")
+
+    regressions = []
+    rows = [(name, report['phases'][name], baseline.get('phases', {}).get(name)) for name in PHASES]
+    rows.append(("total", report['total'], baseline.get('total')))
+    print(f"{'phase':<14}{'median s':>10}{'base s':>10}{'change':>9}")
+    for name, current, previous in rows:
+        if not previous or not previous.get('median'):
+            continue
+
+        change = (current['median'] - previous['median']) / previous['median']
+        print(f"{name:<14}{current['median']:>10.3f}{previous['median']:>10.3f}{change:>+9.0%}")
+        # Phases that take milliseconds are too noisy to gate on
+        if change > tolerance and current['median'] - previous['median'] > 0.05:
+            regressions.append(name)
+
+    if baseline.get('artifacts', {}).get('snapshot_bytes') != report['artifacts']['snapshot_bytes']:
+        print_warning("Artifact sizes differ from the baseline, the comparison is not like for like")
+
+    if regressions:
+        print_error(f"Regressed against baseline: {', '.join(regressions)}")
+        return False
+
+    print_success("No regressions against baseline")
+    return True
+
+def _time_phase(step: Callable[[], None]) -> Dict[str, Any]:
+    """Run one phase and time it; run_command exits on failure, which marks the phase failed."""
+    started = time.perf_counter()
+    ok = True
+    try:
+        step()
+    except SystemExit:
+        ok = False
+    except Exception as e:
+        print(f"Phase failed: {e}")
+        ok = False
+    return {'seconds': round(time.perf_counter() - started, 4), 'ok': ok}
+
+def _summarize(seconds: List[float]) -> Dict[str, Any]:
+    """Summarize the times of one phase over the iterations."""
+    return {
+        'median': round(statistics.median(seconds), 4),
+        'min': round(min(seconds), 4),
+        'max': round(max(seconds), 4),
+        'runs': [round(s, 4) for s in seconds],
+    }
+
+def _print_report(report: Dict[str, Any]) -> None:
+    """Print the per-phase medians."""
+    print(f"\n{'phase':<14}{'median s':>10}{'min s':>10}{'max s':>10}")
+    for name, phase in list(report['phases'].items()) + [("total", report['total'])]:
+        print(f"{name:<14}{phase['median']:>10.3f}{phase['min']:>10.3f}{phase['max']:>10.3f}")
+    print()
+
+def _write_executable(path: str, content: str) -> None:
+    """Write a script and make it executable."""
+    with open(path, "w") as f:
+        f.write(content)
+    os.chmod(path, 0o755)
+
+def _write_genesis(path: str, size: int) -> None:
+    """Write a genesis file padded with bank balances up to about the given size."""
+    balance = '{"address": "cosmos1%038d", "coins": [{"denom": "ubench", "amount": "1000000"}]}'
+    count = max(1, size // len(balance % 0))
+    with open(path, "w") as f:
+        f.write(f'{{"genesis_time": "2024-01-01T00:00:00Z", "chain_id": "{BENCH_CHAIN_ID}", '
+                f'"initial_height": "1", "app_state": {{"bank": {{"balances": [')
+        f.write(", ".join(balance % i for i in range(count)))
+        f.write("]}}}\n")
+
+def _write_addrbook(path: str, peers: int) -> None:
+    """Write an address book with the given number of peers."""
+    addrs = [{
+        'addr': {'id': f"{i:040x}", 'ip': f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}", 'port': 26656},
+        'src': {'id': f"{i:040x}", 'ip': "10.0.0.1", 'port': 26656},
+        'buckets': [i % 256],
+        'attempts': 0,
+        'bucket_type': 1,
+        'last_attempt': "2024-01-01T00:00:00Z",
+        'last_success': "2024-01-01T00:00:00Z",
+        'last_ban_time': "0001-01-01T00:00:00Z",
+    } for i in range(peers)]
+    with open(path, "w") as f:
+        json.dump({'key': "0" * 24, 'addrs': addrs}, f)
+
+def _write_snapshot(path: str, size: int) -> None:
+    """Write a snapshot archive of data/ with incompressible table files, like compressed LevelDB/PebbleDB."""
+    staging = tempfile.mkdtemp(dir=os.path.dirname(path))
+    try:
+        db_dir = f"{staging}/data/application.db"
+        os.makedirs(db_dir)
+        file_size = 16 << 20
+        for i, offset in enumerate(range(0, max(size, 1), file_size)):
+            with open(f"{db_dir}/{i:06d}.sst", "wb") as f:
+                f.write(os.urandom(min(file_size, size - offset)))
+        with open(f"{staging}/data/priv_validator_state.json", "w") as f:
+            f.write('{"height": "0", "round": 0, "step": 0}\n')
+
+        compress = "lz4 -q -1" if path.endswith(".lz4") else "gzip -1"
+        subprocess.run(f"tar -cf - -C {staging} data | {compress} > {path}", shell=True, check=True)
+    finally:
+        shutil.rmtree(staging)
+
+def _git_commit() -> str:
+    """Get the commit of the installer source, if it runs from a git checkout."""
+    source_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
+    try:
+        return subprocess.run(["git", "-C", source_dir, "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
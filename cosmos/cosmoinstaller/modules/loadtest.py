@@ -0,0 +1,470 @@
+"""
+Cosmos Node Installer - Load Test Module
+
+This module benchmarks the endpoints the node exposes (CometBFT RPC, REST,
+gRPC and EVM JSON-RPC) with an open-loop load generator: requests are sent
+on a fixed schedule whatever the server's response time, and latency is
+measured from the scheduled send time, so a slow server cannot hide its
+queueing delay by slowing the client down (coordinated omission).
+"""
+
+import json
+import random
+import asyncio
+import datetime
+from typing import Dict, Any, List, Optional
+
+import aiohttp
+from aiohttp import web
+
+from .utils import print_header, print_step, print_success, print_warning, print_error
+
+# Calls replayed when no mix is configured. Paths may use {height}, which is
+# replaced with a random height from the last `height_window` blocks.
+DEFAULT_MIX = [
+    {'name': "rpc_status", 'kind': "rpc", 'path': "/status", 'weight': 20},
+    {'name': "rpc_block", 'kind': "rpc", 'path': "/block?height={height}", 'weight': 20},
+    {'name': "rpc_validators", 'kind': "rpc", 'path': "/validators?height={height}&per_page=100", 'weight': 5},
+    {'name': "rest_latest_block", 'kind': "rest", 'path': "/cosmos/base/tendermint/v1beta1/blocks/latest", 'weight': 10},
+    {'name': "rest_block", 'kind': "rest", 'path': "/cosmos/base/tendermint/v1beta1/blocks/{height}", 'weight': 10},
+    {'name': "rest_bank_params", 'kind': "rest", 'path': "/cosmos/bank/v1beta1/params", 'weight': 5},
+    {'name': "grpc_latest_block", 'kind': "grpc", 'method': "/cosmos.base.tendermint.v1beta1.Service/GetLatestBlock", 'weight': 10},
+    {'name': "grpc_syncing", 'kind': "grpc", 'method': "/cosmos.base.tendermint.v1beta1.Service/GetSyncing", 'weight': 5},
+    {'name': "evm_block_number", 'kind': "json_rpc", 'method': "eth_blockNumber", 'params': [], 'weight': 10},
+    {'name': "evm_get_block", 'kind': "json_rpc", 'method': "eth_getBlockByNumber", 'params': ["latest", False], 'weight': 5},
+]
+
+# Requests still in flight beyond this are counted as client-side drops
+MAX_IN_FLIGHT = 20000
+
+# Fewer samples than this give too noisy a p99 to flag a regression
+MIN_SAMPLES_FOR_P99 = 100
+# p99 increases below this are timer and scheduling noise
+P99_NOISE_FLOOR = 0.002
+
+class EndpointLoadTest:
+    """Class for load testing the endpoints of a Cosmos-based blockchain node."""
+
+    def __init__(self, config: Dict[str, Any]):
+        """
+        Initialize the load test with configuration.
+
+        Args:
+            config: Dictionary containing node configuration
+        """
+        # Node configuration
+        rpc_port = config.get('rpc_port', 26657)
+        api_port = config.get('api_port', 1317)
+        grpc_port = config.get('grpc_port', 9090)
+        json_rpc_port = config.get('json_rpc_port', 8545)
+
+        # Load test configuration
+        targets = config.get('loadtest_targets', {}) or {}
+        self.targets = {
+            'rpc': targets.get('rpc') or f"http://localhost:{rpc_port}",
+            'rest': targets.get('rest') or f"http://localhost:{api_port}",
+            'grpc': targets.get('grpc') or f"localhost:{grpc_port}",
+            'json_rpc': targets.get('json_rpc') or f"http://localhost:{json_rpc_port}",
+        }
+        self.mix = config.get('loadtest_mix', []) or DEFAULT_MIX
+        self.rates = [float(rate) for rate in config.get('loadtest_rates', []) or [50, 100, 200, 400, 800]]
+        self.duration = float(config.get('loadtest_duration', 30))
+        self.timeout = float(config.get('loadtest_timeout', 10))
+        self.height_window = int(config.get('loadtest_height_window', 1000))
+        self.slo_p99_ms = float(config.get('loadtest_slo_p99_ms', 500))
+        self.max_error_rate = float(config.get('loadtest_max_error_rate', 0.01))
+        self.tolerance = float(config.get('loadtest_tolerance', 0.25))
+        self.report_file = config.get('loadtest_report_file', "") or "loadtest-report.json"
+        self.baseline_file = config.get('loadtest_baseline_file', "")
+        self.seed = int(config.get('loadtest_seed', 1))
+
+    def run(self, stub: bool = False) -> bool:
+        """
+        Run every rate step, write the report and compare it against the baseline.
+
+        Args:
+            stub: Run against the bundled stub server instead of the configured targets
+
+        Returns:
+            True unless the run regressed against the baseline
+        """
+        print_header("Endpoint Load Test")
+        report = asyncio.run(self._run(stub))
+
+        with open(self.report_file, "w") as f:
+            json.dump(report, f, indent=2)
+        print_success(f"Report written to {self.report_file}")
+
+        if not self.baseline_file:
+            return True
+
+        try:
+            with open(self.baseline_file, "r") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print_error(f"Could not read baseline {self.baseline_file}: {e}")
+            return True
+
+        return compare_reports(baseline, report, self.tolerance)
+
+    async def _run(self, stub: bool) -> Dict[str, Any]:
+        """Run the rate steps, optionally against a stub server started for the run."""
+        targets = dict(self.targets)
+        stub_server = StubServer() if stub else None
+        if stub_server:
+            targets.update(await stub_server.start())
+            print_step(f"Started stub server on {targets['rpc']}")
+
+        kinds = {call['kind'] for call in self.mix}
+        grpc_channel = _open_grpc_channel(targets['grpc']) if "grpc" in kinds else None
+        mix = [call for call in self.mix if call['kind'] != "grpc" or grpc_channel is not None]
+
+        connector = aiohttp.TCPConnector(limit=0, keepalive_timeout=30)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        try:
+            async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+                latest_height = await self._latest_height(session, targets['rpc'])
+                steps = []
+                for rate in self.rates:
+                    print_step(f"Offering {rate:.0f} req/s for {self.duration:.0f}s")
+                    runner = _StepRunner(session, grpc_channel, targets, mix, latest_height,
+                                         self.height_window, self.timeout, random.Random(self.seed))
+                    step = await runner.run(rate, self.duration)
+                    steps.append(step)
+                    _print_step_summary(step)
+        finally:
+            if grpc_channel is not None:
+                await grpc_channel.close()
+            if stub_server:
+                await stub_server.stop()
+
+        saturation = None
+        for step in steps:
+            overall = step['overall']
+            if (step['throughput'] < 0.95 * step['rate'] or overall['error_rate'] > self.max_error_rate
+                    or (overall['p99'] or 0) * 1000 > self.slo_p99_ms):
+                saturation = step['rate']
+                break
+
+        if saturation is not None:
+            print_warning(f"Saturated at {saturation:.0f} req/s (throughput, error rate or p99 > {self.slo_p99_ms:.0f}ms)")
+        else:
+            print_success(f"No saturation up to {self.rates[-1]:.0f} req/s")
+
+        return {
+            'created': datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            'stub': stub,
+            'targets': {kind: targets[kind] for kind in kinds},
+            'duration': self.duration,
+            'slo_p99_ms': self.slo_p99_ms,
+            'saturation_rate': saturation,
+            'steps': steps,
+        }
+
+    async def _latest_height(self, session: aiohttp.ClientSession, rpc: str) -> int:
+        """Get the latest height to draw {height} values from, or 0 if the RPC is unreachable."""
+        if not any("{height}" in call.get('path', "") for call in self.mix):
+            return 0
+
+        try:
+            async with session.get(f"{rpc}/status") as response:
+                data = await response.json(content_type=None)
+            return int(data['result']['sync_info']['latest_block_height'])
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, KeyError, TypeError):
+            print_warning("Could not get the latest height, using height 1 for {height}")
+            return 0
+
+class _StepRunner:
+    """Open-loop request schedule for one rate step."""
+
+    def __init__(self, session: aiohttp.ClientSession, grpc_channel: Any, targets: Dict[str, str],
+                 mix: List[Dict[str, Any]], latest_height: int, height_window: int,
+                 timeout: float, rng: random.Random):
+        self.session = session
+        self.grpc_channel = grpc_channel
+        self.targets = targets
+        self.mix = mix
+        self.latest_height = latest_height
+        self.height_window = height_window
+        self.timeout = timeout
+        self.rng = rng
+        self.samples: Dict[str, List[float]] = {call['name']: [] for call in mix}
+        self.errors: Dict[str, int] = {call['name']: 0 for call in mix}
+        self.dropped: Dict[str, int] = {call['name']: 0 for call in mix}
+        self._in_flight = 0
+
+    async def run(self, rate: float, duration: float) -> Dict[str, Any]:
+        """
+        Send requests at a fixed rate for the duration, then wait for stragglers.
+
+        Returns:
+            Step summary with per-call and overall latency percentiles
+        """
+        total = int(rate * duration)
+        weights = [call.get('weight', 1) for call in self.mix]
+        schedule = self.rng.choices(self.mix, weights=weights, k=total)
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        tasks = set()
+        for i, call in enumerate(schedule):
+            intended = start + i / rate
+            delay = intended - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            if self._in_flight >= MAX_IN_FLIGHT:
+                self.dropped[call['name']] += 1
+                continue
+
+            task = asyncio.create_task(self._send(call, intended))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.wait(tasks)
+        elapsed = loop.time() - start
+
+        calls = {name: _latency_summary(samples, self.errors[name], self.dropped[name])
+                 for name, samples in self.samples.items()}
+        all_samples = [latency for samples in self.samples.values() for latency in samples]
+        completed = len(all_samples) - sum(self.errors.values())
+        return {
+            'rate': rate,
+            'offered': total,
+            'completed': completed,
+            'dropped': sum(self.dropped.values()),
+            'throughput': round(completed / elapsed, 2) if elapsed else 0.0,
+            'overall': _latency_summary(all_samples, sum(self.errors.values()), sum(self.dropped.values())),
+            'calls': calls,
+        }
+
+    async def _send(self, call: Dict[str, Any], intended: float) -> None:
+        """Send one call and record its latency from the scheduled send time."""
+        self._in_flight += 1
+        ok = False
+        try:
+            if call['kind'] == "grpc":
+                ok = await self._send_grpc(call)
+            elif call['kind'] == "json_rpc":
+                payload = {'jsonrpc': "2.0", 'id': 1, 'method': call['method'], 'params': call.get('params', [])}
+                async with self.session.post(self.targets['json_rpc'], json=payload) as response:
+                    body = await response.read()
+                    ok = response.status == 200 and b'"error"' not in body[:256]
+            else:
+                path = call['path'].replace("{height}", str(self._random_height()))
+                async with self.session.get(f"{self.targets[call['kind']]}{path}") as response:
+                    await response.read()
+                    ok = response.status == 200
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            ok = False
+        except Exception as e:
+            # gRPC errors, whose types are only available when grpcio is installed
+            ok = False
+            if type(e).__module__.split(".")[0] != "grpc":
+                raise
+        finally:
+            self._in_flight -= 1
+
+        self.samples[call['name']].append(asyncio.get_running_loop().time() - intended)
+        if not ok:
+            self.errors[call['name']] += 1
+
+    async def _send_grpc(self, call: Dict[str, Any]) -> bool:
+        """Send a unary gRPC call with a raw protobuf request, empty by default."""
+        method = self.grpc_channel.unary_unary(call['method'])
+        await method(bytes.fromhex(call.get('request_hex', "")), timeout=self.timeout)
+        return True
+
+    def _random_height(self) -> int:
+        """Pick a height from the recent block window."""
+        if not self.latest_height:
+            return 1
+        return self.rng.randint(max(1, self.latest_height - self.height_window), self.latest_height)
+
+class StubServer:
+    """
+    Local stand-in for the node endpoints, for offline runs of the load test.
+
+    A fixed number of workers each take `service_time` per request, so the
+    stub saturates at workers / service_time requests per second.
+    """
+
+    def __init__(self, service_time: float = 0.005, workers: int = 4, latest_height: int = 1_000_000):
+        self.service_time = service_time
+        self.latest_height = latest_height
+        self._workers = asyncio.Semaphore(workers)
+        self._runner: Optional[web.AppRunner] = None
+        self._grpc_server = None
+
+    async def start(self) -> Dict[str, str]:
+        """
+        Start the stub on free local ports.
+
+        Returns:
+            Target URLs for every endpoint kind
+        """
+        app = web.Application()
+        app.router.add_post("/", self._json_rpc)
+        app.router.add_get("/status", self._status)
+        app.router.add_get("/{tail:.*}", self._get)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", 0).start()
+        url = f"http://127.0.0.1:{self._runner.addresses[0][1]}"
+
+        targets = {'rpc': url, 'rest': url, 'json_rpc': url}
+        grpc_port = await self._start_grpc()
+        if grpc_port:
+            targets['grpc'] = f"127.0.0.1:{grpc_port}"
+        return targets
+
+    async def stop(self) -> None:
+        """Stop the stub."""
+        if self._grpc_server is not None:
+            await self._grpc_server.stop(None)
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _work(self) -> None:
+        """Wait for a free worker and spend the service time."""
+        async with self._workers:
+            await asyncio.sleep(self.service_time)
+
+    async def _status(self, request: web.Request) -> web.Response:
+        await self._work()
+        return web.json_response({'jsonrpc': "2.0", 'id': -1, 'result': {
+            'sync_info': {'latest_block_height': str(self.latest_height), 'catching_up': False}
+        }})
+
+    async def _get(self, request: web.Request) -> web.Response:
+        await self._work()
+        return web.json_response({'jsonrpc': "2.0", 'id': -1, 'result': {'path': request.path, 'data': "AA" * 512}})
+
+    async def _json_rpc(self, request: web.Request) -> web.Response:
+        call = await request.json()
+        await self._work()
+        return web.json_response({'jsonrpc': "2.0", 'id': call.get('id'), 'result': hex(self.latest_height)})
+
+    async def _start_grpc(self) -> Optional[int]:
+        """Start a gRPC stub that answers every unary method with an empty message, if grpcio is installed."""
+        try:
+            import grpc
+        except ImportError:
+            return None
+
+        async def handle(request: bytes, context: Any) -> bytes:
+            await self._work()
+            return b""
+
+        class _Handler(grpc.GenericRpcHandler):
+            def service(self, handler_call_details):
+                return grpc.unary_unary_rpc_method_handler(handle)
+
+        self._grpc_server = grpc.aio.server()
+        self._grpc_server.add_generic_rpc_handlers((_Handler(),))
+        port = self._grpc_server.add_insecure_port("127.0.0.1:0")
+        await self._grpc_server.start()
+        return port
+
+def compare_reports(baseline: Dict[str, Any], report: Dict[str, Any], tolerance: float) -> bool:
+    """
+    Print the change of every call's p99, error rate and throughput against a baseline.
+
+    Args:
+        baseline: Earlier report
+        report: Current report
+        tolerance: Allowed relative p99 increase, or throughput decrease past
+            the baseline's saturation rate, before a run counts as regressed
+
+    Returns:
+        True if nothing regressed
+    """
+    print_header("Comparison with Baseline")
+
+    baseline_steps = {step['rate']: step for step in baseline.get('steps', [])}
+    saturation = baseline.get('saturation_rate')
+    regressions = []
+    print(f"{'rate':>8}  {'call':<24}{'p99 ms':>10}{'base':>10}{'change':>9}{'errors':>8}{'base':>8}")
+    for step in report['steps']:
+        base_step = baseline_steps.get(step['rate'])
+        if not base_step:
+            continue
+
+        # Past saturation latency only reflects the queue built up over the run
+        if saturation is not None and step['rate'] >= saturation:
+            print(f"{step['rate']:>8.0f}  {'throughput':<24}{step['throughput']:>10.0f}{base_step['throughput']:>10.0f}")
+            if step['throughput'] < (1 - tolerance) * base_step['throughput']:
+                regressions.append(f"throughput at {step['rate']:.0f} req/s")
+            continue
+
+        for name, current in list(step['calls'].items()) + [("overall", step['overall'])]:
+            previous = base_step['calls'].get(name) if name != "overall" else base_step['overall']
+            if not previous or current['p99'] is None or previous['p99'] is None:
+                continue
+
+            change = (current['p99'] - previous['p99']) / previous['p99'] if previous['p99'] else 0.0
+            print(f"{step['rate']:>8.0f}  {name:<24}{current['p99'] * 1000:>10.2f}{previous['p99'] * 1000:>10.2f}"
+                  f"{change:>+9.0%}{current['error_rate']:>8.2%}{previous['error_rate']:>8.2%}")
+
+            if (change > tolerance and current['p99'] - previous['p99'] > P99_NOISE_FLOOR
+                    and min(current['count'], previous['count']) >= MIN_SAMPLES_FOR_P99):
+                regressions.append(f"{name} p99 at {step['rate']:.0f} req/s")
+            if current['error_rate'] > previous['error_rate'] + 0.01:
+                regressions.append(f"{name} error rate at {step['rate']:.0f} req/s")
+
+    if saturation and report.get('saturation_rate') and report['saturation_rate'] < saturation:
+        regressions.append(f"saturation rate {saturation:.0f} -> {report['saturation_rate']:.0f} req/s")
+
+    if regressions:
+        print_error(f"Regressed against baseline: {', '.join(regressions)}")
+        return False
+
+    print_success("No regressions against baseline")
+    return True
+
+def _open_grpc_channel(target: str) -> Any:
+    """Open an insecure gRPC channel, or return None if grpcio is not installed."""
+    try:
+        import grpc
+    except ImportError:
+        print_warning("grpcio is not installed, skipping gRPC calls")
+        return None
+    return grpc.aio.insecure_channel(target)
+
+def _latency_summary(samples: List[float], errors: int, dropped: int = 0) -> Dict[str, Any]:
+    """
+    Summarize latencies with exact percentiles.
+
+    Requests dropped at the in-flight limit have no latency but count as
+    failures in the error rate, which is taken over every attempted request.
+    """
+    samples = sorted(samples)
+    count = len(samples)
+    attempted = count + dropped
+
+    def percentile(q: float) -> Optional[float]:
+        return round(samples[min(count - 1, int(q * count))], 6) if count else None
+
+    return {
+        'count': count,
+        'errors': errors,
+        'dropped': dropped,
+        'error_rate': round((errors + dropped) / attempted, 4) if attempted else 0.0,
+        'p50': percentile(0.5),
+        'p95': percentile(0.95),
+        'p99': percentile(0.99),
+        'max': round(samples[-1], 6) if count else None,
+    }
+
+def _print_step_summary(step: Dict[str, Any]) -> None:
+    """Print the overall result of a rate step."""
+    overall = step['overall']
+    if not overall['count']:
+        print_warning("No requests completed")
+        return
+
+    print(f"  throughput {step['throughput']:.0f} req/s, errors {overall['error_rate']:.2%} "
+          f"({overall['errors']} failed, {overall['dropped']} dropped at the in-flight limit), "
+          f"p50 {overall['p50'] * 1000:.1f}ms, p95 {overall['p95'] * 1000:.1f}ms, "
+          f"p99 {overall['p99'] * 1000:.1f}ms, max {overall['max'] * 1000:.1f}ms")
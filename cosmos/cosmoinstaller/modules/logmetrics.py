@@ -0,0 +1,339 @@
+"""
+Cosmos Node Installer - Log Metrics Module
+
+This module derives block and peer metrics from the node's journald log
+stream and aggregates them into fixed-bucket histograms per interval.
+"""
+
+import os
+import re
+import json
+import time
+import subprocess
+from typing import Dict, Any, Optional, Iterable, List, TextIO
+
+# Histogram bucket upper bounds in seconds
+DURATION_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+INTERVAL_BUCKETS = [0.5, 1.0, 2.0, 3.0, 5.0, 7.0, 10.0, 15.0, 30.0, 60.0]
+
+# Heights waiting for their matching end event, older ones are dropped
+MAX_PENDING_HEIGHTS = 16
+
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*m")
+KEY_VALUE = re.compile(r"(\w+)=(\"[^\"]*\"|\S+)")
+# Console writer: "3:04PM INF message key=value", legacy Tendermint: "I[2023-01-01|15:04:05.000] message key=value"
+CONSOLE_LINE = re.compile(r"^(?:\S+\s+)?(DBG|INF|WRN|ERR|FTL|PNC)\s+(.*?)(?=\s+\w+=|$)(.*)$")
+LEGACY_LINE = re.compile(r"^([DIWEF])\[[^\]]*\]\s+(.*?)(?=\s+\w+=|$)(.*)$")
+
+LEVELS = {
+    "DBG": "debug", "INF": "info", "WRN": "warn", "ERR": "error", "FTL": "fatal", "PNC": "panic",
+    "D": "debug", "I": "info", "W": "warn", "E": "error", "F": "fatal",
+}
+
+class Histogram:
+    """Fixed-bucket histogram, constant memory regardless of sample count."""
+
+    def __init__(self, buckets: List[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record one sample."""
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum += value
+
+    def merge(self, other: "Histogram") -> None:
+        """Add another histogram with the same buckets into this one."""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile as the upper bound of the bucket it falls in."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + [float("inf")], self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Summarize the histogram for JSON output."""
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+class LogMetrics:
+    """Streaming aggregator of CometBFT log lines into per-interval metrics."""
+
+    HISTOGRAMS = {
+        "block_commit_seconds": DURATION_BUCKETS,
+        "block_execution_seconds": DURATION_BUCKETS,
+        "block_interval_seconds": INTERVAL_BUCKETS,
+    }
+
+    def __init__(self, interval: int = 60, json_out: Optional[TextIO] = None, prom_path: str = ""):
+        """
+        Initialize the aggregator.
+
+        Args:
+            interval: Interval length in seconds, measured in journal time
+            json_out: Stream that receives one JSON line per completed interval
+            prom_path: File rewritten with Prometheus text after every interval
+        """
+        self.interval = interval
+        self.json_out = json_out
+        self.prom_path = prom_path
+
+        # Cumulative state for Prometheus
+        self.totals = {name: Histogram(buckets) for name, buckets in self.HISTOGRAMS.items()}
+        self.lines_total = 0
+        self.errors_total = 0
+        self.height = 0
+        self.peers = 0
+
+        # Current interval state
+        self._interval_start = None
+        self._reset_interval()
+
+        # Start timestamps of in-flight heights
+        self._commit_started: Dict[int, float] = {}
+        self._proposal_received: Dict[int, float] = {}
+        self._last_commit_time = None
+
+    def process_journal_line(self, line: str) -> None:
+        """Process one line of `journalctl -o json` output."""
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return
+
+        message = record.get("MESSAGE", "")
+        # journald emits non UTF-8 messages as byte arrays
+        if isinstance(message, list):
+            message = bytes(message).decode("utf-8", "replace")
+
+        timestamp = int(record.get("__REALTIME_TIMESTAMP", time.time() * 1e6)) / 1e6
+        self.process_message(message, timestamp)
+
+    def process_message(self, message: str, timestamp: float) -> None:
+        """
+        Process one node log message.
+
+        Args:
+            message: Log message in CometBFT plain or JSON format
+            timestamp: Unix time the line was logged
+        """
+        if self._interval_start is None:
+            self._interval_start = timestamp - timestamp % self.interval
+        if timestamp >= self._interval_start + self.interval:
+            self.flush()
+            # Skip idle intervals in one step
+            if timestamp >= self._interval_start + self.interval:
+                self._interval_start = timestamp - timestamp % self.interval
+
+        parsed = parse_log_message(message)
+        if not parsed:
+            return
+
+        level, text, fields = parsed
+        self.lines_total += 1
+        self._lines += 1
+        if level in ("error", "fatal", "panic"):
+            self.errors_total += 1
+            self._errors += 1
+
+        text = text.lower()
+        height = _to_int(fields.get("height"))
+
+        if text == "received complete proposal block" and height:
+            _remember(self._proposal_received, height, timestamp)
+        elif text == "executed block" and height:
+            started = self._proposal_received.pop(height, None)
+            if started is not None:
+                self._observe("block_execution_seconds", timestamp - started)
+        elif text == "finalizing commit of block" and height:
+            _remember(self._commit_started, height, timestamp)
+        elif text == "committed state" and height:
+            started = self._commit_started.pop(height, None)
+            if started is not None:
+                self._observe("block_commit_seconds", timestamp - started)
+            if height > self.height:
+                if self._last_commit_time is not None and self.height:
+                    self._observe("block_interval_seconds", (timestamp - self._last_commit_time) / (height - self.height))
+                self.height = height
+                self._last_commit_time = timestamp
+                self._blocks += 1
+        elif text == "ensure peers":
+            outbound = _to_int(fields.get("numOutPeers"))
+            inbound = _to_int(fields.get("numInPeers"))
+            if outbound is not None and inbound is not None:
+                self.peers = outbound + inbound
+
+    def flush(self) -> Dict[str, Any]:
+        """
+        Close the current interval, emit it and start the next one.
+
+        Returns:
+            Summary of the closed interval
+        """
+        summary = {
+            "interval_start": self._interval_start,
+            "interval_seconds": self.interval,
+            "height": self.height,
+            "peers": self.peers,
+            "blocks": self._blocks,
+            "lines": self._lines,
+            "errors": self._errors,
+            "error_rate": round(self._errors / self.interval, 6),
+        }
+        for name, histogram in self._histograms.items():
+            summary[name] = histogram.to_dict()
+            self.totals[name].merge(histogram)
+
+        if self.json_out and self._lines:
+            self.json_out.write(json.dumps(summary) + "\n")
+            self.json_out.flush()
+
+        if self.prom_path:
+            tmp_path = f"{self.prom_path}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp_path, self.prom_path)
+
+        if self._interval_start is not None:
+            self._interval_start += self.interval
+        self._reset_interval()
+        return summary
+
+    def prometheus_text(self) -> str:
+        """Render the cumulative metrics in the Prometheus text exposition format."""
+        lines = [
+            "# TYPE cosmos_log_lines_total counter",
+            f"cosmos_log_lines_total {self.lines_total}",
+            "# TYPE cosmos_log_errors_total counter",
+            f"cosmos_log_errors_total {self.errors_total}",
+            "# TYPE cosmos_log_committed_height gauge",
+            f"cosmos_log_committed_height {self.height}",
+            "# TYPE cosmos_log_peers gauge",
+            f"cosmos_log_peers {self.peers}",
+        ]
+        for name, histogram in self.totals.items():
+            metric = f"cosmos_log_{name}"
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + ["+Inf"], histogram.counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f"{metric}_sum {histogram.sum}")
+            lines.append(f"{metric}_count {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def consume(self, journal_lines: Iterable[str]) -> None:
+        """Process `journalctl -o json` lines until the iterable is exhausted."""
+        for line in journal_lines:
+            self.process_journal_line(line)
+
+    def replay(self, journal_path: str) -> None:
+        """
+        Replay a saved journal, e.g. from `journalctl -u <unit> -o json > node.journal`.
+
+        Args:
+            journal_path: Path to the saved JSON journal
+        """
+        with open(journal_path, "r", errors="replace") as f:
+            self.consume(f)
+        self.flush()
+
+    def _observe(self, name: str, value: float) -> None:
+        """Record a sample in the current interval."""
+        if value >= 0:
+            self._histograms[name].observe(value)
+
+    def _reset_interval(self) -> None:
+        """Start a new, empty interval."""
+        self._histograms = {name: Histogram(buckets) for name, buckets in self.HISTOGRAMS.items()}
+        self._lines = 0
+        self._errors = 0
+        self._blocks = 0
+
+def parse_log_message(message: str) -> Optional[tuple]:
+    """
+    Parse a CometBFT log message.
+
+    Args:
+        message: Message in JSON, console or legacy Tendermint format
+
+    Returns:
+        Tuple of (level, text, fields), or None if the line is not a node log line
+    """
+    message = ANSI_ESCAPE.sub("", message).strip()
+
+    if message.startswith("{"):
+        try:
+            data = json.loads(message)
+        except ValueError:
+            return None
+        if not isinstance(data, dict):
+            return None
+        text = data.pop("_msg", None) or data.pop("message", "")
+        level = str(data.pop("level", "info")).lower()
+        return level, text, data
+
+    match = CONSOLE_LINE.match(message) or LEGACY_LINE.match(message)
+    if not match:
+        return None
+
+    level, text, rest = match.groups()
+    fields = {key: value.strip('"') for key, value in KEY_VALUE.findall(rest)}
+    return LEVELS[level], text.strip(), fields
+
+def stream_journal(unit: str, metrics: LogMetrics) -> None:
+    """
+    Follow a unit's journal and feed it into the aggregator until interrupted.
+
+    Args:
+        unit: Systemd unit to follow
+        metrics: Aggregator to feed
+    """
+    process = subprocess.Popen(
+        ["sudo", "journalctl", "-u", unit, "-o", "json", "-f", "-n", "0"],
+        stdout=subprocess.PIPE,
+        text=True,
+        errors="replace",
+    )
+    try:
+        metrics.consume(process.stdout)
+    except KeyboardInterrupt:
+        print("\nStopped log metrics")
+    finally:
+        process.terminate()
+        metrics.flush()
+
+def _remember(pending: Dict[int, float], height: int, timestamp: float) -> None:
+    """Store a start timestamp for a height, keeping only the newest heights."""
+    pending[height] = timestamp
+    if len(pending) > MAX_PENDING_HEIGHTS:
+        del pending[min(pending)]
+
+def _to_int(value: Any) -> Optional[int]:
+    """Convert a log field to int, or None."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,176 @@
+"""
+Cosmos Node Installer - Logging Profile Module
+
+This module applies logging profiles that cut node log volume: per-module
+log levels and JSON format in config.toml, and journald rate limits on the
+node unit.
+"""
+
+import time
+from typing import Dict, Any, List, Optional
+
+from .utils import (
+    print_header, print_step, print_success, print_warning, print_error,
+    run_command
+)
+
+# log_level uses the CometBFT/SDK "module:level" filter syntax. Every profile
+# except "errors" keeps the state and consensus lines the log metrics need.
+LOG_PROFILES = {
+    "verbose": {
+        "log_level": "info",
+        "log_format": "plain",
+        "rate_limit_interval": "30s",
+        "rate_limit_burst": 20000,
+    },
+    "metrics": {
+        "log_level": "*:error,consensus:info,state:info,pex:info",
+        "log_format": "json",
+        "rate_limit_interval": "30s",
+        "rate_limit_burst": 10000,
+    },
+    "quiet": {
+        "log_level": "*:error,consensus:info,state:info",
+        "log_format": "json",
+        "rate_limit_interval": "30s",
+        "rate_limit_burst": 2000,
+    },
+    "errors": {
+        "log_level": "*:error",
+        "log_format": "json",
+        "rate_limit_interval": "30s",
+        "rate_limit_burst": 1000,
+    },
+}
+
+def get_log_profile(name: str) -> Optional[Dict[str, Any]]:
+    """
+    Look up a logging profile.
+
+    Args:
+        name: Profile name, empty to leave logging untouched
+
+    Returns:
+        Profile settings, or None if no profile is selected
+    """
+    if not name:
+        return None
+    if name not in LOG_PROFILES:
+        print_warning(f"Unknown logging profile {name}, leaving logging unchanged")
+        return None
+    return LOG_PROFILES[name]
+
+def journald_unit_lines(profile: Dict[str, Any]) -> List[str]:
+    """Get the [Service] lines that rate-limit the unit's journal output."""
+    return [
+        f"LogRateLimitIntervalSec={profile['rate_limit_interval']}",
+        f"LogRateLimitBurst={profile['rate_limit_burst']}",
+    ]
+
+class LoggingProfile:
+    """Class for applying a logging profile to a Cosmos-based blockchain node."""
+
+    def __init__(self, config: Dict[str, Any]):
+        """
+        Initialize the logging profile with configuration.
+
+        Args:
+            config: Dictionary containing node configuration
+        """
+        # Node configuration
+        self.binary_name = config.get('binary_name', "")
+        self.node_home = config.get('node_home', "")
+
+        # Logging configuration
+        self.log_profile = config.get('log_profile', "")
+        self.measure_window = int(config.get('log_measure_window', 60))
+        self.measure_warmup = int(config.get('log_measure_warmup', 30))
+
+    def apply_profile(self) -> None:
+        """Apply the logging profile to a running node and report the log rate before and after."""
+        print_header("Applying Logging Profile")
+
+        if not self.binary_name or not self.node_home:
+            print_error("Binary name or node home not set, please configure the node first")
+            return
+
+        profile = get_log_profile(self.log_profile)
+        if not profile:
+            print_warning("No logging profile selected")
+            return
+
+        before = self.measure_log_rate()
+        print_step(f"Log rate before: {before:.1f} lines/sec")
+
+        print_step(f"Setting log_level and log_format for the {self.log_profile} profile")
+        self.update_config_toml(f"{self.node_home}/config/config.toml", profile)
+
+        print_step("Setting journald rate limits for the node service")
+        self._write_unit_dropin(profile)
+
+        print_step("Restarting node service")
+        run_command("sudo systemctl daemon-reload")
+        run_command(f"sudo systemctl restart {self.binary_name}")
+
+        print_step(f"Waiting {self.measure_warmup + self.measure_window}s to measure the new log rate")
+        time.sleep(self.measure_warmup + self.measure_window)
+        after = self.measure_log_rate()
+
+        reduction = (1 - after / before) * 100 if before else 0.0
+        print_success(f"Log rate: {before:.1f} -> {after:.1f} lines/sec ({reduction:.0f}% less)")
+
+    def measure_log_rate(self) -> float:
+        """
+        Measure the node's journal output over the last measurement window.
+
+        Returns:
+            Average lines per second
+        """
+        _, stdout, _ = run_command(
+            f"sudo journalctl -u {self.binary_name} --since '-{self.measure_window}s' -o cat -q --no-pager | wc -l",
+            exit_on_error=False
+        )
+        try:
+            return int(stdout.strip()) / self.measure_window
+        except ValueError:
+            return 0.0
+
+    @staticmethod
+    def update_config_toml(config_toml_path: str, profile: Dict[str, Any]) -> None:
+        """
+        Set the top-level log_level and log_format in config.toml.
+
+        Args:
+            config_toml_path: Path to config.toml
+            profile: Logging profile settings
+        """
+        with open(config_toml_path, "r") as f:
+            lines = f.readlines()
+
+        updated_lines = []
+        in_section = False
+        for line in lines:
+            if line.strip().startswith("["):
+                in_section = True
+
+            if not in_section and line.strip().startswith("log_level ="):
+                updated_lines.append(f'log_level = "{profile["log_level"]}"\n')
+            elif not in_section and line.strip().startswith("log_format ="):
+                updated_lines.append(f'log_format = "{profile["log_format"]}"\n')
+            else:
+                updated_lines.append(line)
+
+        with open(config_toml_path, "w") as f:
+            f.writelines(updated_lines)
+
+    def _write_unit_dropin(self, profile: Dict[str, Any]) -> None:
+        """Write a systemd drop-in with the journald rate limits for the node unit."""
+        dropin = "[Service]\n" + "\n".join(journald_unit_lines(profile)) + "\n"
+
+        dropin_path = f"/tmp/{self.binary_name}-logging.conf"
+        with open(dropin_path, "w") as f:
+            f.write(dropin)
+
+        dropin_dir = f"/etc/systemd/system/{self.binary_name}.service.d"
+        run_command(f"sudo mkdir -p {dropin_dir}")
+        run_command(f"sudo mv {dropin_path} {dropin_dir}/logging.conf")
@@ -13,6 +13,7 @@ from .utils import (
     print_header, print_step, print_success, print_warning, print_error,
     run_command, get_user_input, get_yes_no_input
 )
+from .logprofile import LoggingProfile, get_log_profile
 
 class NodeSetup:
     """Class for setting up a Cosmos-based blockchain node."""
@@ -59,6 +60,9 @@ class NodeSetup:
         self.json_rpc_port = config.get('json_rpc_port', 8545)
         self.json_rpc_ws_port = config.get('json_rpc_ws_port', 8546)
         
+        # Logging configuration
+        self.log_profile = config.get('log_profile', "")
+        
         # Add this line to capture the expose_json_rpc value
         self.expose_json_rpc = config.get('expose_json_rpc', True)  # Default to True if not specified
     
@@ -276,6 +280,12 @@ class NodeSetup:
         # Configure config.toml
         self._configure_config_toml()
         
+        # Apply logging profile
+        log_profile = get_log_profile(self.log_profile)
+        if log_profile:
+            print_step(f"Applying {self.log_profile} logging profile to config.toml")
+            LoggingProfile.update_config_toml(f"{self.node_home}/config/config.toml", log_profile)
+        
         # Download genesis file
         if self.genesis_url:
             self._download_genesis()
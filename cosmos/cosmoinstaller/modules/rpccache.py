@@ -0,0 +1,573 @@
+"""
+Cosmos Node Installer - RPC Cache Module
+
+This module runs a caching proxy in front of the node's CometBFT RPC and REST
+API. Height-pinned queries never change and are kept in a size-bounded LRU,
+"latest" queries are cached for a short TTL, and identical concurrent misses
+share a single upstream request.
+"""
+
+import re
+import json
+import time
+import random
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple, List
+from urllib.parse import parse_qsl
+
+import aiohttp
+from aiohttp import web
+
+from .utils import print_header, print_step, print_success, print_warning
+from .logmetrics import Histogram, DURATION_BUCKETS
+
+# Cache hits are served in well under a millisecond
+LATENCY_BUCKETS = [0.0001, 0.00025, 0.0005, 0.001, 0.0025] + DURATION_BUCKETS
+
+# CometBFT routes whose result is fixed once the height argument is set
+HEIGHT_PINNED_ROUTES = {"block", "block_results", "commit", "validators", "header", "consensus_params"}
+# CometBFT routes addressed by a hash
+HASH_PINNED_ROUTES = {"tx", "block_by_hash", "header_by_hash"}
+# Routes that must always reach the node
+UNCACHEABLE_ROUTES = {
+    "broadcast_tx_sync", "broadcast_tx_async", "broadcast_tx_commit", "broadcast_evidence",
+    "check_tx", "subscribe", "unsubscribe", "unsubscribe_all", "websocket",
+}
+
+# REST paths that embed a height or a hash
+IMMUTABLE_REST_PATHS = re.compile(
+    r"^/cosmos/base/tendermint/v1beta1/(blocks|validatorsets)/\d+$"
+    r"|^/cosmos/tx/v1beta1/txs/[0-9A-Fa-f]{64}$"
+    r"|^/cosmos/tx/v1beta1/txs/block/\d+$"
+)
+HEIGHT_HEADER = "x-cosmos-block-height"
+
+# Upstream JSON-RPC calls use a fixed id, swapped for the client's id on the way out
+UPSTREAM_ID = -1
+# CometBFT writes the id right after the version, indented; matched without parsing a large result
+UPSTREAM_ID_FIELD = re.compile(rb'^\s*\{\s*"jsonrpc"\s*:\s*"2\.0"\s*,\s*"id"\s*:\s*(-1)\s*[,}]')
+
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te", "trailers",
+    "transfer-encoding", "upgrade", "host", "content-length", "content-encoding",
+}
+
+class LRUCache:
+    """Response cache bounded by total body size, with optional per-entry expiry."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[str, Tuple[int, str, bytes, Optional[float]]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Tuple[int, str, bytes]]:
+        """Get a live entry as (status, content_type, body) and mark it recently used."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        status, content_type, body, expires = entry
+        if expires is not None and expires < time.monotonic():
+            self._remove(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return status, content_type, body
+
+    def put(self, key: str, status: int, content_type: str, body: bytes, ttl: Optional[float] = None) -> None:
+        """Store an entry, evicting the least recently used ones to stay within the size bound."""
+        # A single huge response would flush the whole cache
+        if len(body) > self.max_bytes // 8:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+
+        expires = time.monotonic() + ttl if ttl is not None else None
+        self._entries[key] = (status, content_type, body, expires)
+        self.size += len(body)
+
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str) -> None:
+        """Drop an entry."""
+        self.size -= len(self._entries.pop(key)[2])
+
+class CacheMetrics:
+    """Hit, miss and latency counters of the caching proxy."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.bypassed = 0
+        self.upstream_errors = 0
+        self.served_seconds = Histogram(LATENCY_BUCKETS)
+        self.upstream_seconds = Histogram(LATENCY_BUCKETS)
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of cacheable requests answered without a new upstream call."""
+        total = self.hits + self.coalesced + self.misses
+        return (self.hits + self.coalesced) / total if total else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        """Summarize the counters for JSON output."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "bypassed": self.bypassed,
+            "upstream_errors": self.upstream_errors,
+            "hit_rate": round(self.hit_rate, 4),
+            "served_seconds": self.served_seconds.to_dict(),
+            "upstream_seconds": self.upstream_seconds.to_dict(),
+        }
+
+    def prometheus_text(self, cache: LRUCache) -> str:
+        """Render the counters in the Prometheus text exposition format."""
+        lines = []
+        for name, value in (("hits", self.hits), ("misses", self.misses), ("coalesced", self.coalesced),
+                            ("bypassed", self.bypassed), ("upstream_errors", self.upstream_errors)):
+            lines += [f"# TYPE cosmos_rpc_cache_{name}_total counter", f"cosmos_rpc_cache_{name}_total {value}"]
+        lines += [
+            "# TYPE cosmos_rpc_cache_entries gauge",
+            f"cosmos_rpc_cache_entries {len(cache)}",
+            "# TYPE cosmos_rpc_cache_bytes gauge",
+            f"cosmos_rpc_cache_bytes {cache.size}",
+        ]
+        for name, histogram in (("served_seconds", self.served_seconds), ("upstream_seconds", self.upstream_seconds)):
+            metric = f"cosmos_rpc_cache_{name}"
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + ["+Inf"], histogram.counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f"{metric}_sum {histogram.sum}")
+            lines.append(f"{metric}_count {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+class CachingProxy:
+    """Caching reverse proxy for one upstream, either the CometBFT RPC or the REST API."""
+
+    def __init__(self, name: str, upstream: str, cache: LRUCache, metrics: CacheMetrics, latest_ttl: float):
+        """
+        Initialize the proxy.
+
+        Args:
+            name: Cache key namespace, e.g. rpc or api
+            upstream: Base URL of the node endpoint
+            cache: Response cache, may be shared between proxies
+            metrics: Metrics, may be shared between proxies
+            latest_ttl: Seconds to cache responses that follow the chain tip
+        """
+        self.name = name
+        self.upstream = upstream.rstrip("/")
+        self.cache = cache
+        self.metrics = metrics
+        self.latest_ttl = latest_ttl
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def make_app(self) -> web.Application:
+        """Create the aiohttp application serving this proxy."""
+        app = web.Application(client_max_size=16 << 20)
+        app.router.add_get("/rpc_cache/metrics", self._handle_metrics)
+        app.router.add_route("*", "/{tail:.*}", self._handle)
+        app.on_startup.append(self._open_session)
+        app.on_cleanup.append(self._close_session)
+        return app
+
+    async def _open_session(self, app: web.Application) -> None:
+        """Open the pooled upstream session."""
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=64, keepalive_timeout=60),
+            timeout=aiohttp.ClientTimeout(total=30),
+        )
+
+    async def _close_session(self, app: web.Application) -> None:
+        """Close the upstream session."""
+        await self.session.close()
+
+    async def _handle_metrics(self, request: web.Request) -> web.Response:
+        """Serve the cache metrics in Prometheus format, or JSON with ?format=json."""
+        if request.query.get("format") == "json":
+            return web.json_response(self.metrics.summary())
+        return web.Response(text=self.metrics.prometheus_text(self.cache), content_type="text/plain")
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        """Serve a request from the cache, a shared in-flight request, or the node."""
+        started = time.perf_counter()
+        body = await request.read()
+
+        client_id = None
+        ttl = None
+        if request.method == "GET":
+            key, ttl = self._classify_get(request)
+        elif request.method == "POST" and self.name == "rpc":
+            key, ttl, client_id = self._classify_jsonrpc(body)
+        else:
+            key = None
+
+        if key is None:
+            self.metrics.bypassed += 1
+            status, content_type, payload, headers = await self._fetch(request.method, request.path_qs, request.headers, body)
+            response = web.Response(status=status, body=payload, headers=headers)
+            self.metrics.served_seconds.observe(time.perf_counter() - started)
+            return response
+
+        if client_id is not None:
+            # Every client id maps to the same upstream call
+            body = _with_upstream_id(body)
+
+        cached = self.cache.get(key)
+        if cached:
+            self.metrics.hits += 1
+            status, content_type, payload = cached
+            cache_status = "HIT"
+        elif key in self._inflight:
+            self.metrics.coalesced += 1
+            status, content_type, payload = await asyncio.shield(self._inflight[key])
+            cache_status = "COALESCED"
+        else:
+            self.metrics.misses += 1
+            status, content_type, payload = await self._fetch_shared(key, ttl, request, body, client_id is not None)
+            cache_status = "MISS"
+
+        if client_id is not None:
+            payload = _with_client_id(payload, client_id)
+
+        response = web.Response(status=status, body=payload, headers={"Content-Type": content_type, "X-Cache": cache_status})
+        self.metrics.served_seconds.observe(time.perf_counter() - started)
+        return response
+
+    async def _fetch_shared(self, key: str, ttl: Optional[float], request: web.Request,
+                            body: bytes, jsonrpc: bool) -> Tuple[int, str, bytes]:
+        """Fetch a cacheable response once for every concurrent request with the same key."""
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            status, content_type, payload, _ = await self._fetch(request.method, request.path_qs, request.headers, body)
+            result = (status, content_type, payload)
+
+            # Errors (e.g. a height above the tip) are not cached; CometBFT answers them with 200 and an error body
+            if status == 200 and (self.name != "rpc" or _is_result(payload, jsonrpc)):
+                self.cache.put(key, status, content_type, payload, ttl)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            del self._inflight[key]
+            if not future.done():
+                future.cancel()
+            elif not future.cancelled():
+                # Retrieve the exception so it is not logged when no request is waiting
+                future.exception()
+
+    async def _fetch(self, method: str, path_qs: str, headers: Any, body: bytes) -> Tuple[int, str, bytes, Dict[str, str]]:
+        """Forward a request to the node."""
+        # Bodies are cached uncompressed, compression is left to Caddy; a body the node compresses
+        # anyway is decompressed by the session, which is why content-encoding is not forwarded
+        forward_headers = {k: v for k, v in headers.items() if k.lower() not in HOP_BY_HOP_HEADERS | {"accept-encoding"}}
+        forward_headers["Accept-Encoding"] = "identity"
+
+        started = time.perf_counter()
+        try:
+            async with self.session.request(method, f"{self.upstream}{path_qs}", headers=forward_headers, data=body or None) as response:
+                payload = await response.read()
+                response_headers = {k: v for k, v in response.headers.items() if k.lower() not in HOP_BY_HOP_HEADERS}
+                content_type = response.headers.get("Content-Type", "application/json")
+                status = response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.metrics.upstream_errors += 1
+            return 502, "text/plain", f"upstream error: {e}".encode(), {}
+        finally:
+            self.metrics.upstream_seconds.observe(time.perf_counter() - started)
+
+        if status >= 500:
+            self.metrics.upstream_errors += 1
+        return status, content_type, payload, response_headers
+
+    def _classify_get(self, request: web.Request) -> Tuple[Optional[str], Optional[float]]:
+        """
+        Decide how a GET request may be cached.
+
+        Returns:
+            Tuple of (cache_key, ttl); the key is None for uncacheable requests
+            and the ttl is None for immutable ones
+        """
+        path = request.path
+        query = sorted(parse_qsl(request.query_string, keep_blank_values=True))
+        height = request.headers.get(HEIGHT_HEADER, "")
+        key = f"{self.name} GET {path}?{'&'.join(f'{k}={v}' for k, v in query)} {height}"
+
+        if self.name == "rpc":
+            route = path.strip("/")
+            params = {k: v.strip('"') for k, v in query}
+            if route in UNCACHEABLE_ROUTES or route.startswith(("unsafe", "dial_")):
+                return None, None
+            if route in HEIGHT_PINNED_ROUTES and _is_height(params.get("height")):
+                return key, None
+            if route in HASH_PINNED_ROUTES and params.get("hash"):
+                return key, None
+            if route == "blockchain" and _is_height(params.get("minHeight")) and _is_height(params.get("maxHeight")):
+                return key, None
+            return key, self.latest_ttl
+
+        if _is_height(height) or IMMUTABLE_REST_PATHS.match(path):
+            return key, None
+        return key, self.latest_ttl
+
+    def _classify_jsonrpc(self, body: bytes) -> Tuple[Optional[str], Optional[float], Any]:
+        """
+        Decide how a JSON-RPC POST request may be cached.
+
+        Returns:
+            Tuple of (cache_key, ttl, client_id); the key is None for
+            uncacheable requests, including batches
+        """
+        try:
+            call = json.loads(body)
+        except ValueError:
+            return None, None, None
+        if not isinstance(call, dict) or not isinstance(call.get("params", {}), dict):
+            return None, None, None
+
+        method = str(call.get("method", ""))
+        params = call.get("params") or {}
+        if method in UNCACHEABLE_ROUTES or method.startswith(("unsafe", "dial_")):
+            return None, None, None
+
+        key = f"{self.name} POST {method} {json.dumps(params, sort_keys=True)}"
+        if method in HEIGHT_PINNED_ROUTES and _is_height(params.get("height")):
+            return key, None, call.get("id")
+        if method in HASH_PINNED_ROUTES and params.get("hash"):
+            return key, None, call.get("id")
+        return key, self.latest_ttl, call.get("id")
+
+class RpcCache:
+    """Class for running the caching proxy in front of a Cosmos-based blockchain node."""
+
+    def __init__(self, config: Dict[str, Any]):
+        """
+        Initialize the RPC cache with configuration.
+
+        Args:
+            config: Dictionary containing node configuration
+        """
+        # Node configuration
+        self.rpc_port = config.get('rpc_port', 26657)
+        self.api_port = config.get('api_port', 1317)
+
+        # Cache configuration
+        self.listen_address = config.get('rpc_cache_listen', "127.0.0.1")
+        self.rpc_listen_port = int(config.get('rpc_cache_rpc_port', 36657))
+        self.api_listen_port = int(config.get('rpc_cache_api_port', 11317))
+        self.size_mb = int(config.get('rpc_cache_size_mb', 256))
+        self.latest_ttl = float(config.get('rpc_cache_latest_ttl', 1.0))
+        self.stats_interval = int(config.get('rpc_cache_stats_interval', 60))
+
+    def run(self) -> None:
+        """Serve the RPC and REST caches until interrupted."""
+        print_header("Running RPC Cache")
+
+        print_step(f"RPC localhost:{self.rpc_port} cached on {self.listen_address}:{self.rpc_listen_port}")
+        print_step(f"API localhost:{self.api_port} cached on {self.listen_address}:{self.api_listen_port}")
+        print_step(f"Cache size {self.size_mb} MiB, latest queries cached for {self.latest_ttl}s")
+        print("\nPress Ctrl+C to stop\n")
+
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            print("\nStopped RPC cache")
+
+    async def serve(self) -> None:
+        """Serve both proxies with one shared cache, printing stats every interval."""
+        cache = LRUCache(self.size_mb << 20)
+        metrics = CacheMetrics()
+        runners = [
+            await _start_site(CachingProxy("rpc", f"http://localhost:{self.rpc_port}", cache, metrics, self.latest_ttl).make_app(),
+                              self.listen_address, self.rpc_listen_port),
+            await _start_site(CachingProxy("api", f"http://localhost:{self.api_port}", cache, metrics, self.latest_ttl).make_app(),
+                              self.listen_address, self.api_listen_port),
+        ]
+        try:
+            while True:
+                await asyncio.sleep(self.stats_interval)
+                print(json.dumps({"time": int(time.time()), "entries": len(cache), "bytes": cache.size, **metrics.summary()}))
+        finally:
+            for runner in runners:
+                await runner.cleanup()
+
+    def benchmark(self, duration: float = 10.0, concurrency: int = 64) -> None:
+        """
+        Compare a stub node served directly and through the cache.
+
+        The stub answers one request at a time with a fixed service time, like
+        the node's RPC under load, and the client requests a skewed mix of
+        historical blocks and /status.
+
+        Args:
+            duration: Seconds of load per run
+            concurrency: Concurrent client connections
+        """
+        print_header("Benchmarking RPC Cache")
+        asyncio.run(self._benchmark(duration, concurrency))
+
+    async def _benchmark(self, duration: float, concurrency: int) -> None:
+        """Run the direct and cached benchmark rounds and print the comparison."""
+        stub = _StubNode(service_time=0.002)
+        stub_runner = await _start_site(stub.make_app(), "127.0.0.1", 0)
+        stub_url = f"http://127.0.0.1:{_bound_port(stub_runner)}"
+
+        cache = LRUCache(self.size_mb << 20)
+        metrics = CacheMetrics()
+        proxy_runner = await _start_site(
+            CachingProxy("rpc", stub_url, cache, metrics, self.latest_ttl).make_app(), "127.0.0.1", 0
+        )
+        proxy_url = f"http://127.0.0.1:{_bound_port(proxy_runner)}"
+
+        try:
+            results = {}
+            for label, url in (("direct", stub_url), ("cached", proxy_url)):
+                print_step(f"Running {label} for {duration:.0f}s with {concurrency} connections")
+                stub.requests = 0
+                results[label] = await _run_load(url, duration, concurrency)
+                results[label]['upstream_requests'] = stub.requests
+        finally:
+            await proxy_runner.cleanup()
+            await stub_runner.cleanup()
+
+        print(f"\n{'':10}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}{'node calls':>12}")
+        for label, result in results.items():
+            print(f"{label:10}{result['rps']:>10.0f}{result['p50'] * 1000:>10.2f}"
+                  f"{result['p99'] * 1000:>10.2f}{result['errors']:>8}{result['upstream_requests']:>12}")
+
+        print(f"\nHit rate {metrics.hit_rate:.1%} ({metrics.hits} hits, {metrics.coalesced} coalesced, {metrics.misses} misses)")
+        if results['direct']['rps']:
+            print_success(f"Throughput {results['cached']['rps'] / results['direct']['rps']:.1f}x the direct node")
+        else:
+            print_warning("Direct run completed no requests")
+
+class _StubNode:
+    """Minimal CometBFT RPC stub that serializes requests like a busy node."""
+
+    def __init__(self, service_time: float, latest_height: int = 1_000_000):
+        self.service_time = service_time
+        self.latest_height = latest_height
+        self.requests = 0
+        self._lock = asyncio.Lock()
+
+    def make_app(self) -> web.Application:
+        """Create the stub application."""
+        app = web.Application()
+        app.router.add_get("/status", self._status)
+        app.router.add_get("/block", self._block)
+        return app
+
+    async def _serve(self, result: Dict[str, Any]) -> web.Response:
+        """Answer one request at a time with the configured service time."""
+        async with self._lock:
+            self.requests += 1
+            await asyncio.sleep(self.service_time)
+        return web.json_response({"jsonrpc": "2.0", "id": UPSTREAM_ID, "result": result})
+
+    async def _status(self, request: web.Request) -> web.Response:
+        return await self._serve({"sync_info": {"latest_block_height": str(self.latest_height), "catching_up": False}})
+
+    async def _block(self, request: web.Request) -> web.Response:
+        height = request.query.get("height", str(self.latest_height)).strip('"')
+        return await self._serve({"block": {"header": {"height": height}, "data": {"txs": ["AAAA" * 64] * 32}}})
+
+async def _run_load(url: str, duration: float, concurrency: int) -> Dict[str, Any]:
+    """Drive a closed-loop load of skewed historical block queries and /status."""
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.monotonic() + duration
+
+    async def worker(session: aiohttp.ClientSession) -> None:
+        nonlocal errors
+        while time.monotonic() < deadline:
+            if random.random() < 0.2:
+                path = "/status"
+            else:
+                # Pareto-distributed block age: most clients look at recent blocks
+                path = f"/block?height={1_000_000 - min(int(random.paretovariate(1.2)), 10_000)}"
+            started = time.perf_counter()
+            try:
+                async with session.get(f"{url}{path}") as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=60)) as session:
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+
+    latencies.sort()
+    return {
+        'rps': len(latencies) / duration,
+        'p50': latencies[len(latencies) // 2] if latencies else 0.0,
+        'p99': latencies[int(len(latencies) * 0.99)] if latencies else 0.0,
+        'errors': errors,
+    }
+
+async def _start_site(app: web.Application, host: str, port: int) -> web.AppRunner:
+    """Start an aiohttp application on a TCP port."""
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+def _bound_port(runner: web.AppRunner) -> int:
+    """Get the port an application bound to, for sites started on port 0."""
+    return runner.addresses[0][1]
+
+def _is_height(value: Any) -> bool:
+    """Check if a height argument pins a specific block, rather than the latest one."""
+    try:
+        return int(str(value).strip('"')) > 0
+    except ValueError:
+        return False
+
+def _is_result(payload: bytes, jsonrpc: bool) -> bool:
+    """Check if a CometBFT response carries a result rather than an error, and the upstream id for JSON-RPC."""
+    try:
+        response = json.loads(payload)
+    except ValueError:
+        return False
+    if not isinstance(response, dict) or "result" not in response or "error" in response:
+        return False
+    return not jsonrpc or response.get("id") == UPSTREAM_ID
+
+def _with_client_id(payload: bytes, client_id: Any) -> bytes:
+    """Put the client's id back into a JSON-RPC response to an upstream call."""
+    match = UPSTREAM_ID_FIELD.match(payload)
+    if match:
+        return payload[:match.start(1)] + json.dumps(client_id).encode() + payload[match.end(1):]
+
+    # Fields in another order
+    try:
+        response = json.loads(payload)
+    except ValueError:
+        return payload
+    if not isinstance(response, dict) or response.get("id") != UPSTREAM_ID:
+        return payload
+    response["id"] = client_id
+    return json.dumps(response, indent=2).encode()
+
+def _with_upstream_id(body: bytes) -> bytes:
+    """Rewrite a JSON-RPC request to use the fixed upstream id."""
+    call = json.loads(body)
+    call["id"] = UPSTREAM_ID
+    return json.dumps(call).encode()
@@ -4,6 +4,7 @@ Cosmos Node Installer - Service Module
 This module handles service management for Cosmos nodes.
 """
 
+import sys
 import subprocess
 from typing import Dict, Any
 
@@ -11,6 +12,7 @@ from .utils import (
     print_header, print_step, print_success, print_warning, print_error,
     run_command, stream_command
 )
+from .logmetrics import LogMetrics, stream_journal
 
 class ServiceManager:
     """Class for managing services for a Cosmos-based blockchain node."""
@@ -24,6 +26,11 @@ class ServiceManager:
         """
         # Node configuration
         self.binary_name = config.get('binary_name', "")
+        
+        # Log metrics configuration
+        self.log_metrics_interval = int(config.get('log_metrics_interval', 60))
+        self.log_metrics_prom_file = config.get('log_metrics_prom_file', "")
+        self.log_metrics_json_file = config.get('log_metrics_json_file', "")
     
     def start_enable_service(self) -> None:
         """Start and enable the node service."""
@@ -86,3 +93,37 @@ class ServiceManager:
             stream_command(f"sudo journalctl -u {service_name} -f -o cat")
         except KeyboardInterrupt:
             print("\nExited log view")
+    
+    def show_log_metrics(self, journal_path: str = "") -> None:
+        """
+        Derive block, peer and error metrics from the node logs.
+        
+        Args:
+            journal_path: Saved `journalctl -o json` output to replay instead of following the live journal
+        """
+        print_header("Node Log Metrics")
+        
+        json_out = open(self.log_metrics_json_file, "a") if self.log_metrics_json_file else sys.stdout
+        metrics = LogMetrics(self.log_metrics_interval, json_out, self.log_metrics_prom_file)
+        
+        try:
+            if journal_path:
+                print_step(f"Replaying journal {journal_path}")
+                metrics.replay(journal_path)
+                print(metrics.prometheus_text())
+                print_success(f"Replayed {metrics.lines_total} node log lines")
+                return
+            
+            if not self.binary_name:
+                print_error("Binary name not set, please configure the node first")
+                return
+            
+            print_step(f"Aggregating {self.binary_name} logs every {self.log_metrics_interval}s")
+            if self.log_metrics_prom_file:
+                print_step(f"Writing Prometheus metrics to {self.log_metrics_prom_file}")
+            print("\nPress Ctrl+C to exit\n")
+            
+            stream_journal(self.binary_name, metrics)
+        finally:
+            if json_out is not sys.stdout:
+                json_out.close()
@@ -0,0 +1,872 @@
+"""
+Cosmos Node Installer - Node Simulator Module
+
+This module runs a simulated CometBFT/Cosmos SDK node that serves the RPC,
+websocket and REST endpoints the installer and the monitoring scripts use,
+so they can be exercised and benchmarked without a real chain. Block time,
+stalls, lag, jailing, latency and errors are configurable and can be changed
+at runtime through the /sim control endpoints.
+"""
+
+import json
+import time
+import base64
+import random
+import asyncio
+import hashlib
+import datetime
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+
+from aiohttp import web, WSMsgType
+
+from .utils import print_header, print_step
+
+# block_id_flag values of commit signatures
+BLOCK_ID_FLAG_ABSENT = 1
+BLOCK_ID_FLAG_COMMIT = 2
+
+BECH32_CHARSET = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
+
+class SimulatedChain:
+    """
+    State of the simulated chain.
+
+    Only the local validator's absent heights and the block times are stored;
+    every other validator's signature on a block is derived from the height,
+    so history costs no memory even with thousands of validators.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        """
+        Initialize the chain with configuration.
+
+        Args:
+            config: Dictionary containing node configuration
+        """
+        self.chain_id = config.get('sim_chain_id', "sim-1")
+        self.prefix = config.get('sim_bech32_prefix', "cosmos")
+        self.block_time = float(config.get('sim_block_time', 6.0))
+        self.miss_rate = float(config.get('sim_miss_rate', 0.01))
+        self.history = int(config.get('sim_history', 10000))
+        self.catching_up_lag = int(config.get('sim_catching_up_lag', 100))
+        self.seed = int(config.get('sim_seed', 1))
+
+        # Slashing parameters
+        self.signed_blocks_window = int(config.get('sim_signed_blocks_window', 100))
+        self.min_signed_per_window = float(config.get('sim_min_signed_per_window', 0.5))
+        self.downtime_jail_duration = float(config.get('sim_downtime_jail_duration', 600))
+
+        # Validator 0 is the local node's validator
+        count = max(1, int(config.get('sim_validators', 100)))
+        self.validators = [self._make_validator(i) for i in range(count)]
+        self.local = self.validators[0]
+
+        # Block heights start after a virtual history with regular block times
+        self.earliest_height = 1
+        self.height = max(1, int(config.get('sim_initial_height', self.history)))
+        now = time.time()
+        self._times = {h: now - (self.height - h) * self.block_time for h in range(max(1, self.height - self.history), self.height + 1)}
+        self.earliest_height = min(self._times)
+        # Heights the local validator did not sign, and those that count toward downtime jailing
+        self._absent: set = set()
+        self._missed: set = set()
+
+        # Scenario controls
+        self.lag = int(config.get('sim_lag', 0))
+        self.offline = False
+        self.stalled_until = 0.0
+        self.stall_at_height = int(config.get('sim_stall_at_height', 0))
+        self.stall_seconds = float(config.get('sim_stall_seconds', 0))
+        self.offline_at_height = int(config.get('sim_offline_at_height', 0))
+
+        # The local validator's account, and transactions waiting for and included in blocks
+        self.account = {'address': self.local['account_address'], 'account_number': 7, 'sequence': 0}
+        self.unjail_gas = int(config.get('sim_unjail_gas', 92000))
+        self.mempool: List[Tuple[str, bytes]] = []
+        self.txs: Dict[str, Dict[str, Any]] = {}
+        self.included: List[str] = []
+
+    def _make_validator(self, index: int) -> Dict[str, Any]:
+        """Derive a validator's keys and addresses from its index."""
+        pub_key = hashlib.sha256(f"{self.chain_id}/validator/{index}".encode()).digest()
+        address = hashlib.sha256(pub_key).digest()[:20]
+        operator = hashlib.sha256(b"operator" + pub_key).digest()[:20]
+        power = 1000 + (index * 7919) % 100000
+        return {
+            'index': index,
+            'moniker': f"validator-{index}",
+            'pub_key': base64.b64encode(pub_key).decode(),
+            'address': address.hex().upper(),
+            'consensus_address': bech32_encode(f"{self.prefix}valcons", address),
+            'operator_address': bech32_encode(f"{self.prefix}valoper", operator),
+            'account_address': bech32_encode(self.prefix, operator),
+            'power': power,
+            'jailed': False,
+            'jailed_until': 0.0,
+            'start_height': 1,
+        }
+
+    @property
+    def node_height(self) -> int:
+        """Height of the simulated node, which trails the chain by the configured lag."""
+        return max(self.earliest_height, self.height - self.lag)
+
+    @property
+    def stalled(self) -> bool:
+        """Check if block production is stalled."""
+        return time.time() < self.stalled_until
+
+    def produce_block(self) -> int:
+        """
+        Produce the next block, applying scheduled scenarios and downtime jailing.
+
+        Returns:
+            The new chain height
+        """
+        self.height += 1
+        self._times[self.height] = time.time()
+        if len(self._times) > self.history:
+            del self._times[self.earliest_height]
+            self._absent.discard(self.earliest_height)
+            self._missed.discard(self.earliest_height)
+            self.earliest_height += 1
+
+        if self.offline_at_height and self.height >= self.offline_at_height:
+            self.offline = True
+            self.offline_at_height = 0
+        if self.stall_at_height and self.height >= self.stall_at_height:
+            self.stall(self.stall_seconds)
+            self.stall_at_height = 0
+
+        if self.local['jailed']:
+            self._absent.add(self.height)
+        elif self.offline:
+            self._absent.add(self.height)
+            self._missed.add(self.height)
+        if not self.local['jailed'] and self.missed_in_window() > self.signed_blocks_window * (1 - self.min_signed_per_window):
+            self.jail()
+
+        self.included = []
+        for index, (tx_hash, tx) in enumerate(self.mempool):
+            self.txs[tx_hash] = self.deliver_tx(tx, index)
+            self.included.append(tx_hash)
+        self.mempool = []
+        return self.height
+
+    def check_tx(self, tx: bytes) -> Dict[str, Any]:
+        """
+        Check a transaction and add it to the mempool, as broadcast_tx_sync would.
+
+        Every transaction is taken to be a MsgUnjail of the local validator. Signatures are not
+        verified, but a transaction in JSON form has its sequence and gas limit checked.
+
+        Returns:
+            CheckTx result with the transaction hash
+        """
+        tx_hash = hashlib.sha256(tx).hexdigest().upper()
+        result = {'code': 0, 'data': "", 'log': "[]", 'codespace': "", 'hash': tx_hash}
+        sequence = _tx_field(tx, "auth_info", "signer_infos", 0, "sequence")
+        if sequence is not None and int(sequence) != self.account['sequence']:
+            result.update(code=32, codespace="sdk", log=f"account sequence mismatch, expected {self.account['sequence']}, "
+                                                        f"got {sequence}: incorrect account sequence")
+        elif tx_hash in self.txs or any(tx_hash == queued for queued, _ in self.mempool):
+            result.update(code=19, codespace="sdk", log="tx already exists in cache")
+        else:
+            self.mempool.append((tx_hash, tx))
+        return result
+
+    def deliver_tx(self, tx: bytes, index: int) -> Dict[str, Any]:
+        """Execute a transaction from the mempool in the current block."""
+        gas_wanted = int(_tx_field(tx, "auth_info", "fee", "gas_limit") or 200000)
+        gas_used = min(gas_wanted, self.unjail_gas)
+        self.account['sequence'] += 1
+        if gas_wanted < self.unjail_gas:
+            code, codespace, log = 11, "sdk", f"out of gas in location: unjail; gasWanted: {gas_wanted}, gasUsed: {self.unjail_gas}: out of gas"
+        elif not self.local['jailed']:
+            code, codespace, log = 5, "slashing", "validator not jailed; cannot be unjailed"
+        elif not self.unjail():
+            code, codespace, log = 4, "slashing", "validator still jailed; cannot be unjailed"
+        else:
+            code, codespace, log = 0, "", "[]"
+        return {
+            'height': self.height,
+            'index': index,
+            'tx': base64.b64encode(tx).decode(),
+            'result': {'code': code, 'codespace': codespace, 'log': log, 'gas_wanted': str(gas_wanted),
+                       'gas_used': str(gas_used), 'events': []},
+        }
+
+    def stall(self, seconds: float) -> None:
+        """Stop block production for a while."""
+        self.stalled_until = time.time() + seconds
+
+    def jail(self) -> None:
+        """Jail the local validator."""
+        self.local['jailed'] = True
+        self.local['jailed_until'] = time.time() + self.downtime_jail_duration
+
+    def unjail(self) -> bool:
+        """
+        Unjail the local validator, as MsgUnjail would.
+
+        Returns:
+            False if the validator is not jailed or still inside its jail period
+        """
+        if not self.local['jailed'] or time.time() < self.local['jailed_until']:
+            return False
+
+        self.local['jailed'] = False
+        self.local['start_height'] = self.height + 1
+        self._missed.clear()
+        return True
+
+    def missed_in_window(self) -> int:
+        """Count the local validator's missed blocks in the signing window."""
+        start = self.height - self.signed_blocks_window
+        return sum(1 for h in self._missed if h > start)
+
+    def block_time_at(self, height: int) -> float:
+        """Get the unix time of a block."""
+        return self._times[height]
+
+    def block_hash(self, height: int) -> str:
+        """Get the hash of a block."""
+        return hashlib.sha256(f"{self.chain_id}/block/{height}".encode()).hexdigest().upper()
+
+    def active_validators(self) -> List[Dict[str, Any]]:
+        """Get the validators in the active set."""
+        return [v for v in self.validators if not v['jailed']]
+
+    def signed(self, height: int) -> List[bool]:
+        """Get which validators signed the commit of a block."""
+        rng = random.Random(self.seed * 1_000_003 + height)
+        signed = [rng.random() >= self.miss_rate for _ in self.validators]
+        signed[0] = height not in self._absent
+        return signed
+
+class SimulatedNode:
+    """Class for serving a simulated Cosmos-based blockchain node."""
+
+    def __init__(self, config: Dict[str, Any]):
+        """
+        Initialize the simulated node with configuration.
+
+        Args:
+            config: Dictionary containing node configuration
+        """
+        # Simulator configuration
+        self.listen_address = config.get('sim_listen', "127.0.0.1")
+        self.rpc_port = int(config.get('sim_rpc_port', 46657))
+        self.api_port = int(config.get('sim_api_port', 41317))
+        self.latency_ms = float(config.get('sim_latency_ms', 0))
+        self.jitter_ms = float(config.get('sim_jitter_ms', 0))
+        self.error_rate = float(config.get('sim_error_rate', 0))
+
+        self.chain = SimulatedChain(config)
+        self._subscribers: List[Tuple[web.WebSocketResponse, Any, str]] = []
+        self._runners: List[web.AppRunner] = []
+        self._producer: Optional[asyncio.Task] = None
+        self._rng = random.Random(self.chain.seed)
+
+    def run(self) -> None:
+        """Serve the simulated node until interrupted."""
+        print_header("Running Simulated Node")
+
+        print_step(f"Chain {self.chain.chain_id} with {len(self.chain.validators)} validators, "
+                   f"{self.chain.block_time}s blocks, starting at height {self.chain.height}")
+        print_step(f"RPC on {self.listen_address}:{self.rpc_port}, REST on {self.listen_address}:{self.api_port}")
+        print_step(f"Local validator {self.chain.local['operator_address']} ({self.chain.local['consensus_address']})")
+        print_step(f"Local account {self.chain.account['address']}, which may send unjail transactions")
+        print("\nPress Ctrl+C to stop\n")
+
+        async def serve() -> None:
+            await self.start()
+            try:
+                await asyncio.Event().wait()
+            finally:
+                await self.stop()
+
+        try:
+            asyncio.run(serve())
+        except KeyboardInterrupt:
+            print("\nStopped simulated node")
+
+    async def start(self) -> Dict[str, str]:
+        """
+        Start block production and the RPC and REST servers.
+
+        Ports set to 0 are picked by the OS, which suits in-process tests.
+
+        Returns:
+            Dictionary with the rpc, websocket and api URLs
+        """
+        rpc_app = web.Application()
+        rpc_app.router.add_get("/websocket", self._websocket)
+        rpc_app.router.add_route("*", "/sim/{action}", self._control)
+        rpc_app.router.add_post("/", self._json_rpc)
+        rpc_app.router.add_get("/{route}", self._rpc_get)
+
+        api_app = web.Application()
+        api_app.router.add_get("/cosmos/base/tendermint/v1beta1/syncing", self._rest_syncing)
+        api_app.router.add_get("/cosmos/base/tendermint/v1beta1/blocks/{height}", self._rest_block)
+        api_app.router.add_get("/cosmos/slashing/v1beta1/params", self._rest_slashing_params)
+        api_app.router.add_get("/cosmos/slashing/v1beta1/signing_infos", self._rest_signing_infos)
+        api_app.router.add_get("/cosmos/slashing/v1beta1/signing_infos/{address}", self._rest_signing_info)
+        api_app.router.add_get("/cosmos/staking/v1beta1/params", self._rest_staking_params)
+        api_app.router.add_get("/cosmos/staking/v1beta1/validators", self._rest_validators)
+        api_app.router.add_get("/cosmos/staking/v1beta1/validators/{address}", self._rest_validator)
+        api_app.router.add_get("/cosmos/auth/v1beta1/accounts/{address}", self._rest_account)
+
+        urls = {}
+        for name, app, port in (("rpc", rpc_app, self.rpc_port), ("api", api_app, self.api_port)):
+            app.middlewares.append(self._inject_faults)
+            runner = web.AppRunner(app, access_log=None)
+            await runner.setup()
+            await web.TCPSite(runner, self.listen_address, port).start()
+            self._runners.append(runner)
+            urls[name] = f"http://{self.listen_address}:{runner.addresses[0][1]}"
+        urls['websocket'] = urls['rpc'].replace("http://", "ws://") + "/websocket"
+
+        self._producer = asyncio.create_task(self._produce_blocks())
+        return urls
+
+    async def stop(self) -> None:
+        """Stop block production and the servers."""
+        if self._producer:
+            self._producer.cancel()
+        for ws, _, _ in list(self._subscribers):
+            await ws.close()
+        for runner in self._runners:
+            await runner.cleanup()
+        self._runners = []
+
+    async def _produce_blocks(self) -> None:
+        """Produce blocks on schedule and push NewBlock events to subscribers."""
+        next_block = time.monotonic() + self.chain.block_time
+        while True:
+            await asyncio.sleep(max(0.0, next_block - time.monotonic()))
+            next_block += self.chain.block_time
+            if self.chain.stalled:
+                continue
+
+            self.chain.produce_block()
+            if self._subscribers:
+                await self._publish(self.chain.node_height)
+                for tx_hash in self.chain.included:
+                    await self._publish_tx(tx_hash)
+
+    async def _publish(self, height: int) -> None:
+        """Send the event for a new block to every websocket subscriber."""
+        for ws, request_id, query in list(self._subscribers):
+            if "'Tx'" in query:
+                continue
+            event_type = "NewBlockHeader" if "NewBlockHeader" in query else "NewBlock"
+            if event_type == "NewBlock":
+                value = {'block': self._render_block(height)['block'], 'result_finalize_block': {}}
+            else:
+                value = {'header': self._render_header(height)}
+            message = {
+                'jsonrpc': "2.0",
+                'id': request_id,
+                'result': {
+                    'query': query,
+                    'data': {'type': f"tendermint/event/{event_type}", 'value': value},
+                    'events': {'tm.event': [event_type], 'block.height': [str(height)]},
+                },
+            }
+            try:
+                await ws.send_str(json.dumps(message))
+            except (ConnectionError, RuntimeError):
+                self._subscribers.remove((ws, request_id, query))
+
+    async def _publish_tx(self, tx_hash: str) -> None:
+        """Send the event of an included transaction to the subscribers of Tx events that match it."""
+        included = self.chain.txs[tx_hash]
+        for ws, request_id, query in list(self._subscribers):
+            if "'Tx'" not in query or ("tx.hash" in query and tx_hash not in query.upper()):
+                continue
+            message = {
+                'jsonrpc': "2.0",
+                'id': request_id,
+                'result': {
+                    'query': query,
+                    'data': {'type': "tendermint/event/Tx", 'value': {'TxResult': {
+                        'height': str(included['height']), 'index': included['index'],
+                        'tx': included['tx'], 'result': included['result']}}},
+                    'events': {'tm.event': ["Tx"], 'tx.hash': [tx_hash], 'tx.height': [str(included['height'])]},
+                },
+            }
+            try:
+                await ws.send_str(json.dumps(message))
+            except (ConnectionError, RuntimeError):
+                self._subscribers.remove((ws, request_id, query))
+
+    @web.middleware
+    async def _inject_faults(self, request: web.Request, handler: Any) -> web.StreamResponse:
+        """Delay responses and fail a share of them, as configured."""
+        if request.path.startswith("/sim/") or request.path == "/websocket":
+            return await handler(request)
+
+        delay = self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            return web.json_response({'code': 13, 'message': "simulated failure"}, status=503)
+        return await handler(request)
+
+    async def _control(self, request: web.Request) -> web.Response:
+        """Change the scenario at runtime, e.g. POST /sim/stall?seconds=120."""
+        action = request.match_info['action']
+        query = request.query
+        chain = self.chain
+
+        if action == "stall":
+            chain.stall(float(query.get('seconds', 3600)))
+        elif action == "resume":
+            chain.stalled_until = 0.0
+        elif action == "lag":
+            chain.lag = int(query.get('blocks', 0))
+        elif action == "offline":
+            chain.offline = query.get('value', "true") != "false"
+        elif action == "jail":
+            chain.jail()
+            chain.local['jailed_until'] = time.time() + float(query.get('seconds', chain.downtime_jail_duration))
+        elif action == "unjail":
+            if not chain.unjail():
+                return web.json_response({'error': "validator is not jailed or still in its jail period"}, status=400)
+        elif action == "latency":
+            self.latency_ms = float(query.get('ms', 0))
+            self.jitter_ms = float(query.get('jitter_ms', self.jitter_ms))
+        elif action == "errors":
+            self.error_rate = float(query.get('rate', 0))
+        elif action != "state":
+            return web.json_response({'error': f"unknown action {action}"}, status=404)
+
+        return web.json_response({
+            'height': chain.height,
+            'node_height': chain.node_height,
+            'stalled': chain.stalled,
+            'lag': chain.lag,
+            'offline': chain.offline,
+            'jailed': chain.local['jailed'],
+            'missed_in_window': chain.missed_in_window(),
+            'latency_ms': self.latency_ms,
+            'error_rate': self.error_rate,
+        })
+
+    # CometBFT RPC
+
+    async def _rpc_get(self, request: web.Request) -> web.Response:
+        """Serve a CometBFT RPC route over GET."""
+        params = {key: value.strip('"') for key, value in request.query.items()}
+        return self._rpc_response(-1, request.match_info['route'], params)
+
+    async def _json_rpc(self, request: web.Request) -> web.Response:
+        """Serve CometBFT RPC routes over JSON-RPC POST, a single call or a batch of them."""
+        try:
+            body = await request.json()
+        except ValueError:
+            return _rpc_envelope(-1, 'error', _dump({'code': -32700, 'message': "Parse error", 'data': ""}), status=500)
+        if not isinstance(body, list):
+            return self._rpc_call(body)
+
+        # Like CometBFT, a batch of one is answered with a single response and an empty batch with nothing
+        responses = [self._rpc_call(call) for call in body]
+        if len(responses) == 1:
+            return responses[0]
+        if not responses:
+            return web.Response()
+        items = ",\n".join("  " + response.text.replace("\n", "\n  ") for response in responses)
+        return web.Response(text=f"[\n{items}\n]", content_type="application/json")
+
+    def _rpc_call(self, call: Any) -> web.Response:
+        """Answer one JSON-RPC call of a POST body."""
+        if not isinstance(call, dict):
+            return _rpc_envelope(-1, 'error', _dump({'code': -32600, 'message': "Invalid Request", 'data': ""}))
+        if not isinstance(call.get('params') or {}, dict):
+            return _rpc_envelope(call.get('id', -1), 'error', _dump({
+                'code': -32602, 'message': "Invalid params", 'data': "only named params are supported",
+            }))
+        params = {key: str(value) for key, value in (call.get('params') or {}).items()}
+        return self._rpc_response(call.get('id', -1), call.get('method', ""), params, uri=False)
+
+    def _rpc_response(self, request_id: Any, route: str, params: Dict[str, str], uri: bool = True) -> web.Response:
+        """
+        Dispatch an RPC route and wrap the result in a JSON-RPC envelope.
+
+        Like CometBFT, errors of a known route, such as a height above the tip, are
+        answered with HTTP 200 and an error body, and an unknown route over GET is a 404.
+        """
+        handlers = {
+            'health': lambda: {},
+            'status': self._render_status,
+            'net_info': self._render_net_info,
+            'block': lambda: _render_block_json(self, self._height_param(params)),
+            'commit': lambda: self._render_commit(self._height_param(params)),
+            'validators': lambda: self._render_validators(self._height_param(params), params),
+            'broadcast_tx_sync': lambda: self.chain.check_tx(base64.b64decode(params.get('tx', ""))),
+            'tx': lambda: self._render_tx(params.get('hash', "")),
+        }
+        if route not in handlers:
+            if uri:
+                return web.Response(text="404 page not found\n", status=404)
+            return _rpc_envelope(request_id, 'error', _dump({'code': -32601, 'message': "Method not found", 'data': route}))
+
+        try:
+            result = handlers[route]()
+        except ValueError as e:
+            return _rpc_envelope(request_id, 'error', _dump({'code': -32603, 'message': "Internal error", 'data': str(e)}))
+        # Blocks and commits come pre-rendered
+        return _rpc_envelope(request_id, 'result', result if isinstance(result, str) else _dump(result))
+
+    def _height_param(self, params: Dict[str, str]) -> int:
+        """Resolve the height argument of a route, 0 or missing meaning the latest block."""
+        height = int(params.get('height') or 0) or self.chain.node_height
+        if height > self.chain.node_height:
+            raise ValueError(f"height {height} must be less than or equal to the current blockchain height {self.chain.node_height}")
+        if height < self.chain.earliest_height:
+            raise ValueError(f"height {height} is not available, lowest height is {self.chain.earliest_height}")
+        return height
+
+    def _render_status(self) -> Dict[str, Any]:
+        chain = self.chain
+        height = chain.node_height
+        local = chain.local
+        return {
+            'node_info': {
+                'id': hashlib.sha256(b"node").hexdigest()[:40],
+                'listen_addr': "tcp://0.0.0.0:26656",
+                'network': chain.chain_id,
+                'version': "0.38.0-sim",
+                'moniker': local['moniker'],
+            },
+            'sync_info': {
+                'latest_block_hash': chain.block_hash(height),
+                'latest_block_height': str(height),
+                'latest_block_time': _rfc3339(chain.block_time_at(height)),
+                'earliest_block_height': str(chain.earliest_height),
+                'earliest_block_time': _rfc3339(chain.block_time_at(chain.earliest_height)),
+                'catching_up': chain.lag > chain.catching_up_lag,
+            },
+            'validator_info': {
+                'address': local['address'],
+                'pub_key': {'type': "tendermint/PubKeyEd25519", 'value': local['pub_key']},
+                'voting_power': "0" if local['jailed'] else str(local['power']),
+            },
+        }
+
+    def _render_tx(self, tx_hash: str) -> Dict[str, Any]:
+        tx_hash = tx_hash.upper().removeprefix("0X")
+        included = self.chain.txs.get(tx_hash)
+        if included is None:
+            raise ValueError(f"tx ({tx_hash}) not found")
+        return {'hash': tx_hash, 'height': str(included['height']), 'index': included['index'],
+                'tx_result': included['result'], 'tx': included['tx']}
+
+    def _render_net_info(self) -> Dict[str, Any]:
+        peers = [{
+            'node_info': {'id': hashlib.sha256(f"peer/{i}".encode()).hexdigest()[:40], 'moniker': f"peer-{i}",
+                          'network': self.chain.chain_id},
+            'is_outbound': i % 3 == 0,
+            'remote_ip': f"10.0.{i // 250}.{i % 250 + 1}",
+        } for i in range(min(40, len(self.chain.validators)))]
+        return {'listening': True, 'listeners': ["Listener(@)"], 'n_peers': str(len(peers)), 'peers': peers}
+
+    def _render_header(self, height: int) -> Dict[str, Any]:
+        chain = self.chain
+        validators = chain.validators
+        return {
+            'chain_id': chain.chain_id,
+            'height': str(height),
+            'time': _rfc3339(chain.block_time_at(height)),
+            'last_block_id': {'hash': chain.block_hash(height - 1) if height > 1 else ""},
+            'validators_hash': hashlib.sha256("".join(v['address'] for v in chain.active_validators()).encode()).hexdigest().upper(),
+            'proposer_address': validators[height % len(validators)]['address'],
+        }
+
+    def _render_block(self, height: int) -> Dict[str, Any]:
+        return json.loads(_render_block_json(self, height))
+
+    def _render_last_commit(self, height: int) -> Dict[str, Any]:
+        """Render the commit for a height, as included in the next block or returned by /commit."""
+        chain = self.chain
+        timestamp = _rfc3339(chain.block_time_at(height) + 1)
+        signatures = []
+        for validator, signed in zip(chain.validators, chain.signed(height)):
+            if signed:
+                signatures.append({
+                    'block_id_flag': BLOCK_ID_FLAG_COMMIT,
+                    'validator_address': validator['address'],
+                    'timestamp': timestamp,
+                    'signature': base64.b64encode(hashlib.sha256(f"{validator['index']}/{height}".encode()).digest() * 2).decode(),
+                })
+            else:
+                signatures.append({'block_id_flag': BLOCK_ID_FLAG_ABSENT, 'validator_address': "",
+                                   'timestamp': "0001-01-01T00:00:00Z", 'signature': None})
+        return {
+            'height': str(height),
+            'round': 0,
+            'block_id': {'hash': chain.block_hash(height), 'parts': {'total': 1, 'hash': chain.block_hash(height)}},
+            'signatures': signatures,
+        }
+
+    def _render_commit(self, height: int) -> str:
+        """Render /commit, the tip's commit only becomes canonical once the next block includes it."""
+        signed_header = _render_signed_header_json(self, height).replace("\n", "\n  ")
+        canonical = json.dumps(height < self.chain.node_height)
+        return f'{{\n  "signed_header": {signed_header},\n  "canonical": {canonical}\n}}'
+
+    def _render_validators(self, height: int, params: Dict[str, str]) -> Dict[str, Any]:
+        validators = self.chain.active_validators()
+        per_page = min(100, max(1, int(params.get('per_page') or 30)))
+        page = max(1, int(params.get('page') or 1))
+        selected = validators[(page - 1) * per_page:page * per_page]
+        return {
+            'block_height': str(height),
+            'validators': [{
+                'address': v['address'],
+                'pub_key': {'type': "tendermint/PubKeyEd25519", 'value': v['pub_key']},
+                'voting_power': str(v['power']),
+                'proposer_priority': "0",
+            } for v in selected],
+            'count': str(len(selected)),
+            'total': str(len(validators)),
+        }
+
+    # Websocket
+
+    async def _websocket(self, request: web.Request) -> web.WebSocketResponse:
+        """Serve JSON-RPC subscriptions to NewBlock and NewBlockHeader events."""
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+
+        async for message in ws:
+            if message.type != WSMsgType.TEXT:
+                continue
+            try:
+                call = json.loads(message.data)
+            except ValueError:
+                continue
+
+            method = call.get('method')
+            query = (call.get('params') or {}).get('query', "")
+            if method == "subscribe":
+                self._subscribers.append((ws, call.get('id'), query))
+            elif method in ("unsubscribe", "unsubscribe_all"):
+                self._subscribers = [s for s in self._subscribers if s[0] is not ws]
+            await ws.send_str(json.dumps({'jsonrpc': "2.0", 'id': call.get('id'), 'result': {}}))
+
+        self._subscribers = [s for s in self._subscribers if s[0] is not ws]
+        return ws
+
+    # REST
+
+    async def _rest_syncing(self, request: web.Request) -> web.Response:
+        return web.json_response({'syncing': self.chain.lag > self.chain.catching_up_lag})
+
+    async def _rest_block(self, request: web.Request) -> web.Response:
+        height = request.match_info['height']
+        try:
+            block = self._render_block(self._height_param({'height': "0" if height == "latest" else height}))
+        except ValueError as e:
+            return _rest_error(str(e))
+        return web.json_response({'block_id': block['block_id'], 'block': block['block']})
+
+    async def _rest_slashing_params(self, request: web.Request) -> web.Response:
+        chain = self.chain
+        return web.json_response({'params': {
+            'signed_blocks_window': str(chain.signed_blocks_window),
+            'min_signed_per_window': f"{chain.min_signed_per_window:.18f}",
+            'downtime_jail_duration': f"{chain.downtime_jail_duration:.0f}s",
+            'slash_fraction_double_sign': "0.050000000000000000",
+            'slash_fraction_downtime': "0.000100000000000000",
+        }})
+
+    async def _rest_signing_infos(self, request: web.Request) -> web.Response:
+        offset, limit = _pagination(request)
+        validators = self.chain.validators
+        infos = [self._signing_info(v) for v in validators[offset:offset + limit]]
+        next_key = base64.b64encode(str(offset + limit).encode()).decode() if offset + limit < len(validators) else None
+        return web.json_response({'info': infos, 'pagination': {'next_key': next_key, 'total': str(len(validators))}})
+
+    async def _rest_signing_info(self, request: web.Request) -> web.Response:
+        address = request.match_info['address']
+        validator = next((v for v in self.chain.validators if v['consensus_address'] == address), None)
+        if validator is None:
+            return _rest_error(f"SigningInfo not found for validator {address}", code=5, status=404)
+        return web.json_response({'val_signing_info': self._signing_info(validator)})
+
+    def _signing_info(self, validator: Dict[str, Any]) -> Dict[str, Any]:
+        """Render a validator's slashing signing info."""
+        chain = self.chain
+        if validator is chain.local:
+            missed = chain.missed_in_window()
+        else:
+            # Expected misses of a validator that fails to sign at the miss rate
+            missed = int(chain.signed_blocks_window * chain.miss_rate)
+        return {
+            'address': validator['consensus_address'],
+            'start_height': str(validator['start_height']),
+            'index_offset': str(max(0, chain.height - validator['start_height'])),
+            'jailed_until': _rfc3339(validator['jailed_until']),
+            'tombstoned': False,
+            'missed_blocks_counter': str(missed),
+        }
+
+    async def _rest_account(self, request: web.Request) -> web.Response:
+        account = self.chain.account
+        if request.match_info['address'] != account['address']:
+            return _rest_error(f"account {request.match_info['address']} not found", code=5, status=404)
+        return web.json_response({'account': {
+            '@type': "/cosmos.auth.v1beta1.BaseAccount",
+            'address': account['address'],
+            'pub_key': None,
+            'account_number': str(account['account_number']),
+            'sequence': str(account['sequence']),
+        }})
+
+    async def _rest_staking_params(self, request: web.Request) -> web.Response:
+        return web.json_response({'params': {
+            'unbonding_time': "1814400s",
+            'max_validators': len(self.chain.validators),
+            'max_entries': 7,
+            'historical_entries': 10000,
+            'bond_denom': "stake",
+            'min_commission_rate': "0.000000000000000000",
+        }})
+
+    async def _rest_validators(self, request: web.Request) -> web.Response:
+        offset, limit = _pagination(request)
+        status = request.query.get('status', "")
+        validators = [v for v in self.chain.validators if not status or _bond_status(v) == status]
+        selected = validators[offset:offset + limit]
+        next_key = base64.b64encode(str(offset + limit).encode()).decode() if offset + limit < len(validators) else None
+        return web.json_response({
+            'validators': [_render_staking_validator(v) for v in selected],
+            'pagination': {'next_key': next_key, 'total': str(len(validators))},
+        })
+
+    async def _rest_validator(self, request: web.Request) -> web.Response:
+        address = request.match_info['address']
+        validator = next((v for v in self.chain.validators if v['operator_address'] == address), None)
+        if validator is None:
+            return _rest_error(f"validator {address} not found", code=5, status=404)
+        return web.json_response({'validator': _render_staking_validator(validator)})
+
+@lru_cache(maxsize=128)
+def _render_block_json(node: SimulatedNode, height: int) -> str:
+    """Render a block once, signing thousands of validators is the expensive part."""
+    chain = node.chain
+    last_commit = node._render_last_commit(height - 1) if height > chain.earliest_height else {
+        'height': "0", 'round': 0, 'block_id': {'hash': ""}, 'signatures': []
+    }
+    return _dump({
+        'block_id': {'hash': chain.block_hash(height), 'parts': {'total': 1, 'hash': chain.block_hash(height)}},
+        'block': {
+            'header': node._render_header(height),
+            'data': {'txs': []},
+            'evidence': {'evidence': []},
+            'last_commit': last_commit,
+        },
+    })
+
+@lru_cache(maxsize=128)
+def _render_signed_header_json(node: SimulatedNode, height: int) -> str:
+    """Render the signed header of a block once."""
+    return _dump({'header': node._render_header(height), 'commit': node._render_last_commit(height)})
+
+def _render_staking_validator(validator: Dict[str, Any]) -> Dict[str, Any]:
+    """Render a validator as returned by the staking module."""
+    tokens = str(validator['power'] * 1_000_000)
+    return {
+        'operator_address': validator['operator_address'],
+        'consensus_pubkey': {'@type': "/cosmos.crypto.ed25519.PubKey", 'key': validator['pub_key']},
+        'jailed': validator['jailed'],
+        'status': _bond_status(validator),
+        'tokens': tokens,
+        'delegator_shares': f"{tokens}.000000000000000000",
+        'description': {'moniker': validator['moniker'], 'identity': "", 'website': "", 'details': ""},
+        'unbonding_height': "0",
+        'commission': {'commission_rates': {'rate': "0.050000000000000000", 'max_rate': "0.200000000000000000",
+                                            'max_change_rate': "0.010000000000000000"}},
+        'min_self_delegation': "1",
+    }
+
+def _bond_status(validator: Dict[str, Any]) -> str:
+    """Get a validator's bond status."""
+    return "BOND_STATUS_UNBONDING" if validator['jailed'] else "BOND_STATUS_BONDED"
+
+def _pagination(request: web.Request) -> Tuple[int, int]:
+    """Parse Cosmos SDK pagination query parameters as (offset, limit)."""
+    limit = int(request.query.get('pagination.limit', 100))
+    if request.query.get('pagination.key'):
+        return int(base64.b64decode(request.query['pagination.key'])), limit
+    return int(request.query.get('pagination.offset', 0)), limit
+
+def _tx_field(tx: bytes, *path: Any) -> Any:
+    """Read a field of a transaction in JSON form, None if it is not JSON or lacks the field."""
+    try:
+        value = json.loads(tx)
+        for key in path:
+            value = value[key]
+        return value
+    except (ValueError, KeyError, IndexError, TypeError):
+        return None
+
+def _rest_error(message: str, code: int = 3, status: int = 400) -> web.Response:
+    """Render a gRPC gateway error."""
+    return web.json_response({'code': code, 'message': message, 'details': []}, status=status)
+
+def _rfc3339(timestamp: float) -> str:
+    """Format a unix time like CometBFT, with nanosecond precision."""
+    moment = datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc)
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{moment.microsecond:06d}000Z"
+
+def _dump(data: Dict[str, Any]) -> str:
+    """Serialize with two-space indentation, as CometBFT's RPC server does."""
+    return json.dumps(data, indent=2)
+
+def _rpc_envelope(request_id: Any, field: str, rendered: str, status: int = 200) -> web.Response:
+    """Wrap a rendered result or error in a JSON-RPC response, indented like CometBFT's."""
+    nested = rendered.replace("\n", "\n  ")
+    text = f'{{\n  "jsonrpc": "2.0",\n  "id": {json.dumps(request_id)},\n  "{field}": {nested}\n}}'
+    return web.Response(text=text, status=status, content_type="application/json")
+
+def bech32_encode(hrp: str, data: bytes) -> str:
+    """
+    Encode bytes as a bech32 address.
+
+    Args:
+        hrp: Human readable prefix, e.g. cosmosvaloper
+        data: Address bytes
+
+    Returns:
+        Bech32 address
+    """
+    # Regroup 8-bit bytes into 5-bit words
+    words, acc, bits = [], 0, 0
+    for byte in data:
+        acc = (acc << 8) | byte
+        bits += 8
+        while bits >= 5:
+            bits -= 5
+            words.append((acc >> bits) & 31)
+    if bits:
+        words.append((acc << (5 - bits)) & 31)
+
+    values = [ord(c) >> 5 for c in hrp] + [0] + [ord(c) & 31 for c in hrp] + words + [0] * 6
+    polymod = _bech32_polymod(values) ^ 1
+    checksum = [(polymod >> 5 * (5 - i)) & 31 for i in range(6)]
+    return hrp + "1" + "".join(BECH32_CHARSET[w] for w in words + checksum)
+
+def _bech32_polymod(values: List[int]) -> int:
+    """Compute the bech32 checksum polynomial."""
+    generator = [0x3b6a57b2, 0x26508e6d, 0x1ea119fa, 0x3d4233dd, 0x2a1462b3]
+    chk = 1
+    for value in values:
+        top = chk >> 25
+        chk = (chk & 0x1ffffff) << 5 ^ value
+        for i in range(5):
+            chk ^= generator[i] if ((top >> i) & 1) else 0
+    return chk
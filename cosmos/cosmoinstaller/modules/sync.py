@@ -9,13 +9,13 @@ import re
 import shutil
 import tempfile
 import json
-import requests
 from typing import Dict, Any, Optional, Tuple
 
 from .utils import (
     print_header, print_step, print_success, print_warning, print_error,
     run_command, ensure_pv_installed
 )
+from .httpclient import get_client
 
 class NodeSync:
     """Class for synchronizing a Cosmos-based blockchain node."""
@@ -157,24 +157,21 @@ class NodeSync:
         try:
             # First try using direct HTTP request for better reliability
             print_step(f"Fetching latest block height from {self.statesync_rpc}")
-            response = requests.get(f"{self.statesync_rpc}/block")
-            if response.status_code == 200:
-                data = response.json()
-                latest_height = int(data['result']['block']['header']['height'])
-                print_success(f"Latest block height: {latest_height}")
-                
-                # Calculate trust height (latest height - 2000)
-                trust_height = latest_height - 2000
-                print_step(f"Using trust height: {trust_height}")
-                
-                # Get trust hash
-                print_step(f"Fetching trust hash for height {trust_height}")
-                response = requests.get(f"{self.statesync_rpc}/block?height={trust_height}")
-                if response.status_code == 200:
-                    data = response.json()
-                    trust_hash = data['result']['block_id']['hash']
-                    print_success(f"Trust hash: {trust_hash}")
-                    return trust_height, trust_hash
+            client = get_client()
+            data = client.get_json(f"{self.statesync_rpc}/block", ttl=0)
+            latest_height = int(data['result']['block']['header']['height'])
+            print_success(f"Latest block height: {latest_height}")
+            
+            # Calculate trust height (latest height - 2000)
+            trust_height = latest_height - 2000
+            print_step(f"Using trust height: {trust_height}")
+            
+            # Get trust hash
+            print_step(f"Fetching trust hash for height {trust_height}")
+            data = client.get_json(f"{self.statesync_rpc}/block?height={trust_height}")
+            trust_hash = data['result']['block_id']['hash']
+            print_success(f"Trust hash: {trust_hash}")
+            return trust_height, trust_hash
         except Exception as e:
             print_warning(f"Error using direct HTTP request: {e}")
             print_step("Falling back to curl command")
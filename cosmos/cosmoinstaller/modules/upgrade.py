@@ -0,0 +1,302 @@
+"""
+Cosmos Node Installer - Upgrade Module
+
+This module watches the chain for pending software upgrades and pre-stages
+the upgrade binary in the Cosmovisor directory ahead of the upgrade height.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import datetime
+import requests
+from collections import deque
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+from .utils import (
+    print_header, print_step, print_success, print_warning, print_error
+)
+from .binary import BinaryProvisioner, extract_binary, smoke_test_binary, platform_key
+from .httpclient import get_client
+
+class UpgradeWatcher:
+    """Class for pre-staging Cosmovisor upgrade binaries before the upgrade height."""
+
+    def __init__(self, config: Dict[str, Any]):
+        """
+        Initialize the upgrade watcher with configuration.
+
+        Args:
+            config: Dictionary containing node configuration
+        """
+        # Node configuration
+        self.binary_name = config.get('binary_name', "")
+        self.node_home = config.get('node_home', "")
+        self.rpc_port = config.get('rpc_port', 26657)
+        self.api_port = config.get('api_port', 1317)
+
+        # Upgrade configuration
+        self.upgrade_rpc = config.get('upgrade_rpc', "") or f"http://localhost:{self.rpc_port}"
+        self.upgrade_api = config.get('upgrade_api', "") or f"http://localhost:{self.api_port}"
+        self.prestage_hours = float(config.get('upgrade_prestage_hours', 24))
+        self.poll_interval = int(config.get('upgrade_poll_interval', 300))
+        self.block_window = int(config.get('upgrade_block_window', 1000))
+        self.build_repo = config.get('upgrade_build_repo', "")
+        # Stage plan binaries whose URL has no checksum
+        self.allow_unverified = bool(config.get('upgrade_allow_unverified', False))
+
+        # Block-time moving average samples as (height, unix_time)
+        self._samples = deque(maxlen=max(2, self.block_window))
+
+        # Source builds share the installer's build cache
+        self.binary_provisioner = BinaryProvisioner({**config, 'binary_repo': self.build_repo or config.get('binary_repo', "")})
+
+    def watch(self) -> None:
+        """Poll for a pending upgrade plan and pre-stage its binary until interrupted."""
+        print_header("Watching for Pending Upgrades")
+
+        if not self.binary_name or not self.node_home:
+            print_error("Binary name or node home not set, please configure the node first")
+            return
+
+        print_step(f"Polling {self.upgrade_api} every {self.poll_interval}s, pre-staging {self.prestage_hours}h ahead")
+        print("\nPress Ctrl+C to stop watching\n")
+
+        try:
+            while True:
+                try:
+                    self.check_once()
+                except Exception as e:
+                    print_warning(f"Upgrade check failed: {e}")
+                time.sleep(self.poll_interval)
+        except KeyboardInterrupt:
+            print("\nStopped watching for upgrades")
+
+    def check_once(self) -> bool:
+        """
+        Run a single watch cycle.
+
+        Returns:
+            True if an upgrade binary is staged for the pending plan
+        """
+        plan = self.get_pending_plan()
+        if not plan:
+            print_step("No pending upgrade plan")
+            return False
+
+        name = plan['name']
+        height = int(plan['height'])
+
+        if self.is_staged(name):
+            print_success(f"Upgrade {name} at height {height} is already staged")
+            return True
+
+        current_height, block_time = self.estimate_block_time()
+        eta_seconds = max(0, height - current_height) * block_time
+        eta = datetime.datetime.now() + datetime.timedelta(seconds=eta_seconds)
+        print_step(
+            f"Upgrade {name} at height {height}: {height - current_height} blocks to go, "
+            f"avg block time {block_time:.2f}s, ETA {eta.strftime('%Y-%m-%d %H:%M:%S')}"
+        )
+
+        if eta_seconds > self.prestage_hours * 3600:
+            print_step(f"Upgrade is more than {self.prestage_hours}h away, not staging yet")
+            return False
+
+        return self.stage_upgrade(plan)
+
+    def get_pending_plan(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the pending upgrade plan from the node's REST API.
+
+        Returns:
+            Upgrade plan dictionary, or None if no upgrade is scheduled
+        """
+        return get_client().get_json(f"{self.upgrade_api}/cosmos/upgrade/v1beta1/current_plan").get('plan')
+
+    def estimate_block_time(self) -> Tuple[int, float]:
+        """
+        Estimate the average block time over the configured block window.
+
+        The window is seeded from block headers on the first call and then
+        extended with every poll, so the average tracks recent chain speed.
+
+        Returns:
+            Tuple of (latest_height, average_block_time_seconds)
+        """
+        sync_info = get_client().get_json(f"{self.upgrade_rpc}/status")['result']['sync_info']
+        latest_height = int(sync_info['latest_block_height'])
+        latest_time = _parse_block_time(sync_info['latest_block_time'])
+
+        if not self._samples:
+            seed_height = max(1, latest_height - self.block_window)
+            header = get_client().get_json(f"{self.upgrade_rpc}/block?height={seed_height}")['result']['block']['header']
+            self._samples.append((seed_height, _parse_block_time(header['time'])))
+
+        if latest_height > self._samples[-1][0]:
+            self._samples.append((latest_height, latest_time))
+
+        first_height, first_time = self._samples[0]
+        last_height, last_time = self._samples[-1]
+        if last_height <= first_height:
+            return latest_height, 6.0
+
+        return latest_height, (last_time - first_time) / (last_height - first_height)
+
+    def is_staged(self, name: str) -> bool:
+        """Check if the binary for an upgrade is already staged."""
+        return os.path.isfile(self._upgrade_binary_path(name))
+
+    def stage_upgrade(self, plan: Dict[str, Any]) -> bool:
+        """
+        Download or build the binary for an upgrade plan into the Cosmovisor directory.
+
+        Args:
+            plan: Upgrade plan as returned by the upgrade module
+
+        Returns:
+            True if the binary was staged and passed the smoke test
+        """
+        name = plan['name']
+        print_header(f"Pre-staging Upgrade {name}")
+
+        binaries = self._resolve_binaries(plan.get('info', ""))
+        url = binaries.get(platform_key()) or binaries.get("any")
+
+        staging_dir = tempfile.mkdtemp()
+        try:
+            verified = bool(url) and _parse_checksum(url)[1] is not None
+            if url and (verified or self.allow_unverified):
+                staged = self._download_binary(url, staging_dir)
+            elif self.binary_provisioner.binary_repo:
+                if url:
+                    print_warning(f"Upgrade {name} binary URL has no checksum, building from source instead")
+                staged = self._build_binary(name, staging_dir)
+            elif url:
+                print_error(f"Upgrade {name} binary URL has no checksum, not staging it "
+                            f"(set upgrade.allow_unverified to stage it anyway)")
+                return False
+            else:
+                print_error(f"Upgrade {name} has no binary for {platform_key()} and no build repository is configured")
+                return False
+
+            if not staged or not smoke_test_binary(staged):
+                return False
+
+            bin_dir = os.path.dirname(self._upgrade_binary_path(name))
+            os.makedirs(bin_dir, exist_ok=True)
+            shutil.move(staged, self._upgrade_binary_path(name))
+        finally:
+            shutil.rmtree(staging_dir)
+
+        print_success(f"Upgrade {name} staged at {self._upgrade_binary_path(name)}")
+        return True
+
+    def _upgrade_binary_path(self, name: str) -> str:
+        """Get the Cosmovisor binary path for an upgrade."""
+        return f"{self.node_home}/cosmovisor/upgrades/{name}/bin/{self.binary_name}"
+
+    def _resolve_binaries(self, info: str) -> Dict[str, str]:
+        """
+        Resolve the platform to URL map from an upgrade plan's info field.
+
+        Args:
+            info: Plan info, either inline JSON or a URL to a JSON document
+
+        Returns:
+            Dictionary mapping platform keys (e.g. linux/amd64) to download URLs
+        """
+        if not info:
+            return {}
+
+        try:
+            if info.strip().startswith(("http://", "https://")):
+                response = get_client().get(info.strip(), timeout=30)
+                response.raise_for_status()
+                data = response.json()
+            else:
+                data = json.loads(info)
+        except (ValueError, requests.RequestException) as e:
+            print_warning(f"Could not parse upgrade info: {e}")
+            return {}
+
+        return data.get('binaries', {}) if isinstance(data, dict) else {}
+
+    def _download_binary(self, url: str, staging_dir: str) -> Optional[str]:
+        """
+        Download an upgrade binary and verify its checksum.
+
+        Args:
+            url: Download URL, optionally with a go-getter style ?checksum=<algo>:<hex> query
+            staging_dir: Directory to download into
+
+        Returns:
+            Path to the downloaded binary, or None on failure
+        """
+        algo, expected = _parse_checksum(url)
+        download_url = url.split("?checksum=")[0].split("&checksum=")[0]
+        filename = os.path.basename(urlparse(download_url).path) or self.binary_name
+        download_path = f"{staging_dir}/{filename}"
+
+        print_step(f"Downloading {download_url}")
+        digest = hashlib.new(algo or "sha256")
+        with get_client().get(download_url, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            with open(download_path, "wb") as f:
+                for chunk in response.iter_content(chunk_size=1 << 20):
+                    f.write(chunk)
+                    digest.update(chunk)
+
+        if expected:
+            if digest.hexdigest() != expected.lower():
+                print_error(f"Checksum mismatch for {filename}: expected {expected}, got {digest.hexdigest()}")
+                return None
+            print_success(f"Checksum verified ({algo})")
+        else:
+            print_warning(f"UNVERIFIED: no checksum in upgrade info, staging {filename} because upgrade.allow_unverified "
+                          f"is set (sha256 {digest.hexdigest()})")
+
+        return extract_binary(download_path, staging_dir, self.binary_name)
+
+    def _build_binary(self, tag: str, staging_dir: str) -> Optional[str]:
+        """
+        Build an upgrade binary from source through the shared build cache.
+
+        Args:
+            tag: Git tag to build, the upgrade name by convention
+            staging_dir: Directory to copy the built binary into
+
+        Returns:
+            Path to the built binary, or None on failure
+        """
+        cached = self.binary_provisioner.acquire(tag)
+        if not cached:
+            return None
+
+        binary_path = f"{staging_dir}/{self.binary_name}"
+        shutil.copy2(cached, binary_path)
+        return binary_path
+
+def _parse_block_time(block_time: str) -> float:
+    """Convert an RFC 3339 block time with nanosecond precision to a unix timestamp."""
+    if '.' in block_time:
+        seconds, fraction = block_time.rstrip('Z').split('.')
+        block_time = f"{seconds}.{fraction[:6]}Z"
+        fmt = "%Y-%m-%dT%H:%M:%S.%fZ"
+    else:
+        fmt = "%Y-%m-%dT%H:%M:%SZ"
+
+    return datetime.datetime.strptime(block_time, fmt).replace(tzinfo=datetime.timezone.utc).timestamp()
+
+def _parse_checksum(url: str) -> Tuple[Optional[str], Optional[str]]:
+    """Extract the (algorithm, hex digest) pair from a go-getter style checksum query."""
+    checksum = parse_qs(urlparse(url).query).get('checksum', [""])[0]
+    if ":" not in checksum:
+        return None, None
+
+    algo, expected = checksum.split(":", 1)
+    return algo, expected
@@ -127,6 +127,17 @@ def find_next_available_port(start_port: int) -> int:
         port += 1
     return port
 
+def get_total_memory() -> int:
+    """Get the total host memory in bytes."""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemTotal:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+
 def ensure_directory_exists(directory: str) -> None:
     """Ensure a directory exists, creating it if necessary."""
     os.makedirs(directory, exist_ok=True)
@@ -0,0 +1,6 @@
+"""
+Node Monitor
+
+Python monitoring tools for Cosmos SDK/CometBFT validators, run from misc/
+with `python3 -m nodemon.<tool>`.
+"""
@@ -0,0 +1,465 @@
+"""
+Node Monitor - Commit Scanner Module
+
+This module scans /commit for a range of heights with bounded concurrency over
+pooled connections and records which validators signed each height in a
+bitmap store, one bit per validator per height. The store is saved to disk
+and only heights it does not have yet are fetched, so uptime over the last
+blocks is kept current with a few requests per run.
+"""
+
+import os
+import sys
+import json
+import time
+import array
+import base64
+import asyncio
+import hashlib
+import argparse
+from typing import Dict, Any, List, Optional, Tuple
+
+import aiohttp
+
+# block_id_flag of a validator that did not vote
+BLOCK_ID_FLAG_ABSENT = 1
+
+STORE_MAGIC = b"NMCS1\n"
+
+HEATMAP_SHADES = " ░▒▓█"
+
+class SigningBitmap:
+    """
+    Which validators signed each height, stored as one bitmap per validator.
+
+    Heights are kept relative to base_height, which stays a multiple of 8 so
+    that the bitmaps can be trimmed and sliced by whole bytes. Each height
+    also has the id of the validator set it was signed by (0 while the height
+    has not been scanned), so a validator outside the set is not counted as
+    missing blocks.
+    """
+
+    def __init__(self, retain: int = 100000):
+        """
+        Initialize an empty store.
+
+        Args:
+            retain: Number of most recent heights to keep
+        """
+        self.retain = retain
+        self.base_height = 0
+        self.valset_ids = array.array('H')
+        self.valsets: List[List[str]] = [[]]
+        self.signed: Dict[str, bytearray] = {}
+        self._valset_index: Dict[Tuple[str, ...], int] = {}
+        self._masks: Dict[int, int] = {}
+
+    @property
+    def length(self) -> int:
+        return len(self.valset_ids)
+
+    @property
+    def end_height(self) -> int:
+        """First height after the stored range."""
+        return self.base_height + self.length
+
+    def has(self, height: int) -> bool:
+        offset = height - self.base_height
+        return 0 <= offset < self.length and self.valset_ids[offset] != 0
+
+    def missing(self, start: int, end: int) -> List[int]:
+        """Heights in [start, end] that have not been scanned."""
+        start = max(start, end - self.retain + 1)
+        return [height for height in range(start, end + 1) if not self.has(height)]
+
+    def record(self, height: int, validators: List[str], signers: List[str]) -> None:
+        """
+        Record the signers of a height.
+
+        Args:
+            height: Block height
+            validators: Addresses of the validator set, in set order
+            signers: Addresses of the validators whose signature is in the commit
+        """
+        self.reserve(height, height)
+
+        key = tuple(validators)
+        valset_id = self._valset_index.get(key)
+        if valset_id is None:
+            valset_id = len(self.valsets)
+            self.valsets.append(list(validators))
+            self._valset_index[key] = valset_id
+        offset = height - self.base_height
+        self.valset_ids[offset] = valset_id
+        self._masks.clear()
+
+        byte, bit = offset >> 3, 1 << (offset & 7)
+        for address in signers:
+            column = self.signed.get(address)
+            if column is None:
+                column = self.signed[address] = bytearray(len(self.valset_ids) + 7 >> 3)
+            column[byte] |= bit
+
+        if self.length > self.retain:
+            self._trim()
+
+    def reserve(self, start: int, end: int) -> None:
+        """Grow the bitmaps to cover [start, end] at once, instead of height by height."""
+        if not self.length:
+            self.base_height = start - start % 8
+        if start < self.base_height:
+            self._extend_front(start)
+        if end >= self.end_height:
+            self._extend_back(end)
+
+    def uptime(self, address: str, start: int, end: int) -> Tuple[int, int]:
+        """
+        Count the blocks a validator signed while in the validator set.
+
+        Args:
+            address: Hex validator address
+            start: First height
+            end: Last height
+
+        Returns:
+            Tuple of (signed, expected) blocks in the range
+        """
+        member = 0
+        for valset_id, validators in enumerate(self.valsets):
+            if valset_id and address in validators:
+                member |= self._valset_mask(valset_id)
+
+        start = max(start, self.base_height) - self.base_height
+        end = min(end, self.end_height - 1) - self.base_height
+        if end < start:
+            return 0, 0
+        window = ((1 << (end - start + 1)) - 1) << start
+
+        signed = int.from_bytes(self.signed.get(address, b""), "little")
+        expected = member & window
+        return (signed & expected).bit_count(), expected.bit_count()
+
+    def buckets(self, address: str, start: int, end: int, count: int) -> List[Optional[float]]:
+        """Uptime of a validator in count equal ranges, None where it was not in the set."""
+        size = max(1, -(-(end - start + 1) // count))
+        result = []
+        for bucket_start in range(start, end + 1, size):
+            signed, expected = self.uptime(address, bucket_start, min(bucket_start + size - 1, end))
+            result.append(signed / expected if expected else None)
+        return result
+
+    def addresses(self) -> List[str]:
+        """Addresses of every validator seen in a stored validator set."""
+        seen = {}
+        for validators in self.valsets:
+            seen.update(dict.fromkeys(validators))
+        return list(seen)
+
+    def save(self, path: str) -> None:
+        """Write the store to a file, replacing it atomically."""
+        self._compact_valsets()
+        addresses = list(self.signed)
+        header = {
+            'base_height': self.base_height,
+            'length': self.length,
+            'retain': self.retain,
+            'valsets': self.valsets[1:],
+            'addresses': addresses,
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(STORE_MAGIC)
+            f.write(json.dumps(header, separators=(",", ":")).encode() + b"\n")
+            f.write(self.valset_ids.tobytes())
+            for address in addresses:
+                f.write(bytes(self.signed[address]))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, retain: int = 100000) -> "SigningBitmap":
+        """Read a store saved by save(), or return an empty one if the file does not exist."""
+        store = cls(retain)
+        if not os.path.exists(path):
+            return store
+
+        with open(path, "rb") as f:
+            if f.readline() != STORE_MAGIC:
+                raise ValueError(f"{path} is not a commit scanner store")
+            header = json.loads(f.readline())
+            store.base_height = header['base_height']
+            store.valset_ids.frombytes(f.read(header['length'] * store.valset_ids.itemsize))
+            store.valsets = [[]] + header['valsets']
+            store._valset_index = {tuple(v): i for i, v in enumerate(store.valsets) if i}
+            column_size = header['length'] + 7 >> 3
+            for address in header['addresses']:
+                store.signed[address] = bytearray(f.read(column_size))
+
+        if store.length > retain:
+            store._trim()
+        return store
+
+    def _valset_mask(self, valset_id: int) -> int:
+        """Bitmask of the heights signed by a validator set."""
+        mask = self._masks.get(valset_id)
+        if mask is None:
+            bits = bytearray(self.length + 7 >> 3)
+            for offset, stored_id in enumerate(self.valset_ids):
+                if stored_id == valset_id:
+                    bits[offset >> 3] |= 1 << (offset & 7)
+            mask = self._masks[valset_id] = int.from_bytes(bits, "little")
+        return mask
+
+    def _extend_back(self, height: int) -> None:
+        grow = height + 1 - self.end_height
+        self.valset_ids.extend([0] * grow)
+        size = self.length + 7 >> 3
+        for column in self.signed.values():
+            column.extend(bytes(size - len(column)))
+
+    def _extend_front(self, height: int) -> None:
+        new_base = height - height % 8
+        grow = self.base_height - new_base
+        self.valset_ids[:0] = array.array('H', [0] * grow)
+        for column in self.signed.values():
+            column[:0] = bytes(grow >> 3)
+        self.base_height = new_base
+
+    def _trim(self) -> None:
+        """Drop the oldest heights beyond the retained range."""
+        drop = (self.length - self.retain) // 8 * 8
+        if not drop:
+            return
+        del self.valset_ids[:drop]
+        for address in list(self.signed):
+            column = self.signed[address]
+            del column[:drop >> 3]
+            if not any(column):
+                del self.signed[address]
+        self.base_height += drop
+        self._masks.clear()
+
+    def _compact_valsets(self) -> None:
+        """Drop validator sets no stored height refers to any more."""
+        used = sorted(set(self.valset_ids) - {0})
+        if used == list(range(1, len(self.valsets))):
+            return
+        renumber = {old: new for new, old in enumerate(used, 1)}
+        self.valsets = [[]] + [self.valsets[old] for old in used]
+        self.valset_ids = array.array('H', (renumber.get(i, 0) for i in self.valset_ids))
+        self._valset_index = {tuple(v): i for i, v in enumerate(self.valsets) if i}
+        self._masks.clear()
+
+class CommitScanner:
+    """Fetches commits for a range of heights into a SigningBitmap."""
+
+    def __init__(self, rpc_url: str, store: SigningBitmap, concurrency: int = 16,
+                 timeout: float = 10, retries: int = 3, store_path: str = ""):
+        """
+        Initialize the scanner.
+
+        Args:
+            rpc_url: CometBFT RPC URL
+            store: Store the signers are recorded in
+            concurrency: Maximum number of requests in flight
+            timeout: Timeout of one request in seconds
+            retries: Attempts per height before it is left for the next run
+            store_path: If set, the store is saved there every 1000 heights and at the end
+        """
+        self.rpc_url = rpc_url.rstrip("/")
+        self.store = store
+        self.concurrency = concurrency
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.retries = retries
+        self.store_path = store_path
+
+        # Validator sets by validators_hash, fetched once per set
+        self._valsets: Dict[str, "asyncio.Future[List[str]]"] = {}
+
+    async def latest_height(self, session: aiohttp.ClientSession) -> int:
+        result = await self._get(session, "status")
+        return int(result['sync_info']['latest_block_height'])
+
+    async def scan(self, blocks: int, end: int = 0) -> Dict[str, Any]:
+        """
+        Scan the heights of the last blocks that are not in the store yet.
+
+        Args:
+            blocks: Number of heights to cover, ending at end
+            end: Last height, the latest height if 0
+
+        Returns:
+            Dictionary with the scanned range, the heights fetched and failed, and the time taken
+        """
+        started = time.perf_counter()
+        connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=30)
+        async with aiohttp.ClientSession(connector=connector, timeout=self.timeout) as session:
+            if not end:
+                end = await self.latest_height(session)
+            start = max(1, end - blocks + 1)
+            heights = self.store.missing(start, end)
+
+            if heights:
+                self.store.reserve(heights[0], heights[-1])
+            queue: "asyncio.Queue[int]" = asyncio.Queue()
+            for height in heights:
+                queue.put_nowait(height)
+            failed: List[int] = []
+            workers = [asyncio.create_task(self._worker(session, queue, failed))
+                       for _ in range(min(self.concurrency, len(heights)))]
+            await asyncio.gather(*workers)
+
+        if self.store_path:
+            self.store.save(self.store_path)
+        return {
+            'start': start,
+            'end': end,
+            'fetched': len(heights) - len(failed),
+            'failed': len(failed),
+            'seconds': round(time.perf_counter() - started, 2),
+        }
+
+    async def _worker(self, session: aiohttp.ClientSession, queue: "asyncio.Queue[int]", failed: List[int]) -> None:
+        while not queue.empty():
+            height = queue.get_nowait()
+            for attempt in range(self.retries):
+                try:
+                    await self._scan_height(session, height)
+                    break
+                except (aiohttp.ClientError, asyncio.TimeoutError, KeyError, ValueError) as e:
+                    if attempt == self.retries - 1:
+                        print(f"Height {height} failed: {e}", file=sys.stderr)
+                        failed.append(height)
+                    else:
+                        await asyncio.sleep(0.5 * 2 ** attempt)
+
+            if self.store_path and self.store.length and height % 1000 == 0:
+                self.store.save(self.store_path)
+
+    async def _scan_height(self, session: aiohttp.ClientSession, height: int) -> None:
+        result = await self._get(session, f"commit?height={height}")
+        header = result['signed_header']['header']
+        signatures = result['signed_header']['commit']['signatures']
+        validators = await self._validator_set(session, header.get('validators_hash', ""), height)
+        signers = [s['validator_address'] for s in signatures
+                   if s['block_id_flag'] != BLOCK_ID_FLAG_ABSENT and s['validator_address']]
+        self.store.record(height, validators, signers)
+
+    async def _validator_set(self, session: aiohttp.ClientSession, validators_hash: str, height: int) -> List[str]:
+        """Get the validator set of a height, fetching each distinct set only once."""
+        key = validators_hash or f"height/{height}"
+        future = self._valsets.get(key)
+        if future is None:
+            future = self._valsets[key] = asyncio.get_running_loop().create_future()
+            try:
+                future.set_result(await self._fetch_validators(session, height))
+            except BaseException as e:
+                del self._valsets[key]
+                future.set_exception(e)
+                # Nobody else may be waiting, so don't leave the exception unretrieved
+                future.exception()
+                raise
+        return await asyncio.shield(future)
+
+    async def _fetch_validators(self, session: aiohttp.ClientSession, height: int) -> List[str]:
+        validators: List[str] = []
+        page = 1
+        while True:
+            result = await self._get(session, f"validators?height={height}&per_page=100&page={page}")
+            validators.extend(v['address'] for v in result['validators'])
+            if not result['validators'] or len(validators) >= int(result['total']):
+                return validators
+            page += 1
+
+    async def _get(self, session: aiohttp.ClientSession, path: str) -> Dict[str, Any]:
+        async with session.get(f"{self.rpc_url}/{path}") as response:
+            data = await response.json(content_type=None)
+        if 'error' in data:
+            raise ValueError(data['error'].get('data') or data['error'].get('message'))
+        return data['result']
+
+def fetch_monikers(api_url: str) -> Dict[str, str]:
+    """
+    Map hex consensus addresses to monikers using the staking REST API.
+
+    Args:
+        api_url: Cosmos SDK REST API URL
+
+    Returns:
+        Dictionary of hex address to moniker, empty if the API cannot be reached
+    """
+    import requests
+
+    monikers = {}
+    next_key = ""
+    try:
+        while True:
+            response = requests.get(f"{api_url.rstrip('/')}/cosmos/staking/v1beta1/validators",
+                                    params={'pagination.limit': 500, 'pagination.key': next_key}, timeout=30)
+            response.raise_for_status()
+            data = response.json()
+            for validator in data['validators']:
+                pubkey = base64.b64decode(validator['consensus_pubkey']['key'])
+                # CometBFT addresses of ed25519 keys are the first 20 bytes of their SHA256
+                address = hashlib.sha256(pubkey).hexdigest()[:40].upper()
+                monikers[address] = validator['description']['moniker']
+            next_key = (data.get('pagination') or {}).get('next_key') or ""
+            if not next_key:
+                return monikers
+    except Exception as e:
+        print(f"Could not fetch monikers: {e}", file=sys.stderr)
+        return monikers
+
+def print_heatmap(store: SigningBitmap, start: int, end: int, addresses: List[str],
+                  monikers: Dict[str, str], buckets: int) -> None:
+    """Print uptime per validator, with a heatmap of the range from oldest to newest."""
+    rows = []
+    for address in addresses:
+        signed, expected = store.uptime(address, start, end)
+        if expected:
+            rows.append((signed / expected, signed, expected, address))
+    rows.sort()
+
+    print(f"Heights {start}-{end}, {buckets} buckets of {max(1, -(-(end - start + 1) // buckets))} blocks "
+          f"(shades: <50% ' ', <90% '░', <99% '▒', <100% '▓', 100% '█')")
+    for ratio, signed, expected, address in rows:
+        cells = []
+        for value in store.buckets(address, start, end, buckets):
+            if value is None:
+                cells.append("·")
+            else:
+                cells.append(HEATMAP_SHADES[(value >= 0.5) + (value >= 0.9) + (value >= 0.99) + (value >= 1.0)])
+        name = monikers.get(address, address[:12])[:20]
+        print(f"{name:<20} {ratio:>8.2%} {expected - signed:>6} missed  {''.join(cells)}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan /commit into a signing bitmap and print validator uptime")
+    parser.add_argument("--rpc", default="http://localhost:26657", help="CometBFT RPC URL")
+    parser.add_argument("--api", default="", help="REST API URL, used to show monikers")
+    parser.add_argument("--store", default="commitscan.bin", help="Store file, reused between runs")
+    parser.add_argument("--blocks", type=int, default=10000, help="Number of latest heights to scan")
+    parser.add_argument("--retain", type=int, default=100000, help="Number of heights kept in the store")
+    parser.add_argument("--concurrency", type=int, default=16, help="Maximum number of requests in flight")
+    parser.add_argument("--validator", action="append", default=[], help="Hex address to show, repeatable; all by default")
+    parser.add_argument("--buckets", type=int, default=50, help="Heatmap columns")
+    parser.add_argument("--json", action="store_true", help="Print uptime as JSON instead of the heatmap")
+    args = parser.parse_args()
+
+    store = SigningBitmap.load(args.store, args.retain)
+    scanner = CommitScanner(args.rpc, store, concurrency=args.concurrency, store_path=args.store)
+    result = asyncio.run(scanner.scan(args.blocks))
+    print(f"Fetched {result['fetched']} heights in {result['seconds']}s, {result['failed']} failed", file=sys.stderr)
+
+    addresses = [address.upper() for address in args.validator] or store.addresses()
+    if args.json:
+        uptime = {}
+        for address in addresses:
+            signed, expected = store.uptime(address, result['start'], result['end'])
+            uptime[address] = {'signed': signed, 'expected': expected}
+        print(json.dumps({'start': result['start'], 'end': result['end'], 'uptime': uptime}, indent=2))
+        return
+
+    monikers = fetch_monikers(args.api) if args.api else {}
+    print_heatmap(store, result['start'], result['end'], addresses, monikers, args.buckets)
+
+if __name__ == "__main__":
+    main()
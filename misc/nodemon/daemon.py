@@ -0,0 +1,522 @@
+"""
+Node Monitor - Daemon Module
+
+This module runs the checks of unjail.py for any number of chains and
+validators on one event loop. Targets are read from a YAML file; each one is
+checked on its own schedule with its own timeouts over a shared connection
+pool, so a slow or hung RPC only delays its own target.
+"""
+
+import os
+import sys
+import time
+import signal
+import random
+import asyncio
+import getpass
+import argparse
+import datetime
+from typing import Dict, Any, List, Optional
+
+import yaml
+import aiohttp
+
+from .notify import NotificationDispatcher, DiscordChannel, build_channels
+from .tip import TipOracles
+from .series import SeriesStore
+from .unjailtx import UnjailSender, UnjailError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "bech32", "generic"))
+from hex2val_general import consensus_address_from_hex
+
+# Applied to every target unless the target or the defaults section sets them
+DEFAULTS = {
+    'interval': 15,
+    'timeout': 5,
+    'validator': False,
+    'restart': True,
+    'auto_unjail': False,
+    'stall_factor': 3,
+    'min_stall_seconds': 30,
+    'expected_block_time': 6,
+    'restart_cooldown': 600,
+    'jail_check_interval': 60,
+    'signing_check_interval': 60,
+    'missed_alert_fraction': 0.1,
+    'missed_restart_fraction': 0.5,
+    'time_to_jail_alert': 3600,
+    'external_rpcs': [],
+    'external_rpc_kind': "cometbft",
+    'min_successful_rpcs': 1,
+    'lag_threshold': 20,
+    'trend_window': 300,
+    'lag_growth_alert': 5,
+    'peer_drop_fraction': 0.5,
+    'discord_webhook': "",
+    'fees': "",
+    'fast_unjail': True,
+    'unjail_gas': 200000,
+    'keyring_backend': "",
+    'unjail_cache': "",
+    'wallet': "",
+    'binary': "",
+    'chain_id': "",
+    'api': "",
+    'service': "",
+    'bech32_prefix': "",
+}
+
+class TargetMonitor:
+    """Checks one chain/validator target: block production, jailing and missed blocks."""
+
+    def __init__(self, target: Dict[str, Any], session: aiohttp.ClientSession, dispatcher: NotificationDispatcher,
+                 oracles: Optional[TipOracles] = None, history: Optional[SeriesStore] = None):
+        """
+        Initialize the monitor of a target.
+
+        Args:
+            target: Target configuration, with the defaults applied
+            session: Connection pool shared by all targets
+            dispatcher: Notification queue shared by all targets
+            oracles: Network tip oracles shared by all targets
+            history: Store to record the samples of every check in, for trend alerts
+        """
+        self.target = target
+        self.session = session
+        self.dispatcher = dispatcher
+        self.name = target['name']
+        # A target's own webhook replaces the default channels
+        self.channels = [DiscordChannel(target['discord_webhook'])] if target.get('discord_webhook') else None
+
+        # Target configuration
+        self.rpc_url = target['rpc'].rstrip("/")
+        self.api_url = target.get('api', "").rstrip("/")
+        self.interval = float(target.get('interval', 15))
+        self.timeout = aiohttp.ClientTimeout(total=float(target.get('timeout', 5)))
+        self.service = target.get('service', "")
+        self.is_validator = bool(target.get('validator', False))
+        self.wallet_password = target.get('wallet_password', "")
+
+        # Block production
+        self.height = 0
+        self.last_progress = time.monotonic()
+        self.recent: List[tuple] = []  # (height, block time) of the last checks
+        self.last_restart = 0.0
+
+        # Lag behind the network, from the tip agreed by the external RPCs
+        self.tip_oracle = None
+        if oracles and target.get('external_rpcs'):
+            self.tip_oracle = oracles.get(target['external_rpc_kind'], target['external_rpcs'],
+                                          min_successful=int(target['min_successful_rpcs']),
+                                          timeout=float(target.get('timeout', 5)))
+        self.lag = None
+        self.lag_alerted = False
+
+        # Samples of every check, and the trend alerts raised from them
+        self.history = history.ring(self.name) if history else None
+        self.trend_alerts: Dict[str, bool] = {}
+
+        # Validator
+        self.valcons_address = ""
+        self.window = 0
+        self.max_missed = 0
+        self.missed_samples: List[tuple] = []  # (time, missed blocks counter) over the last 10 minutes, at least the previous one
+        self.missed_alerted = False
+        self.last_jail_check = 0.0
+        self.last_signing_check = 0.0
+        self.unjail_sender = None
+        if target.get('auto_unjail') and target.get('fast_unjail') and target.get('api'):
+            self.unjail_sender = UnjailSender(
+                target['binary'], target['wallet'], target['chain_id'], target['fees'], self.rpc_url, self.api_url,
+                session, password=self.wallet_password, keyring_backend=target['keyring_backend'],
+                gas=int(target['unjail_gas']), cache_path=target['unjail_cache'])
+
+        # Restart or unjail running in the background
+        self.action: Optional[asyncio.Task] = None
+
+        # Check statistics
+        self.checks = 0
+        self.failures = 0
+        self.last_duration = 0.0
+
+    async def run(self) -> None:
+        """Check the target every interval until cancelled."""
+        if self.unjail_sender and not self.unjail_sender.prepared:
+            try:
+                await self.unjail_sender.prepare()
+            except (UnjailError, ValueError) as e:
+                self.log(f"could not prepare the unjail transaction, it will be retried when needed: {e}")
+        # Spread the first checks so that targets sharing an interval don't fire together
+        await asyncio.sleep(random.uniform(0, self.interval))
+        try:
+            while True:
+                started = time.monotonic()
+                await self.check_once()
+                await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+        finally:
+            if self.action:
+                self.action.cancel()
+
+    async def check_once(self) -> bool:
+        """
+        Run one round of checks, bounded by the interval so a round never overlaps the next.
+
+        Restarts and unjails outlast the bound, so they are started as separate tasks.
+
+        Returns:
+            True if the round completed and the node answered
+        """
+        started = time.monotonic()
+        self.checks += 1
+        try:
+            ok = await asyncio.wait_for(self._check(), timeout=max(self.interval, self.timeout.total * 4))
+            if not ok:
+                self.failures += 1
+            return ok
+        except Exception as e:
+            self.failures += 1
+            self.log(f"check failed: {type(e).__name__}: {e}")
+            return False
+        finally:
+            self.last_duration = time.monotonic() - started
+
+    async def _check(self) -> bool:
+        requested = time.monotonic()
+        try:
+            status = await self.get_json(f"{self.rpc_url}/status")
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            self.log(f"status unavailable: {type(e).__name__}: {e}")
+            status = None
+        latency = time.monotonic() - requested
+
+        if status:
+            sync_info = status['result']['sync_info']
+            self._observe(int(sync_info['latest_block_height']), sync_info['latest_block_time'])
+            if self.tip_oracle:
+                await self._check_lag()
+            if self.history is not None:
+                await self._record(status, latency)
+
+        stalled_for = time.monotonic() - self.last_progress
+        if stalled_for > self.deadline():
+            self.last_progress = time.monotonic()
+            self.start_action(self.restart(f"no new block for {stalled_for:.0f}s after height {self.height}"))
+            return status is not None
+
+        if not status or not self.is_validator:
+            return status is not None
+
+        now = time.monotonic()
+        validator_info = status['result']['validator_info']
+        if now - self.last_jail_check > float(self.target['jail_check_interval']):
+            self.last_jail_check = now
+            if int(validator_info['voting_power']) == 0:
+                self.notify(f"validator has no voting power at height {self.height}, it is jailed or out of the active set", "critical")
+                if self.target.get('auto_unjail'):
+                    self.start_action(self.unjail())
+                return True
+
+        if self.api_url and now - self.last_signing_check > float(self.target['signing_check_interval']):
+            self.last_signing_check = now
+            await self._check_missed_blocks(validator_info['address'])
+        return True
+
+    def _observe(self, height: int, block_time: str) -> None:
+        if height <= self.height:
+            return
+        self.height = height
+        self.last_progress = time.monotonic()
+        self.recent = (self.recent + [(height, _parse_block_time(block_time))])[-50:]
+
+    async def _check_lag(self) -> None:
+        tip = await self.tip_oracle.tip()
+        if tip.height is None:
+            self.log(f"network height unavailable, {tip.successful}/{len(self.tip_oracle.rpcs)} external RPCs answered")
+            return
+        self.lag = tip.height - self.height
+        lagging = self.lag > int(self.target['lag_threshold'])
+        if lagging and not self.lag_alerted:
+            self.notify(f"node is {self.lag} blocks behind the network (height {self.height}, network {tip.height})",
+                        "warning", key=f"{self.name}/lag")
+        elif self.lag_alerted and not lagging:
+            # Its own dedup key, so a recovery soon after the alert is not suppressed as a repeat of it
+            self.notify(f"node caught up with the network, {self.lag} blocks behind", "info", key=f"{self.name}/lag-recovered")
+        self.lag_alerted = lagging
+
+    async def _record(self, status: Dict[str, Any], latency: float) -> None:
+        try:
+            peers = int((await self.get_json(f"{self.rpc_url}/net_info"))['result']['n_peers'])
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, KeyError):
+            peers = None
+        self.history.append(time.time(), height=self.height, lag=self.lag, peers=peers,
+                            voting_power=int(status['result']['validator_info']['voting_power']),
+                            latency_ms=latency * 1000)
+
+        window = float(self.target['trend_window'])
+        growing = self.history.growing("lag", window, float(self.target['lag_growth_alert']))
+        self._trend_alert("lag", growing, f"lag grew from {growing['first']:.0f} to {growing['last']:.0f} blocks "
+                                          f"over the last {window / 60:.0f} min" if growing else "")
+        dropped = self.history.dropped("peers", window, float(self.target['peer_drop_fraction']))
+        self._trend_alert("peers", dropped, f"peers dropped to {dropped['last']:.0f} from {dropped['max']:.0f} "
+                                            f"in the last {window / 60:.0f} min" if dropped else "")
+
+    def _trend_alert(self, name: str, active: Any, message: str) -> None:
+        """Alert when a trend starts, and once more when it ends."""
+        if active and not self.trend_alerts.get(name):
+            self.notify(message, "warning", key=f"{self.name}/{name}-trend")
+        elif not active and self.trend_alerts.get(name):
+            self.notify(f"{name} back to normal", "info", key=f"{self.name}/{name}-trend-recovered")
+        self.trend_alerts[name] = bool(active)
+
+    def average_block_time(self) -> float:
+        if len(self.recent) < 2 or self.recent[-1][0] - self.recent[0][0] < 5:
+            return float(self.target['expected_block_time'])
+        (first_height, first_time), (last_height, last_time) = self.recent[0], self.recent[-1]
+        return max((last_time - first_time) / (last_height - first_height), 0.1)
+
+    def deadline(self) -> float:
+        return max(float(self.target['stall_factor']) * self.average_block_time(),
+                   float(self.target['min_stall_seconds']), 2 * self.interval)
+
+    async def _check_missed_blocks(self, address_hex: str) -> None:
+        if not self.valcons_address:
+            self.valcons_address = consensus_address_from_hex(address_hex, self.target['bech32_prefix'] + "valcons")
+            params = (await self.get_json(f"{self.api_url}/cosmos/slashing/v1beta1/params"))['params']
+            self.window = int(params['signed_blocks_window'])
+            # The validator is jailed once it missed more than this many blocks of the window
+            self.max_missed = self.window - round(float(params['min_signed_per_window']) * self.window)
+
+        data = await self.get_json(f"{self.api_url}/cosmos/slashing/v1beta1/signing_infos/{self.valcons_address}")
+        info = data['val_signing_info']
+        if info.get('tombstoned'):
+            return
+        missed = int(info.get('missed_blocks_counter', 0))
+
+        now = time.time()
+        # The previous sample is kept even when it is older, for a signing_check_interval above 10 minutes
+        recent = [(t, m) for t, m in self.missed_samples if now - t < 600] or self.missed_samples[-1:]
+        self.missed_samples = recent + [(now, missed)]
+        first_time, first_missed = self.missed_samples[0]
+        still_missing = missed > first_missed
+
+        # Time to jail at the miss rate of the last samples
+        time_to_jail = None
+        if still_missing:
+            time_to_jail = (self.max_missed - missed + 1) * (now - first_time) / (missed - first_missed)
+
+        status = f"missed {missed} of {self.window} blocks ({missed / self.window:.1%}), jailed after {self.max_missed}"
+        if time_to_jail is not None:
+            eta = f"{time_to_jail / 60:.0f} min" if time_to_jail >= 120 else f"{time_to_jail:.0f}s"
+            status += f", ~{eta} to jail at the current rate"
+
+        at_risk = (missed >= float(self.target['missed_alert_fraction']) * self.max_missed
+                   or (time_to_jail is not None and time_to_jail < float(self.target['time_to_jail_alert'])))
+        if at_risk and not self.missed_alerted:
+            self.notify(f"validator {status}", "warning", key=f"{self.name}/missed")
+        self.missed_alerted = at_risk
+
+        if still_missing and missed >= float(self.target['missed_restart_fraction']) * self.max_missed:
+            self.start_action(self.restart(f"validator {status}"))
+
+    def start_action(self, action: Any) -> None:
+        """Run a restart or unjail coroutine as a task, unless the previous one is still running."""
+        if self.action and not self.action.done():
+            action.close()
+            self.log("previous restart or unjail still running")
+            return
+        self.action = asyncio.create_task(action)
+        self.action.add_done_callback(self._action_done)
+
+    def _action_done(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            error = task.exception()
+            self.notify(f"restart or unjail failed: {type(error).__name__}: {error}", "critical")
+
+    async def restart(self, reason: str) -> None:
+        """Restart the target's service, at most once per cooldown."""
+        if not self.target.get('restart') or not self.service:
+            self.notify(f"{reason}, restart disabled", "critical")
+            return
+        if time.monotonic() - self.last_restart < float(self.target['restart_cooldown']):
+            self.log(f"{reason}, restarted less than {self.target['restart_cooldown']}s ago")
+            return
+
+        self.last_restart = time.monotonic()
+        code, output = await self.run_command(f"sudo systemctl restart {self.service}")
+        self.notify(f"{reason}, service restart {'attempted' if code == 0 else f'failed: {output}'}", "critical")
+
+    async def unjail(self) -> None:
+        """Send an unjail transaction with the target's binary and wallet."""
+        target = self.target
+        if not target['binary'] or not target['wallet']:
+            self.log("auto_unjail needs binary and wallet")
+            return
+        if self.unjail_sender:
+            try:
+                result = await self.unjail_sender.unjail()
+                self.notify(f"unjail transaction {result['hash']} included at height {result['height']} "
+                            f"in {result['timings']['total']:.1f}s", "info")
+                return
+            except (UnjailError, aiohttp.ClientError, asyncio.TimeoutError, KeyError, ValueError) as e:
+                self.log(f"fast unjail failed: {e}, falling back to the CLI")
+        command = (f"{target['binary']} tx slashing unjail --gas auto --fees {target['fees']} "
+                   f"--chain-id {target['chain_id']} --from {target['wallet']} -y")
+        code, output = await self.run_command(command, stdin=f"{self.wallet_password}\n")
+        self.notify(f"unjail {'sent' if code == 0 else 'failed'}: {output[-300:]}", "info" if code == 0 else "critical")
+
+    async def run_command(self, command: str, stdin: str = "") -> tuple:
+        """Run a shell command without blocking the other targets."""
+        # In its own process group, so that killing it also kills what the shell started
+        process = await asyncio.create_subprocess_shell(
+            command, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+            start_new_session=True)
+        try:
+            output, _ = await asyncio.wait_for(process.communicate(stdin.encode()), timeout=120)
+        except asyncio.TimeoutError:
+            _kill(process)
+            await process.wait()
+            return -1, "timed out"
+        except asyncio.CancelledError:
+            # Don't leave the command running when the action is cancelled or the daemon stops
+            _kill(process)
+            raise
+        return process.returncode, output.decode(errors="replace").strip()
+
+    async def get_json(self, url: str) -> Dict[str, Any]:
+        async with self.session.get(url, timeout=self.timeout) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+    def notify(self, message: str, severity: str = "warning", key: str = "") -> None:
+        """Log a message and queue it for the target's notification channels."""
+        self.log(message)
+        self.dispatcher.notify(self.name, message, severity, key=key, channels=self.channels)
+
+    def log(self, message: str) -> None:
+        print(f"{datetime.datetime.now():%Y-%m-%d %H:%M:%S} [{self.name}] {message}", flush=True)
+
+def _kill(process: asyncio.subprocess.Process) -> None:
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+def _parse_block_time(block_time: str) -> float:
+    # Block times have nanosecond precision, which strptime does not parse
+    seconds, _, fraction = block_time.rstrip("Z").partition(".")
+    parsed = datetime.datetime.strptime(seconds, "%Y-%m-%dT%H:%M:%S").replace(tzinfo=datetime.timezone.utc)
+    return parsed.timestamp() + float("0." + (fraction or "0"))
+
+def load_targets(path: str) -> List[Dict[str, Any]]:
+    """
+    Load the targets from a YAML file.
+
+    Args:
+        path: YAML file with an optional defaults section and a targets list
+
+    Returns:
+        List of target configurations with the defaults applied
+    """
+    with open(path, "r") as f:
+        config = yaml.safe_load(f) or {}
+
+    defaults = dict(DEFAULTS)
+    defaults.update(config.get('defaults') or {})
+    targets = []
+    for index, entry in enumerate(config.get('targets') or []):
+        target = dict(defaults)
+        target.update(entry)
+        if not target.get('rpc'):
+            raise ValueError(f"Target {index} has no rpc")
+        target.setdefault('name', target['rpc'])
+        targets.append(target)
+
+    names = [target['name'] for target in targets]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate target names: {', '.join(duplicates)}")
+    return targets
+
+def load_notifications(path: str) -> Dict[str, Any]:
+    """Load the notifications section of the YAML file."""
+    with open(path, "r") as f:
+        config = yaml.safe_load(f) or {}
+    return config.get('notifications') or {}
+
+def read_wallet_passwords(targets: List[Dict[str, Any]]) -> None:
+    """Read the wallet password of each auto_unjail target from its environment variable, or prompt once per wallet."""
+    prompted: Dict[str, str] = {}
+    for target in targets:
+        if not target.get('auto_unjail'):
+            continue
+        env = target.get('wallet_password_env', "")
+        if env and env in os.environ:
+            target['wallet_password'] = os.environ[env]
+            continue
+        key = f"{target['binary']}/{target['wallet']}"
+        if key not in prompted:
+            prompted[key] = getpass.getpass(f"Wallet password for {target['wallet']} ({target['name']}): ")
+        target['wallet_password'] = prompted[key]
+
+async def run_daemon(targets: List[Dict[str, Any]], once: bool = False, pool_size: int = 100, per_host: int = 4,
+                     notifications: Optional[Dict[str, Any]] = None, history_dir: str = "") -> None:
+    """
+    Monitor all targets on the running event loop.
+
+    Args:
+        targets: Target configurations
+        once: Check every target once, print a summary and return
+        pool_size: Maximum number of connections across all targets
+        per_host: Maximum number of connections to one host
+        notifications: Notification channels and dedup settings
+        history_dir: Directory to record the samples of every target in, none if empty
+    """
+    notifications = notifications or {}
+    connector = aiohttp.TCPConnector(limit=pool_size, limit_per_host=per_host, keepalive_timeout=60, ttl_dns_cache=300)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        dispatcher = NotificationDispatcher(build_channels(notifications),
+                                            dedup_window=float(notifications.get('dedup_window', 300)),
+                                            digest_interval=float(notifications.get('digest_interval', 300)))
+        await dispatcher.start(session)
+        oracles = TipOracles(session)
+        history = SeriesStore(history_dir) if history_dir else None
+        monitors = [TargetMonitor(target, session, dispatcher, oracles, history) for target in targets]
+        try:
+            if once:
+                started = time.monotonic()
+                results = await asyncio.gather(*(monitor.check_once() for monitor in monitors))
+                await asyncio.gather(*(monitor.action for monitor in monitors if monitor.action), return_exceptions=True)
+                for monitor, ok in zip(monitors, results):
+                    lag = f"lag {monitor.lag}" if monitor.lag is not None else ""
+                    print(f"{monitor.name:<24} {'ok' if ok else 'FAILED':<7} height {monitor.height:<10} {lag:<10} {monitor.last_duration * 1000:7.0f} ms")
+                print(f"{len(monitors)} targets checked in {time.monotonic() - started:.2f}s")
+                return
+
+            print(f"Monitoring {len(monitors)} targets")
+            tasks = [asyncio.create_task(monitor.run(), name=monitor.name) for monitor in monitors]
+            await asyncio.gather(*tasks)
+        finally:
+            await dispatcher.close()
+            if history:
+                history.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Monitor block production, jailing and missed blocks of many chains at once")
+    parser.add_argument("--config", default="nodemon.yaml", help="YAML file with the targets")
+    parser.add_argument("--once", action="store_true", help="Check every target once and exit")
+    parser.add_argument("--pool-size", type=int, default=100, help="Maximum number of connections across all targets")
+    parser.add_argument("--per-host", type=int, default=4, help="Maximum number of connections to one host")
+    parser.add_argument("--history", default="", help="Directory to record the samples of every target in, for trend alerts")
+    args = parser.parse_args()
+
+    targets = load_targets(args.config)
+    notifications = load_notifications(args.config)
+    read_wallet_passwords(targets)
+    try:
+        asyncio.run(run_daemon(targets, once=args.once, pool_size=args.pool_size, per_host=args.per_host,
+                               notifications=notifications, history_dir=args.history))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
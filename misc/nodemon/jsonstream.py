@@ -0,0 +1,100 @@
+"""
+Node Monitor - JSON Stream Module
+
+This module parses a JSON array while it downloads, one element at a time,
+so a large feed such as the Subsquid worker pings is never held in memory
+as a whole. Only the unparsed tail of the last chunk is buffered, and the
+elements are decoded by the C decoder of the json module.
+"""
+
+import re
+import json
+import codecs
+from typing import Dict, Any, Iterable, Iterator, Optional, Set
+
+_SEPARATOR = re.compile(r"[\s,]*")
+_WHITESPACE = re.compile(r"\s*")
+
+def iter_array(chunks: Iterable[bytes], max_item_bytes: int = 1 << 20) -> Iterator[Any]:
+    """
+    Parse the elements of a JSON array from chunks of UTF-8 bytes, yielding each as soon as it is complete.
+
+    Args:
+        chunks: Chunks of the document, such as Response.iter_content()
+        max_item_bytes: Longest element accepted, which bounds the buffer
+
+    Yields:
+        The decoded elements, in order
+
+    Raises:
+        ValueError: If the document is not an array, is truncated or has an element longer than max_item_bytes
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    position = 0
+    started = False
+
+    for chunk in chunks:
+        buffer = buffer[position:] + text_decoder.decode(chunk)
+        position = 0
+        while True:
+            if not started:
+                position = _WHITESPACE.match(buffer, position).end()
+                if position == len(buffer):
+                    break
+                if buffer[position] != "[":
+                    raise ValueError(f"Expected a JSON array, found {buffer[position:position + 20]!r}")
+                position += 1
+                started = True
+
+            position = _SEPARATOR.match(buffer, position).end()
+            if position == len(buffer):
+                break
+            if buffer[position] == "]":
+                return
+
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The element continues in the next chunk
+                if len(buffer) - position > max_item_bytes:
+                    raise ValueError(f"Array element longer than {max_item_bytes} bytes")
+                break
+            if not isinstance(item, (dict, list, str)):
+                # A number is only complete once the separator after it arrived, "1.5" may be "1.5e3"
+                delimiter = _WHITESPACE.match(buffer, end).end()
+                if delimiter == len(buffer):
+                    break
+                if buffer[delimiter] not in ",]":
+                    if "," not in buffer[end:] and "]" not in buffer[end:]:
+                        # Only part of the number arrived, such as "-4." of "-4.5"
+                        break
+                    raise ValueError(f"Unexpected {buffer[delimiter:delimiter + 20]!r} in JSON array")
+            position = end
+            yield item
+
+    raise ValueError("JSON array is truncated")
+
+def index_array(chunks: Iterable[bytes], key: str, wanted: Optional[Set[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Index the objects of a streamed JSON array by one of their fields, in one pass.
+
+    Args:
+        chunks: Chunks of the document
+        key: Field to index by, such as peer_id
+        wanted: Keep only the objects with these keys and stop reading once all were found; all objects if None
+
+    Returns:
+        Dictionary of key to object
+    """
+    index: Dict[str, Dict[str, Any]] = {}
+    for item in iter_array(chunks):
+        if not isinstance(item, dict):
+            continue
+        value = item.get(key)
+        if wanted is None or value in wanted:
+            index[value] = item
+            if wanted is not None and len(index) == len(wanted):
+                break
+    return index
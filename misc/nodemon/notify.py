@@ -0,0 +1,557 @@
+"""
+Node Monitor - Notification Module
+
+This module queues notifications and delivers them to Discord webhooks and
+Telegram chats from background tasks, so a slow or failing chat service
+never holds up a check. Each channel has its own token bucket and honours
+Retry-After on 429 responses; alerts that pile up while a channel is rate
+limited are sent as one digest, and repeats of the same alert within the
+dedup window are suppressed and summarized later.
+"""
+
+import sys
+import html
+import time
+import asyncio
+import argparse
+import datetime
+import threading
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple
+
+import aiohttp
+
+SEVERITY_COLORS = {
+    'critical': 0xE74C3C,
+    'warning': 0xF39C12,
+    'info': 0x3498DB,
+    'resolved': 0x2ECC71,
+}
+
+SEVERITY_ICONS = {
+    'critical': "🔴",
+    'warning': "🟠",
+    'info': "🔵",
+    'resolved': "🟢",
+}
+
+class Notification:
+    """One alert, with the key it is deduplicated by."""
+
+    def __init__(self, source: str, message: str, severity: str = "warning", key: str = "", title: str = ""):
+        self.source = source
+        self.message = message
+        self.severity = severity if severity in SEVERITY_COLORS else "warning"
+        self.key = key or f"{source}/{message}"
+        self.title = title or source
+        self.created = time.time()
+        # Repeats suppressed since it was sent, delivery attempts, alerts merged into it
+        self.repeats = 0
+        self.attempts = 0
+        self.merged = 1
+
+class TokenBucket:
+    """Allows rate requests per second on average, with bursts of up to burst requests."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        # Set from Retry-After or rate limit headers; nothing is sent before it
+        self.blocked_until = 0.0
+
+    def wait_time(self) -> float:
+        """Seconds until a token is available."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        return wait
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+    def block(self, seconds: float) -> None:
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+class Channel:
+    """Base class of a notification destination."""
+
+    # Defaults stay under the service's documented limits
+    rate = 0.5
+    burst = 5
+    max_batch = 10
+
+    def __init__(self, name: str, rate: Optional[float] = None, burst: Optional[int] = None):
+        self.name = name
+        self.bucket = TokenBucket(rate or self.rate, burst or self.burst)
+        self.queue: deque = deque()
+
+    def payload(self, batch: List[Notification]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def url(self) -> str:
+        raise NotImplementedError
+
+    def retry_after(self, response: aiohttp.ClientResponse, body: Dict[str, Any]) -> float:
+        """Seconds to wait before the next request, from the Retry-After header or the error body."""
+        header = response.headers.get("Retry-After")
+        if header:
+            try:
+                return float(header)
+            except ValueError:
+                pass
+        return float(body.get('retry_after') or (body.get('parameters') or {}).get('retry_after') or 1)
+
+    def note_headers(self, response: aiohttp.ClientResponse) -> None:
+        """Apply rate limit headers of a successful response."""
+
+class DiscordChannel(Channel):
+    """Discord webhook, posting alerts as embeds."""
+
+    # Discord allows 5 requests per 2 seconds per webhook and 10 embeds per message
+    rate = 2
+    burst = 4
+    max_batch = 10
+
+    def __init__(self, webhook_url: str, rate: Optional[float] = None, burst: Optional[int] = None):
+        # Name it by the webhook id, the token after it stays out of the logs
+        parts = webhook_url.rstrip("/").split("/")
+        super().__init__(f"discord:{parts[-2] if len(parts) > 4 else webhook_url}", rate, burst)
+        self.webhook_url = webhook_url
+
+    def url(self) -> str:
+        return self.webhook_url
+
+    def payload(self, batch: List[Notification]) -> Dict[str, Any]:
+        # Embeds of one message may not exceed 6000 characters in total
+        limit = min(4000, 5600 // len(batch))
+        embeds = []
+        for notification in batch:
+            description = notification.message
+            if notification.repeats:
+                description += f"\n(repeated {notification.repeats} more times)"
+            embeds.append({
+                'title': notification.title[:200],
+                'description': _truncate(description, limit - min(200, len(notification.title))),
+                'color': SEVERITY_COLORS[notification.severity],
+                'timestamp': datetime.datetime.fromtimestamp(notification.created, datetime.timezone.utc).isoformat(),
+            })
+        return {'embeds': embeds}
+
+    def note_headers(self, response: aiohttp.ClientResponse) -> None:
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            try:
+                self.bucket.block(float(response.headers.get("X-RateLimit-Reset-After", 1)))
+            except ValueError:
+                pass
+
+class TelegramChannel(Channel):
+    """Telegram bot chat, like the one configured in cosmos-ops telegram.conf."""
+
+    # Telegram allows about one message per second per chat, and 20 per minute in groups
+    rate = 0.33
+    burst = 3
+    max_batch = 30
+
+    def __init__(self, bot_token: str, chat_id: str, api_url: str = "https://api.telegram.org",
+                 rate: Optional[float] = None, burst: Optional[int] = None):
+        super().__init__(f"telegram:{chat_id}", rate, burst)
+        self.bot_token = bot_token
+        self.chat_id = chat_id
+        self.api_url = api_url.rstrip("/")
+
+    @classmethod
+    def from_conf(cls, path: str, api_url: str = "https://api.telegram.org") -> Optional["TelegramChannel"]:
+        """
+        Create the channel from a telegram.conf file of `key: value` lines.
+
+        Returns:
+            The channel, or None if the file disables notifications
+        """
+        values = {}
+        with open(path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#") and ":" in line:
+                    key, value = line.split(":", 1)
+                    values[key.strip()] = value.strip().strip("\"'")
+        if values.get('enabled', "true") != "true" or not values.get('bot_token') or not values.get('chat_id'):
+            return None
+        return cls(values['bot_token'], values['chat_id'], api_url)
+
+    def url(self) -> str:
+        return f"{self.api_url}/bot{self.bot_token}/sendMessage"
+
+    def payload(self, batch: List[Notification]) -> Dict[str, Any]:
+        # Telegram messages are limited to 4096 characters
+        limit = 3900 // len(batch) - 20
+        lines = []
+        for notification in batch:
+            title = _truncate(notification.title, 200)
+            message = notification.message
+            if notification.repeats:
+                message += f"\n(repeated {notification.repeats} more times)"
+            message = _truncate(message, max(20, limit - len(title)))
+            lines.append(f"{SEVERITY_ICONS[notification.severity]} <b>{html.escape(title)}</b>\n{html.escape(message)}")
+        return {'chat_id': self.chat_id, 'text': "\n\n".join(lines), 'parse_mode': "HTML", 'disable_web_page_preview': True}
+
+class NotificationDispatcher:
+    """
+    Delivers notifications to channels from background tasks.
+
+    notify() only queues and never waits on the network. Every channel has
+    a worker that sends when its token bucket allows; everything queued by
+    then goes out as one message, so an alert storm becomes a few digests
+    instead of hitting the rate limit.
+    """
+
+    def __init__(self, channels: List[Channel], dedup_window: float = 300, digest_interval: float = 300,
+                 max_queue: int = 1000, timeout: float = 10, max_attempts: int = 5):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            channels: Default destinations of notifications
+            dedup_window: Seconds during which repeats of an alert are suppressed
+            digest_interval: Seconds between summaries of suppressed repeats
+            max_queue: Maximum notifications queued per channel; the oldest are dropped beyond it
+            timeout: Timeout of one request in seconds
+            max_attempts: Attempts per message before it is dropped
+        """
+        self.channels = list(channels)
+        self.dedup_window = dedup_window
+        self.digest_interval = digest_interval
+        self.max_queue = max_queue
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_attempts = max_attempts
+
+        self._all_channels: Dict[str, Channel] = {channel.name: channel for channel in self.channels}
+        self._recent: Dict[str, Notification] = {}
+        self._wakeups: Dict[str, asyncio.Event] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._own_session = False
+
+        # Delivery statistics
+        self.stats = {'queued': 0, 'suppressed': 0, 'dropped': 0, 'sent_messages': 0, 'sent_notifications': 0,
+                      'rate_limited': 0, 'errors': 0}
+
+    async def start(self, session: Optional[aiohttp.ClientSession] = None) -> None:
+        """Start the channel workers, on the given session or a new one."""
+        self._own_session = session is None
+        self._session = session or aiohttp.ClientSession()
+        for channel in self._all_channels.values():
+            self._start_worker(channel)
+        self._tasks.append(asyncio.create_task(self._digest_loop()))
+
+    async def close(self, drain_timeout: float = 10) -> None:
+        """Send what is still queued, within drain_timeout, and stop."""
+        deadline = time.monotonic() + drain_timeout
+        while any(channel.queue for channel in self._all_channels.values()) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        if self._own_session and self._session:
+            await self._session.close()
+
+    async def __aenter__(self) -> "NotificationDispatcher":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    def channel(self, channel: Channel) -> Channel:
+        """Register an extra channel, or get the registered one with the same name."""
+        existing = self._all_channels.get(channel.name)
+        if existing:
+            return existing
+        self._all_channels[channel.name] = channel
+        if self._session:
+            self._start_worker(channel)
+        return channel
+
+    def notify(self, source: str, message: str, severity: str = "warning", key: str = "",
+               title: str = "", channels: Optional[List[Channel]] = None) -> bool:
+        """
+        Queue a notification without waiting for it to be sent.
+
+        Args:
+            source: What the alert is about, such as a chain or peer name
+            message: Alert text
+            severity: critical, warning, info or resolved
+            key: Deduplication key, source and message by default
+            title: Title, the source by default
+            channels: Destinations, the default channels if not given
+
+        Returns:
+            True if queued, False if suppressed as a repeat
+        """
+        notification = Notification(source, message, severity, key, title)
+        previous = self._recent.get(notification.key)
+        if previous and notification.created - previous.created < self.dedup_window:
+            previous.repeats += 1
+            self.stats['suppressed'] += 1
+            return False
+        self._recent[notification.key] = notification
+
+        for channel in channels or self.channels:
+            channel = self.channel(channel)
+            if len(channel.queue) >= self.max_queue:
+                channel.queue.popleft()
+                self.stats['dropped'] += 1
+            channel.queue.append(notification)
+            wakeup = self._wakeups.get(channel.name)
+            if wakeup:
+                wakeup.set()
+        self.stats['queued'] += 1
+        return True
+
+    def _start_worker(self, channel: Channel) -> None:
+        self._wakeups[channel.name] = asyncio.Event()
+        self._tasks.append(asyncio.create_task(self._worker(channel), name=channel.name))
+
+    async def _worker(self, channel: Channel) -> None:
+        wakeup = self._wakeups[channel.name]
+        while True:
+            if not channel.queue:
+                wakeup.clear()
+                await wakeup.wait()
+
+            wait = channel.bucket.wait_time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+
+            # Everything queued by now goes out in one message
+            batch = [channel.queue.popleft() for _ in range(min(channel.max_batch, len(channel.queue)))]
+            if len(batch) > 1:
+                batch = _as_digest(batch)
+            channel.bucket.take()
+            if await self._send(channel, batch):
+                # Repeats up to now were part of the message
+                for notification in batch:
+                    notification.repeats = 0
+            elif max(notification.attempts for notification in batch) >= self.max_attempts:
+                self.stats['dropped'] += sum(notification.merged for notification in batch)
+                print(f"Dropped {len(batch)} notifications for {channel.name} after {self.max_attempts} attempts", file=sys.stderr)
+            else:
+                # Put the batch back in front, it is retried after the wait the failure set
+                channel.queue.extendleft(reversed(batch))
+
+    async def _send(self, channel: Channel, batch: List[Notification]) -> bool:
+        for notification in batch:
+            notification.attempts += 1
+        try:
+            async with self._session.post(channel.url(), json=channel.payload(batch), timeout=self.timeout) as response:
+                if response.status == 429:
+                    body = await response.json(content_type=None) if response.content_length != 0 else {}
+                    retry_after = channel.retry_after(response, body or {})
+                    channel.bucket.block(retry_after)
+                    self.stats['rate_limited'] += 1
+                    # A rate limit is not the message's fault
+                    for notification in batch:
+                        notification.attempts -= 1
+                    return False
+                if response.status >= 400:
+                    text = await response.text()
+                    raise aiohttp.ClientResponseError(response.request_info, (), status=response.status, message=text[:200])
+                channel.note_headers(response)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            self.stats['errors'] += 1
+            channel.bucket.block(min(60, 2 ** max(notification.attempts for notification in batch)))
+            print(f"Notification to {channel.name} failed: {type(e).__name__}: {e}", file=sys.stderr)
+            return False
+
+        self.stats['sent_messages'] += 1
+        self.stats['sent_notifications'] += sum(notification.merged for notification in batch)
+        return True
+
+    async def _digest_loop(self) -> None:
+        """Summarize repeats suppressed during the last interval and forget expired alerts."""
+        while True:
+            await asyncio.sleep(self.digest_interval)
+            now = time.time()
+            repeated = [n for n in self._recent.values() if n.repeats]
+            self._recent = {key: n for key, n in self._recent.items() if now - n.created < self.dedup_window}
+            if not repeated:
+                continue
+
+            lines = [f"{n.title}: {n.message} (x{n.repeats})" for n in sorted(repeated, key=lambda n: -n.repeats)[:20]]
+            for notification in repeated:
+                notification.repeats = 0
+            digest = Notification("digest", "\n".join(lines), "info", key=f"digest/{now}",
+                                  title=f"{len(repeated)} alerts repeated in the last {self.digest_interval:.0f}s")
+            for channel in self.channels:
+                channel.queue.append(digest)
+                self._wakeups[channel.name].set()
+
+def _truncate(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:max(0, limit - 1)] + "…"
+
+def _as_digest(batch: List[Notification]) -> List[Notification]:
+    """Merge several queued alerts from the same source into one notification per source."""
+    by_source: Dict[Tuple[str, str], List[Notification]] = {}
+    for notification in batch:
+        by_source.setdefault((notification.title, notification.severity), []).append(notification)
+    if len(by_source) == len(batch):
+        return batch
+
+    merged = []
+    for (title, severity), group in by_source.items():
+        if len(group) == 1:
+            merged.append(group[0])
+            continue
+        lines = [f"• {n.message}" + (f" (x{n.repeats + 1})" if n.repeats else "") for n in group]
+        combined = Notification(group[0].source, "\n".join(lines), severity,
+                                key=group[0].key, title=f"{title} ({len(group)} alerts)")
+        combined.created = group[0].created
+        combined.attempts = max(n.attempts for n in group)
+        combined.merged = sum(n.merged for n in group)
+        for notification in group:
+            notification.repeats = 0
+        merged.append(combined)
+    return merged
+
+class BackgroundDispatcher:
+    """Runs a NotificationDispatcher on its own thread, for blocking scripts."""
+
+    def __init__(self, dispatcher: NotificationDispatcher):
+        self.dispatcher = dispatcher
+        self._loop = asyncio.new_event_loop()
+        self._started = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="notifications")
+        self._thread.start()
+        self._started.wait()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self.dispatcher.start())
+        self._started.set()
+        self._loop.run_forever()
+
+    def notify(self, source: str, message: str, severity: str = "warning", key: str = "", title: str = "") -> None:
+        """Queue a notification from any thread."""
+        self._loop.call_soon_threadsafe(self.dispatcher.notify, source, message, severity, key, title)
+
+    def close(self, drain_timeout: float = 10) -> None:
+        """Send what is still queued, within drain_timeout, and stop the thread."""
+        future = asyncio.run_coroutine_threadsafe(self.dispatcher.close(drain_timeout), self._loop)
+        future.result(drain_timeout + 5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+
+def build_channels(config: Dict[str, Any]) -> List[Channel]:
+    """
+    Create channels from a notifications configuration.
+
+    Args:
+        config: Dictionary with discord_webhook and either telegram_bot_token and
+            telegram_chat_id or telegram_conf
+
+    Returns:
+        The configured channels
+    """
+    channels: List[Channel] = []
+    if config.get('discord_webhook'):
+        channels.append(DiscordChannel(config['discord_webhook']))
+    api_url = config.get('telegram_api', "https://api.telegram.org")
+    if config.get('telegram_bot_token') and config.get('telegram_chat_id'):
+        channels.append(TelegramChannel(config['telegram_bot_token'], str(config['telegram_chat_id']), api_url))
+    elif config.get('telegram_conf'):
+        telegram = TelegramChannel.from_conf(config['telegram_conf'], api_url)
+        if telegram:
+            channels.append(telegram)
+    return channels
+
+class StubChatServer:
+    """
+    Local stand-in for a Discord webhook and the Telegram bot API.
+
+    It enforces the same kind of limits (5 requests per 2 seconds by default)
+    and answers 429 with Retry-After, so the dispatcher can be tested without
+    posting anything.
+    """
+
+    def __init__(self, limit: int = 5, per_seconds: float = 2.0):
+        self.limit = limit
+        self.per_seconds = per_seconds
+        self.received: List[Dict[str, Any]] = []
+        self.rejected = 0
+        self._requests: deque = deque()
+        self._runner = None
+
+    async def start(self, port: int = 0) -> str:
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_post("/api/webhooks/{id}/{token}", self._handle)
+        app.router.add_post("/bot{token}/sendMessage", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", port)
+        await site.start()
+        return f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def _handle(self, request):
+        from aiohttp import web
+
+        now = time.monotonic()
+        while self._requests and now - self._requests[0] > self.per_seconds:
+            self._requests.popleft()
+        if len(self._requests) >= self.limit:
+            self.rejected += 1
+            retry_after = self.per_seconds - (now - self._requests[0])
+            return web.json_response({'message': "You are being rate limited.", 'retry_after': retry_after,
+                                      'parameters': {'retry_after': retry_after}},
+                                     status=429, headers={"Retry-After": f"{retry_after:.3f}"})
+        self._requests.append(now)
+        self.received.append({'path': request.path, 'body': await request.json()})
+        if "/bot" in request.path:
+            return web.json_response({'ok': True, 'result': {}})
+        return web.Response(status=204, headers={"X-RateLimit-Remaining": str(self.limit - len(self._requests))})
+
+async def _demo(alerts: int, sources: int) -> None:
+    """Send an alert storm through the dispatcher to the stub server and report what arrived."""
+    stub = StubChatServer()
+    url = await stub.start()
+    channels = [DiscordChannel(f"{url}/api/webhooks/1/stub"), TelegramChannel("stub", "1", url)]
+    dispatcher = NotificationDispatcher(channels, dedup_window=60, digest_interval=3)
+    await dispatcher.start()
+
+    started = time.monotonic()
+    for i in range(alerts):
+        # Every source alternates between a few distinct alerts, so most are repeats
+        dispatcher.notify(f"chain-{i % sources}", f"missed {i % 3} blocks", "warning")
+        dispatcher.notify(f"chain-{i % sources}", f"height {1000 + i}", "critical", key=f"chain-{i % sources}/stall/{i}")
+    queued = time.monotonic() - started
+
+    await asyncio.sleep(4)
+    await dispatcher.close(drain_timeout=30)
+    await stub.stop()
+
+    print(f"Queued {alerts * 2} alerts in {queued * 1000:.1f} ms")
+    for key, value in dispatcher.stats.items():
+        print(f"  {key:<20}{value}")
+    print(f"  stub accepted        {len(stub.received)} requests, rejected {stub.rejected} with 429")
+
+def main():
+    parser = argparse.ArgumentParser(description="Notification dispatcher test against a local stub chat server")
+    parser.add_argument("--alerts", type=int, default=200, help="Alerts per kind in the storm")
+    parser.add_argument("--sources", type=int, default=10, help="Number of sources the alerts come from")
+    args = parser.parse_args()
+    asyncio.run(_demo(args.alerts, args.sources))
+
+if __name__ == "__main__":
+    main()
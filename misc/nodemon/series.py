@@ -0,0 +1,299 @@
+"""
+Node Monitor - Series Module
+
+This module stores the samples of the monitors in one ring file per target:
+a fixed-size header followed by fixed-width records of float64 values,
+memory-mapped so that appends are plain stores and windowed queries read
+the mapping in place. Records are appended in time order, so the start of a
+window is found by binary search and a query only touches the records in
+it. On top of the windows it computes trends such as the growth of the lag
+over the last 5 minutes, so alerts can fire on a rate of change instead of
+a single sample.
+"""
+
+import os
+import re
+import sys
+import mmap
+import math
+import time
+import struct
+import argparse
+import datetime
+from typing import Dict, List, Optional, Tuple
+
+MAGIC = b"NMTS1\n"
+# Magic, capacity, records written, field names
+HEADER = struct.Struct("<6s2xQQ104s")
+FIELDS = ("time", "height", "lag", "peers", "voting_power", "latency_ms")
+
+class RingFile:
+    """Fixed-capacity, memory-mapped ring of samples of one target."""
+
+    def __init__(self, path: str, capacity: int = 100000):
+        """
+        Open a ring file, creating it if it does not exist.
+
+        Args:
+            path: File path
+            capacity: Number of samples kept when the file is created; an existing file keeps its own
+        """
+        self.path = path
+        self.width = len(FIELDS)
+        if not os.path.exists(path):
+            self._create(path, capacity)
+
+        self._file = open(path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, self.capacity, _, names = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a series file")
+        names = names.rstrip(b"\0").decode()
+        if tuple(names.split(",")) != FIELDS:
+            self.close()
+            raise ValueError(f"{path} has fields {names}, expected {','.join(FIELDS)}")
+        if len(self._map) < HEADER.size + self.capacity * self.width * 8:
+            self.close()
+            raise ValueError(f"{path} is truncated")
+        # A view of the records as doubles, so reads and writes don't copy
+        self._values = memoryview(self._map)[HEADER.size:].cast("d")
+
+    @staticmethod
+    def _create(path: str, capacity: int) -> None:
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, capacity, 0, ",".join(FIELDS).encode()))
+            # Sparse until written
+            f.truncate(HEADER.size + capacity * len(FIELDS) * 8)
+        os.replace(temp_path, path)
+
+    @property
+    def written(self) -> int:
+        return struct.unpack_from("<Q", self._map, 16)[0]
+
+    def __len__(self) -> int:
+        return min(self.written, self.capacity)
+
+    def append(self, timestamp: float, **values: float) -> None:
+        """
+        Append a sample; fields that are not given are stored as NaN.
+
+        Args:
+            timestamp: Unix time of the sample; one older than the last sample, such as after the
+                clock was stepped back, is stored at the last sample's time to keep the ring in order
+            **values: Values of height, lag, peers, voting_power and latency_ms
+        """
+        written = self.written
+        if written:
+            timestamp = max(timestamp, self._time(len(self) - 1))
+        offset = (written % self.capacity) * self.width
+        record = self._values[offset:offset + self.width]
+        record[0] = timestamp
+        for index, field in enumerate(FIELDS[1:], start=1):
+            value = values.get(field)
+            record[index] = float("nan") if value is None else float(value)
+        # Publish the record only once it is complete
+        struct.pack_into("<Q", self._map, 16, written + 1)
+
+    def _slot(self, position: int) -> int:
+        """Offset of the record at a position counted from the oldest one."""
+        written = self.written
+        first = written - len(self) if written > self.capacity else 0
+        return ((first + position) % self.capacity) * self.width
+
+    def _time(self, position: int) -> float:
+        return self._values[self._slot(position)]
+
+    def _start(self, since: float) -> int:
+        """Position of the first sample at or after since."""
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self._time(middle) < since:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def window(self, field: str, seconds: float, now: Optional[float] = None) -> List[Tuple[float, float]]:
+        """
+        Get the samples of a field in the last seconds, skipping those without a value.
+
+        Args:
+            field: Field name
+            seconds: Window length
+            now: End of the window, the current time if None
+
+        Returns:
+            List of (time, value), oldest first
+        """
+        column = FIELDS.index(field)
+        now = time.time() if now is None else now
+        points = []
+        for position in range(self._start(now - seconds), len(self)):
+            slot = self._slot(position)
+            timestamp, value = self._values[slot], self._values[slot + column]
+            if timestamp > now:
+                break
+            if not math.isnan(value):
+                points.append((timestamp, value))
+        return points
+
+    def latest(self, field: str) -> Optional[float]:
+        """Get the newest value of a field, or None if no sample has one."""
+        column = FIELDS.index(field)
+        for position in range(len(self) - 1, -1, -1):
+            value = self._values[self._slot(position) + column]
+            if not math.isnan(value):
+                return value
+        return None
+
+    def trend(self, field: str, seconds: float, now: Optional[float] = None) -> Optional[Dict[str, float]]:
+        """
+        Summarize a field over the last seconds.
+
+        Args:
+            field: Field name
+            seconds: Window length
+            now: End of the window, the current time if None
+
+        Returns:
+            Dictionary of samples, span (seconds covered), first, last, min, max, mean,
+            slope (change per minute, least squares), and rising and falling (fractions of steps that went up and down),
+            or None with fewer than 2 samples
+        """
+        points = self.window(field, seconds, now)
+        if len(points) < 2:
+            return None
+        count = len(points)
+        mean_time = sum(t for t, _ in points) / count
+        values = [v for _, v in points]
+        mean = sum(values) / count
+        variance = sum((t - mean_time) ** 2 for t, _ in points)
+        slope = sum((t - mean_time) * (v - mean) for t, v in points) / variance if variance else 0.0
+        steps = [b - a for a, b in zip(values, values[1:])]
+        return {
+            'samples': count,
+            'span': points[-1][0] - points[0][0],
+            'first': values[0],
+            'last': values[-1],
+            'min': min(values),
+            'max': max(values),
+            'mean': mean,
+            'slope': slope * 60,
+            'rising': sum(step > 0 for step in steps) / len(steps),
+            'falling': sum(step < 0 for step in steps) / len(steps),
+        }
+
+    def growing(self, field: str, seconds: float, min_increase: float, now: Optional[float] = None) -> Optional[Dict[str, float]]:
+        """
+        Check whether a field has been growing for the whole window, such as a lag that keeps increasing.
+
+        The window must be covered by samples, the least-squares slope must be positive, the value
+        must have grown by at least min_increase, and it must not have gone down more often than up.
+
+        Returns:
+            The trend if the field is growing, None otherwise
+        """
+        trend = self.trend(field, seconds, now)
+        if (trend and trend['span'] >= 0.9 * seconds and trend['slope'] > 0
+                and trend['last'] - trend['first'] >= min_increase and trend['rising'] >= trend['falling']):
+            return trend
+        return None
+
+    def dropped(self, field: str, seconds: float, fraction: float, now: Optional[float] = None) -> Optional[Dict[str, float]]:
+        """
+        Check whether the newest value fell below fraction of the window's maximum, such as losing half the peers.
+
+        Returns:
+            The trend if the field dropped, None otherwise
+        """
+        trend = self.trend(field, seconds, now)
+        if trend and trend['max'] > 0 and trend['last'] < fraction * trend['max']:
+            return trend
+        return None
+
+    def flush(self) -> None:
+        self._map.flush()
+
+    def close(self) -> None:
+        if getattr(self, "_values", None) is not None:
+            self._values.release()
+            self._values = None
+        if not self._map.closed:
+            self._map.close()
+        self._file.close()
+
+class SeriesStore:
+    """Directory with one ring file per target."""
+
+    def __init__(self, directory: str, capacity: int = 100000):
+        """
+        Initialize the store.
+
+        Args:
+            directory: Directory of the ring files, created if missing
+            capacity: Samples kept per target; 100000 samples of 48 bytes cover 17 days at a 15s interval
+        """
+        self.directory = directory
+        self.capacity = capacity
+        self._rings: Dict[str, RingFile] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def ring(self, target: str) -> RingFile:
+        ring = self._rings.get(target)
+        if ring is None:
+            ring = self._rings[target] = RingFile(self.path(target), self.capacity)
+        return ring
+
+    def path(self, target: str) -> str:
+        return os.path.join(self.directory, re.sub(r"[^A-Za-z0-9_.-]", "_", target) + ".series")
+
+    def targets(self) -> List[str]:
+        return sorted(name[:-len(".series")] for name in os.listdir(self.directory) if name.endswith(".series"))
+
+    def close(self) -> None:
+        for ring in self._rings.values():
+            ring.flush()
+            ring.close()
+        self._rings.clear()
+
+def print_summary(ring: RingFile, seconds: float) -> None:
+    print(f"{len(ring)} samples of {ring.capacity}, last window {seconds:.0f}s")
+    print(f"{'field':<14}{'samples':>8}{'first':>14}{'last':>14}{'min':>14}{'max':>14}{'per min':>10}{'rising':>8}")
+    for field in FIELDS[1:]:
+        trend = ring.trend(field, seconds)
+        if trend is None:
+            print(f"{field:<14}{'-':>8}")
+            continue
+        print(f"{field:<14}{trend['samples']:>8}{trend['first']:>14.6g}{trend['last']:>14.6g}{trend['min']:>14.6g}"
+              f"{trend['max']:>14.6g}{trend['slope']:>10.3g}{trend['rising']:>8.0%}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the recorded history of monitored targets")
+    parser.add_argument("--dir", required=True, help="History directory of the daemon")
+    parser.add_argument("--target", help="Target name; all targets if omitted")
+    parser.add_argument("--window", type=float, default=3600, help="Window in seconds")
+    parser.add_argument("--field", choices=FIELDS[1:], help="Print the samples of one field instead of a summary")
+    args = parser.parse_args()
+
+    store = SeriesStore(args.dir)
+    targets = [args.target] if args.target else store.targets()
+    if not targets:
+        print(f"No series in {args.dir}", file=sys.stderr)
+        sys.exit(1)
+    try:
+        for target in targets:
+            print(f"== {target}")
+            ring = store.ring(target)
+            if args.field:
+                for timestamp, value in ring.window(args.field, args.window):
+                    print(f"{datetime.datetime.fromtimestamp(timestamp):%Y-%m-%d %H:%M:%S} {value:g}")
+            else:
+                print_summary(ring, args.window)
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
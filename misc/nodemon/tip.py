@@ -0,0 +1,245 @@
+"""
+Node Monitor - Tip Oracle Module
+
+This module finds the network's tip height from several external RPCs at
+once. Every RPC is queried concurrently, and a request that is slower than
+that RPC usually is gets a hedged duplicate. The first quorum of answers
+decides the height, so one slow or stale endpoint neither delays nor skews
+it. Results are cached briefly and shared by every caller asking for the
+same chain. CometBFT, EVM, Substrate and Sui RPCs are supported.
+"""
+
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple
+
+import aiohttp
+
+KINDS = ("cometbft", "evm", "substrate", "sui")
+
+JSON_RPC_METHODS = {
+    'evm': "eth_blockNumber",
+    'substrate': "chain_getHeader",
+    'sui': "sui_getLatestCheckpointSequenceNumber",
+}
+
+class TipResult:
+    """Tip height agreed by the RPCs, with every RPC's answer."""
+
+    def __init__(self, height: Optional[int], heights: Dict[str, int], errors: Dict[str, str],
+                 hedged: int, seconds: float):
+        self.height = height
+        self.heights = heights
+        self.errors = errors
+        self.hedged = hedged
+        self.seconds = seconds
+        self.fetched = time.monotonic()
+
+    @property
+    def successful(self) -> int:
+        return len(self.heights)
+
+    def describe(self) -> str:
+        """One line per RPC, like the bash monitors' RPC results."""
+        lines = [f"✅ {rpc}: {height}" for rpc, height in self.heights.items()]
+        lines += [f"❌ {rpc}: {error}" for rpc, error in self.errors.items()]
+        return "\n".join(lines)
+
+class TipOracle:
+    """Hedged, cached tip height of one chain from several RPCs."""
+
+    def __init__(self, kind: str, rpcs: List[str], session: aiohttp.ClientSession, min_successful: int = 1,
+                 aggregate: str = "quorum", timeout: float = 10, hedge_after: float = 0, cache_ttl: float = 2):
+        """
+        Initialize the oracle.
+
+        Args:
+            kind: cometbft, evm, substrate or sui
+            rpcs: RPC URLs
+            session: Connection pool to query them over
+            min_successful: Answers needed for a height; also the quorum
+            aggregate: quorum (the highest height at least min_successful RPCs reached), median or max
+            timeout: Seconds to wait for answers in total
+            hedge_after: Seconds before a duplicate request is sent; 0 adapts to each RPC's p90 latency
+            cache_ttl: Seconds a result is reused
+        """
+        if kind not in KINDS:
+            raise ValueError(f"Unknown RPC kind {kind}, expected one of {', '.join(KINDS)}")
+        if aggregate not in ("quorum", "median", "max"):
+            raise ValueError(f"Unknown aggregate {aggregate}")
+        self.kind = kind
+        self.rpcs = [rpc.rstrip("/") for rpc in rpcs if rpc.strip()]
+        self.session = session
+        self.min_successful = max(1, min(min_successful, len(self.rpcs)))
+        self.aggregate = aggregate
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self.cache_ttl = cache_ttl
+
+        self._latencies: Dict[str, deque] = {rpc: deque(maxlen=50) for rpc in self.rpcs}
+        self._cached: Optional[TipResult] = None
+        self._inflight: Optional[asyncio.Future] = None
+
+    async def tip(self) -> TipResult:
+        """
+        Get the tip height, from the cache if it is fresh.
+
+        Returns:
+            TipResult, whose height is None if fewer than min_successful RPCs answered
+        """
+        if self._cached and time.monotonic() - self._cached.fetched < self.cache_ttl:
+            return self._cached
+        # Callers arriving while a query runs share it
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._query())
+            self._inflight.add_done_callback(self._query_done)
+        return await asyncio.shield(self._inflight)
+
+    def _query_done(self, future: asyncio.Future) -> None:
+        self._inflight = None
+        if not future.cancelled() and future.exception() is None:
+            self._cached = future.result()
+
+    async def _query(self) -> TipResult:
+        started = time.monotonic()
+        hedged = [0]
+        tasks = {asyncio.ensure_future(self._hedged(rpc, hedged)): rpc for rpc in self.rpcs}
+        heights: Dict[str, int] = {}
+        errors: Dict[str, str] = {}
+        deadline = started + self.timeout
+        settle_deadline = None
+
+        pending = set(tasks)
+        while pending:
+            now = time.monotonic()
+            wait_until = min(deadline, settle_deadline) if settle_deadline else deadline
+            if now >= wait_until:
+                break
+            done, pending = await asyncio.wait(pending, timeout=wait_until - now, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                rpc = tasks[task]
+                try:
+                    heights[rpc] = task.result()
+                except Exception as e:
+                    errors[rpc] = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+            if len(heights) >= self.min_successful and settle_deadline is None:
+                # Quorum reached: give the others a moment, but don't wait for stragglers
+                settle_deadline = time.monotonic() + min(0.25, max(0.05, time.monotonic() - started))
+
+        for task in pending:
+            task.cancel()
+            errors[tasks[task]] = "no answer in time"
+
+        return TipResult(self._aggregate(list(heights.values())), heights, errors, hedged[0], time.monotonic() - started)
+
+    def _aggregate(self, heights: List[int]) -> Optional[int]:
+        if len(heights) < self.min_successful:
+            return None
+        if self.aggregate == "max":
+            return max(heights)
+        if self.aggregate == "median":
+            return int(statistics.median_low(heights))
+        return sorted(heights, reverse=True)[self.min_successful - 1]
+
+    async def _hedged(self, rpc: str, hedged: List[int]) -> int:
+        """Query one RPC, sending a second request if the first is slower than usual."""
+        attempts = [asyncio.ensure_future(self._fetch(rpc))]
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=self._hedge_delay(rpc))
+            if not done:
+                hedged[0] += 1
+                attempts.append(asyncio.ensure_future(self._fetch(rpc)))
+            racing = set(attempts)
+            while racing:
+                done, racing = await asyncio.wait(racing, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+            # Every attempt failed
+            return attempts[0].result()
+        finally:
+            for task in attempts:
+                task.cancel()
+                # Retrieve the losing attempt's error so asyncio doesn't log it
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    def _hedge_delay(self, rpc: str) -> float:
+        if self.hedge_after:
+            return self.hedge_after
+        latencies = sorted(self._latencies[rpc])
+        if len(latencies) < 5:
+            return min(1.0, self.timeout / 4)
+        return max(0.05, latencies[int(len(latencies) * 0.9)] * 1.5)
+
+    async def _fetch(self, rpc: str) -> int:
+        started = time.monotonic()
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        if self.kind == "cometbft":
+            async with self.session.get(f"{rpc}/status", timeout=timeout) as response:
+                response.raise_for_status()
+                data = await response.json(content_type=None)
+            height = int(data['result']['sync_info']['latest_block_height'])
+        else:
+            body = {'jsonrpc': "2.0", 'method': JSON_RPC_METHODS[self.kind], 'params': [], 'id': 1}
+            async with self.session.post(rpc, json=body, timeout=timeout) as response:
+                response.raise_for_status()
+                data = await response.json(content_type=None)
+            if 'error' in data:
+                raise ValueError(data['error'].get('message', data['error']))
+            result = data['result']
+            if self.kind == "evm":
+                height = int(result, 16)
+            elif self.kind == "substrate":
+                height = int(result['number'], 16)
+            else:
+                height = int(result)
+        self._latencies[rpc].append(time.monotonic() - started)
+        return height
+
+class TipOracles:
+    """One oracle per chain, shared by every target that lists the same RPCs with the same settings."""
+
+    def __init__(self, session: aiohttp.ClientSession):
+        self.session = session
+        self._oracles: Dict[Tuple[str, Tuple[str, ...], Tuple[Tuple[str, Any], ...]], TipOracle] = {}
+
+    def get(self, kind: str, rpcs: List[str], **kwargs: Any) -> TipOracle:
+        # A target asking for a larger quorum or a shorter timeout must not get another target's oracle
+        key = (kind, tuple(sorted(rpc.rstrip("/") for rpc in rpcs)), tuple(sorted(kwargs.items())))
+        oracle = self._oracles.get(key)
+        if oracle is None:
+            oracle = self._oracles[key] = TipOracle(kind, rpcs, self.session, **kwargs)
+        return oracle
+
+async def _main(args: argparse.Namespace) -> int:
+    rpcs = [rpc for value in args.rpc for rpc in value.split(",")]
+    async with aiohttp.ClientSession() as session:
+        oracle = TipOracle(args.kind, rpcs, session, min_successful=args.min_successful,
+                           aggregate=args.aggregate, timeout=args.timeout, hedge_after=args.hedge_after)
+        result = await oracle.tip()
+    if args.verbose:
+        print(result.describe(), file=sys.stderr)
+        print(f"{result.successful}/{len(oracle.rpcs)} answered in {result.seconds * 1000:.0f} ms, "
+              f"{result.hedged} hedged", file=sys.stderr)
+    if result.height is None:
+        return 1
+    print(result.height)
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the network tip height agreed by several RPCs")
+    parser.add_argument("--kind", choices=KINDS, default="cometbft", help="RPC flavour")
+    parser.add_argument("--rpc", action="append", required=True, help="RPC URL, repeatable or comma-separated")
+    parser.add_argument("--min-successful", type=int, default=1, help="Answers needed, also the quorum")
+    parser.add_argument("--aggregate", choices=("quorum", "median", "max"), default="quorum")
+    parser.add_argument("--timeout", type=float, default=10)
+    parser.add_argument("--hedge-after", type=float, default=0, help="Seconds before a hedged request; 0 adapts")
+    parser.add_argument("--verbose", action="store_true", help="Print every RPC's answer to stderr")
+    sys.exit(asyncio.run(_main(parser.parse_args())))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""
+Node Monitor - Unjail Transaction Module
+
+This module sends unjail transactions without the slow parts of
+`tx slashing unjail --gas auto`. The addresses, a gas limit and the unsigned
+transaction are prepared ahead of time. When the validator is jailed, the
+template is signed offline with the account number and sequence from one
+REST query, broadcast with broadcast_tx_sync over the pooled connection,
+and confirmed by a websocket subscription to its hash. Gas used by the last
+confirmed transaction is kept for the next one.
+"""
+
+import os
+import re
+import json
+import time
+import base64
+import shlex
+import asyncio
+import hashlib
+import tempfile
+from typing import Dict, Any, Optional, Tuple
+
+import aiohttp
+
+class UnjailError(Exception):
+    """An unjail transaction could not be built, sent or confirmed."""
+
+class UnjailSender:
+    """Prepared, offline-signed unjail transactions of one validator."""
+
+    def __init__(self, binary: str, wallet: str, chain_id: str, fees: str, rpc_url: str, api_url: str,
+                 session: aiohttp.ClientSession, password: str = "", keyring_backend: str = "", gas: int = 200000,
+                 gas_adjustment: float = 1.3, cache_path: str = "", confirm_timeout: float = 60):
+        """
+        Initialize the sender.
+
+        Args:
+            binary: Chain binary, with any flags it needs such as --home
+            wallet: Key name of the validator's account
+            chain_id: Chain ID
+            fees: Fees of the transaction, such as 5000uatom
+            rpc_url: CometBFT RPC to broadcast to and follow
+            api_url: REST API to read the account number and sequence from
+            session: Connection pool
+            password: Keyring password, piped to the binary
+            keyring_backend: Keyring backend, the binary's default if empty
+            gas: Gas limit until a transaction has been confirmed
+            gas_adjustment: Factor applied to the gas used by the last transaction
+            cache_path: JSON file that keeps the prepared template and gas across restarts, none if empty
+            confirm_timeout: Seconds to wait for the transaction to be included
+        """
+        self.binary = binary
+        self.wallet = wallet
+        self.chain_id = chain_id
+        self.fees = fees
+        self.rpc_url = rpc_url.rstrip("/")
+        self.api_url = api_url.rstrip("/")
+        self.session = session
+        self.password = password
+        self.keyring_flags = f" --keyring-backend {keyring_backend}" if keyring_backend else ""
+        self.gas_adjustment = gas_adjustment
+        self.cache_path = cache_path
+        self.confirm_timeout = confirm_timeout
+
+        self.state: Dict[str, Any] = {'gas': gas}
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, "r") as f:
+                cached = json.load(f)
+            # A cache of another wallet or chain is ignored
+            if cached.get('wallet') == wallet and cached.get('chain_id') == chain_id:
+                self.state = cached
+
+    @property
+    def prepared(self) -> bool:
+        return 'template' in self.state
+
+    async def prepare(self) -> None:
+        """
+        Look up the account and build the unsigned transaction, before it is needed.
+
+        Raises:
+            UnjailError: If the binary failed
+        """
+        account = await self._run(f"{self.binary} keys show {self.wallet} -a{self.keyring_flags}")
+        template = await self._run(
+            f"{self.binary} tx slashing unjail --from {self.wallet} --chain-id {self.chain_id} --fees {self.fees} "
+            f"--gas {self.state['gas']} --generate-only{self.keyring_flags}")
+        self.state.update(wallet=self.wallet, chain_id=self.chain_id, account_address=account.strip(),
+                          template=json.loads(template))
+        self._save()
+
+    async def unjail(self) -> Dict[str, Any]:
+        """
+        Sign, broadcast and confirm an unjail transaction.
+
+        A sequence mismatch is retried with the expected sequence, and a transaction that ran out of
+        gas is retried once with the gas it needed.
+
+        Returns:
+            Dictionary of hash, height, code, log, gas_used and the seconds each step took
+
+        Raises:
+            UnjailError: If the transaction could not be sent or confirmed, or failed on chain
+        """
+        started = time.monotonic()
+        if not self.prepared:
+            await self.prepare()
+        account_number, sequence = await self.account()
+        timings = {'prepare_and_account': time.monotonic() - started}
+
+        for attempt in range(3):
+            step = time.monotonic()
+            tx = await self.sign(account_number, sequence)
+            tx_hash = hashlib.sha256(tx).hexdigest().upper()
+            timings['sign'] = time.monotonic() - step
+
+            step = time.monotonic()
+            # Subscribe before broadcasting, so the event can't be missed
+            async with self._subscription(tx_hash) as events:
+                check = await self.broadcast(tx)
+                timings['broadcast'] = time.monotonic() - step
+                if check['code'] == 32:
+                    expected = re.search(r"expected (\d+)", check.get('log', ""))
+                    if not expected:
+                        raise UnjailError(f"broadcast failed: {check.get('log')}")
+                    sequence = int(expected.group(1))
+                    continue
+                if check['code'] != 0:
+                    raise UnjailError(f"broadcast failed with code {check['code']}: {check.get('log')}")
+
+                step = time.monotonic()
+                included = await self.confirm(tx_hash, events)
+                timings['included'] = time.monotonic() - step
+
+            result = included['result']
+            gas_used = int(result.get('gas_used', 0))
+            if int(result.get('code', 0)) == 11 and attempt == 0:
+                needed = re.search(r"gasUsed: (\d+)", result.get('log', ""))
+                self._set_gas(int(needed.group(1)) if needed else gas_used * 2)
+                sequence += 1
+                continue
+            if int(result.get('code', 0)) == 0:
+                self._set_gas(gas_used)
+
+            timings['total'] = time.monotonic() - started
+            outcome = {'hash': tx_hash, 'height': int(included['height']), 'code': int(result.get('code', 0)),
+                       'log': result.get('log', ""), 'gas_used': gas_used, 'timings': timings}
+            if outcome['code'] != 0:
+                raise UnjailError(f"unjail transaction {tx_hash} failed with code {outcome['code']}: {outcome['log']}")
+            return outcome
+        raise UnjailError("unjail transaction was not accepted after 3 attempts")
+
+    async def account(self) -> Tuple[int, int]:
+        """Get the account number and sequence of the validator's account."""
+        url = f"{self.api_url}/cosmos/auth/v1beta1/accounts/{self.state['account_address']}"
+        async with self.session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
+            response.raise_for_status()
+            account = _base_account((await response.json(content_type=None))['account'])
+        if account is None:
+            raise UnjailError(f"no account number in the account of {self.state['account_address']}")
+        self.state['account_number'] = int(account['account_number'])
+        return int(account['account_number']), int(account.get('sequence', 0))
+
+    async def sign(self, account_number: int, sequence: int) -> bytes:
+        """Sign the template offline and encode it, without querying the node."""
+        with tempfile.TemporaryDirectory(prefix="unjail-") as directory:
+            unsigned = os.path.join(directory, "unsigned.json")
+            signed = os.path.join(directory, "signed.json")
+            with open(unsigned, "w") as f:
+                json.dump(self.state['template'], f)
+            encoded = await self._run(
+                f"{self.binary} tx sign {unsigned} --from {self.wallet} --chain-id {self.chain_id} --offline "
+                f"--account-number {account_number} --sequence {sequence} --output-document {signed}{self.keyring_flags} "
+                f"&& {self.binary} tx encode {signed}")
+        return base64.b64decode(encoded.strip().splitlines()[-1])
+
+    async def broadcast(self, tx: bytes) -> Dict[str, Any]:
+        """Send the transaction to the mempool, returning the CheckTx result."""
+        body = {'jsonrpc': "2.0", 'id': 1, 'method': "broadcast_tx_sync", 'params': {'tx': base64.b64encode(tx).decode()}}
+        async with self.session.post(self.rpc_url, json=body, timeout=aiohttp.ClientTimeout(total=10)) as response:
+            data = await response.json(content_type=None)
+        if 'error' in data:
+            raise UnjailError(f"broadcast failed: {data['error'].get('data') or data['error'].get('message')}")
+        result = data['result']
+        result['code'] = int(result.get('code', 0))
+        return result
+
+    async def confirm(self, tx_hash: str, events: Optional[asyncio.Queue]) -> Dict[str, Any]:
+        """
+        Wait for the transaction to be included, from the websocket or by polling /tx if it is unavailable.
+
+        Returns:
+            Dictionary with the height and the DeliverTx result
+        """
+        deadline = time.monotonic() + self.confirm_timeout
+        while time.monotonic() < deadline:
+            if events is not None:
+                try:
+                    event = await asyncio.wait_for(events.get(), timeout=min(2.0, deadline - time.monotonic()))
+                    if event is not None:
+                        return event
+                    # The websocket closed
+                    events = None
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(1)
+            # Also poll, in case the event was lost
+            included = await self._query_tx(tx_hash)
+            if included:
+                return included
+        raise UnjailError(f"unjail transaction {tx_hash} not included after {self.confirm_timeout:.0f}s")
+
+    async def _query_tx(self, tx_hash: str) -> Optional[Dict[str, Any]]:
+        try:
+            async with self.session.get(f"{self.rpc_url}/tx", params={'hash': f"0x{tx_hash}"},
+                                        timeout=aiohttp.ClientTimeout(total=5)) as response:
+                data = await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            return None
+        if 'result' not in data:
+            return None
+        return {'height': data['result']['height'], 'result': data['result']['tx_result']}
+
+    def _subscription(self, tx_hash: str) -> "_TxSubscription":
+        return _TxSubscription(self.session, self.rpc_url.replace("http", "ws", 1) + "/websocket", tx_hash)
+
+    def _set_gas(self, gas_used: int) -> None:
+        gas = int(gas_used * self.gas_adjustment) + 1
+        self.state['gas'] = gas
+        # The gas limit is a plain field of the template, so it is changed in place instead of generating a new one
+        self.state['template']['auth_info']['fee']['gas_limit'] = str(gas)
+        self._save()
+
+    def _save(self) -> None:
+        if not self.cache_path:
+            return
+        temp_path = f"{self.cache_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.state, f)
+        os.replace(temp_path, self.cache_path)
+
+    async def _run(self, command: str) -> str:
+        process = await asyncio.create_subprocess_shell(
+            command, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(f"{self.password}\n".encode()), timeout=60)
+        except asyncio.TimeoutError:
+            process.kill()
+            raise UnjailError(f"timed out: {shlex.split(command)[0]}")
+        if process.returncode != 0:
+            raise UnjailError(f"{shlex.split(command)[0]} failed: {stderr.decode(errors='replace').strip()[-300:]}")
+        return stdout.decode()
+
+class _TxSubscription:
+    """Websocket subscription to the Tx event of one hash, delivered through a queue."""
+
+    def __init__(self, session: aiohttp.ClientSession, url: str, tx_hash: str):
+        self.session = session
+        self.url = url
+        self.tx_hash = tx_hash
+        self.ws = None
+        self.task = None
+
+    async def __aenter__(self) -> Optional[asyncio.Queue]:
+        try:
+            self.ws = await self.session.ws_connect(self.url, timeout=aiohttp.ClientWSTimeout(ws_close=5), heartbeat=30)
+            await self.ws.send_json({'jsonrpc': "2.0", 'id': 1, 'method': "subscribe",
+                                     'params': {'query': f"tm.event='Tx' AND tx.hash='{self.tx_hash}'"}})
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError):
+            # Confirm by polling instead
+            return None
+        queue: asyncio.Queue = asyncio.Queue()
+        self.task = asyncio.create_task(self._read(queue))
+        return queue
+
+    async def _read(self, queue: asyncio.Queue) -> None:
+        try:
+            async for message in self.ws:
+                if message.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                data = json.loads(message.data).get('result') or {}
+                tx_result = (data.get('data') or {}).get('value', {}).get('TxResult')
+                if tx_result:
+                    await queue.put({'height': tx_result['height'], 'result': tx_result['result']})
+        finally:
+            await queue.put(None)
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        if self.task:
+            self.task.cancel()
+        if self.ws:
+            await self.ws.close()
+
+def _base_account(account: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Find the base account in a vesting or module account, or in an Ethermint account."""
+    if 'account_number' in account:
+        return account
+    for value in account.values():
+        if isinstance(value, dict):
+            found = _base_account(value)
+            if found:
+                return found
+    return None
@@ -1,25 +1,63 @@
-import requests
 import json
+import os
+import sys
 import time
+import asyncio
+import aiohttp
 import subprocess
 import datetime
 import discord
 import getpass
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bech32", "generic"))
+from hex2val_general import consensus_address_from_hex
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "cosmos", "cosmoinstaller"))
+from modules.httpclient import get_client
+from nodemon.notify import NotificationDispatcher, BackgroundDispatcher, DiscordChannel
+from nodemon.unjailtx import UnjailSender, UnjailError
+
 # ***** Configuration *****
 rpc_url = "http://localhost:36657"
 wallet_name = "key"
 systemd_service = "node.service"
 node_binary = "giad --node http://localhost:36657  "
 is_validator = True
-discord_webhook_url = "https://discord.com/api/webhooks/xxx
+discord_webhook_url = "https://discord.com/api/webhooks/xxx"
+
+# Event mode: follow NewBlock events over the websocket and treat no new block
+# within stall_factor x the average block time as a stall
+use_websocket = True
+stall_factor = 3
+min_stall_seconds = 15
+expected_block_time = 6  # seconds, used until enough blocks were seen
+fallback_poll_seconds = 2  # /status polling while the websocket is down
+jail_check_seconds = 60
+status_cache_seconds = 5  # the checks of one cycle share one /status response
+
+# Missed blocks: alert and restart before the validator misses enough blocks in
+# the slashing window to be jailed. Fractions are of the blocks it may miss.
+api_url = "http://localhost:1317"
+bech32_prefix = "gravity"
+signing_check_seconds = 30
+missed_alert_fraction = 0.1
+missed_restart_fraction = 0.5
+time_to_jail_alert_seconds = 3600
+restart_cooldown_seconds = 600
+
+# Fast unjail (event mode): the unjail transaction is prepared at startup, signed
+# offline and broadcast over RPC, instead of running the CLI with --gas auto.
+# Falls back to the CLI if it fails.
+fast_unjail = True
+chain_id = "network-name"
+unjail_fees = "0uatom"
+unjail_gas = 200000  # until a transaction was confirmed, then the gas it used
+keyring_backend = ""
+unjail_cache_file = "unjail-cache.json"
 
 # ***** Helper Functions *****
 def check_block_production(rpc_url):
     try:
-        response = requests.get(f"{rpc_url}/status")
-        response.raise_for_status()  # Raise an error if request failed
-        data = response.json()
+        data = get_client().get_json(f"{rpc_url}/status", ttl=status_cache_seconds)  # Raises an error if request failed
         latest_block_time = data['result']['sync_info']['latest_block_time']
 
         # Truncate the timestamp to microsecond precision (6 digits)
@@ -54,7 +92,7 @@ def restart_service(service_name):
 def unjail_node(node_binary, wallet_name, wallet_password):
 
     send_discord_notification(discord_webhook_url,"NOTi: xx Mainnet Jailed detected, attempting to unjail..")
-    command = "echo '{}' | {} tx slashing unjail --gas auto --fees 0uatom --chain-id network-name --from {} -y".format(wallet_password, node_binary, wallet_name)
+    command = "echo '{}' | {} tx slashing unjail --gas auto --fees {} --chain-id {} --from {} -y".format(wallet_password, node_binary, unjail_fees, chain_id, wallet_name)
     #print(f"command: {command}")
 
     process = subprocess.run(command, shell=True, text=True, capture_output=True)
@@ -62,28 +100,251 @@ def unjail_node(node_binary, wallet_name, wallet_password):
     print("STDOUT:", process.stdout)
     print("STDERR:", process.stderr)    
 
+notification_queues = {}
+
 def send_discord_notification(webhook_url, message):
-    data = {"content": message}
-    requests.post(webhook_url, data=data)
-    print(message)  
+    # Queued and sent from a background thread, so a slow or rate limited webhook never holds up the checks
+    if webhook_url not in notification_queues:
+        notification_queues[webhook_url] = BackgroundDispatcher(NotificationDispatcher([DiscordChannel(webhook_url)]))
+    notification_queues[webhook_url].notify(systemd_service, message, "critical" if "restart" in message or "Jailed" in message else "warning")
+    print(message)
 
+# Voting power of the validator, or None if the node could not be asked, e.g. while it restarts
 def check_voting_power(rpc_url, wallet_name):
     try:
         # Replace with your Cosmos-specific RPC endpoint for validator queries        
-        response = requests.get(f"{rpc_url}/status")
-        response.raise_for_status()
-        data = response.json()
+        data = get_client().get_json(f"{rpc_url}/status", ttl=status_cache_seconds)
         # Extract voting power from the response (structure might vary)
         voting_power = int(data['result']['validator_info']['voting_power']) 
         print(f"Voting power: {voting_power}")  
         return voting_power
     except Exception as e:
         print(f"Error checking voting power: {e}")
-        return 0
+        return None
+
+class MissedBlockTracker:
+    """Tracks the missed blocks counter of our validator against the slashing window."""
+
+    def __init__(self):
+        self.valcons_address = None
+        self.window = None
+        self.max_missed = None
+        self.samples = []  # (time, missed blocks counter) over the last 10 minutes, at least the previous one
+        self.alerted = False
+        self.last_restart = 0
+
+    def load(self):
+        status = get_client().get_json(f"{rpc_url}/status", ttl=status_cache_seconds)
+        address_hex = status['result']['validator_info']['address']
+        self.valcons_address = consensus_address_from_hex(address_hex, bech32_prefix + "valcons")
+
+        params = get_client().get_json(f"{api_url}/cosmos/slashing/v1beta1/params")['params']
+        self.window = int(params['signed_blocks_window'])
+        # The validator is jailed once it missed more than this many blocks of the window
+        self.max_missed = self.window - round(float(params['min_signed_per_window']) * self.window)
+        print(f"Tracking {self.valcons_address}: jailed after missing more than {self.max_missed} of {self.window} blocks")
+
+    def check(self):
+        if self.valcons_address is None:
+            self.load()
+
+        info = get_client().get_json(f"{api_url}/cosmos/slashing/v1beta1/signing_infos/{self.valcons_address}")['val_signing_info']
+        if info.get('tombstoned'):
+            return
+        missed = int(info.get('missed_blocks_counter', 0))
+
+        now = time.time()
+        # The previous sample is kept even when it is older, as in legacy mode which checks every 15 minutes
+        recent = [(t, m) for t, m in self.samples if now - t < 600] or self.samples[-1:]
+        self.samples = recent + [(now, missed)]
+        first_time, first_missed = self.samples[0]
+        still_missing = missed > first_missed
+
+        # Time to jail at the miss rate of the last samples
+        time_to_jail = None
+        if still_missing:
+            time_to_jail = (self.max_missed - missed + 1) * (now - first_time) / (missed - first_missed)
+
+        status = f"missed {missed} of {self.window} blocks ({missed / self.window:.1%}), jailed after {self.max_missed}"
+        if time_to_jail is not None:
+            eta = f"{time_to_jail / 60:.0f} min" if time_to_jail >= 120 else f"{time_to_jail:.0f}s"
+            status += f", ~{eta} to jail at the current rate"
+        print(f"Signing: {status}")
+
+        at_risk = missed >= missed_alert_fraction * self.max_missed or (time_to_jail is not None and time_to_jail < time_to_jail_alert_seconds)
+        if at_risk and not self.alerted:
+            send_discord_notification(discord_webhook_url, f"Monitoring: Gravity Mainnet validator {status}")
+        self.alerted = at_risk
+
+        if still_missing and missed >= missed_restart_fraction * self.max_missed and now - self.last_restart > restart_cooldown_seconds:
+            self.last_restart = now
+            restart_service(systemd_service)
+            send_discord_notification(discord_webhook_url, f"Monitoring: Gravity Mainnet validator {status}, service restart attempted.")
+
+# ***** Event Mode *****
+class BlockWatch:
+    """Tracks the latest block and the average block time."""
+
+    def __init__(self):
+        self.height = 0
+        self.last_progress = time.monotonic()
+        self.last_block = 0.0  # when a new block was last seen, unlike last_progress not reset by a restart
+        self.recent = []  # (height, block time in seconds) of the last blocks
+        self.source = "none"
+
+    def observe(self, height, block_time, source):
+        if height <= self.height:
+            return False
+        self.height = height
+        self.last_progress = self.last_block = time.monotonic()
+        self.source = source
+        self.recent = (self.recent + [(height, parse_block_time(block_time))])[-50:]
+        return True
+
+    def average_block_time(self):
+        if len(self.recent) < 5:
+            return expected_block_time
+        (first_height, first_time), (last_height, last_time) = self.recent[0], self.recent[-1]
+        return max((last_time - first_time) / (last_height - first_height), 0.1)
+
+    def deadline(self):
+        return max(stall_factor * self.average_block_time(), min_stall_seconds)
+
+def parse_block_time(block_time):
+    # Block times have nanosecond precision, which strptime does not parse
+    seconds, _, fraction = block_time.rstrip("Z").partition(".")
+    parsed = datetime.datetime.strptime(seconds, "%Y-%m-%dT%H:%M:%S").replace(tzinfo=datetime.timezone.utc)
+    return parsed.timestamp() + float("0." + (fraction or "0"))
+
+async def follow_websocket(session, rpc_url, watch, connected):
+    ws_url = rpc_url.replace("http://", "ws://").replace("https://", "wss://") + "/websocket"
+    subscribe = {"jsonrpc": "2.0", "method": "subscribe", "id": 1, "params": {"query": "tm.event='NewBlock'"}}
+    retry = 1
+    while True:
+        try:
+            async with session.ws_connect(ws_url, heartbeat=10, max_msg_size=0) as ws:
+                await ws.send_json(subscribe)
+                connected.set()
+                retry = 1
+                print(f"Subscribed to NewBlock events on {ws_url}")
+                async for msg in ws:
+                    if msg.type != aiohttp.WSMsgType.TEXT:
+                        break
+                    value = json.loads(msg.data).get('result', {}).get('data', {}).get('value', {})
+                    header = value.get('block', {}).get('header')
+                    if header:
+                        watch.observe(int(header['height']), header['time'], "websocket")
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            print(f"Websocket error: {e}")
+        connected.clear()
+        print(f"Websocket disconnected, polling /status until it reconnects in {retry}s")
+        await asyncio.sleep(retry)
+        retry = min(retry * 2, 60)
+
+async def poll_while_disconnected(session, rpc_url, watch, connected):
+    while True:
+        if connected.is_set():
+            await asyncio.sleep(1)
+            continue
+        try:
+            async with session.get(f"{rpc_url}/status", timeout=aiohttp.ClientTimeout(total=5)) as response:
+                sync_info = (await response.json())['result']['sync_info']
+                watch.observe(int(sync_info['latest_block_height']), sync_info['latest_block_time'], "poll")
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, KeyError) as e:
+            print(f"Error polling status: {e}")
+        await asyncio.sleep(fallback_poll_seconds)
+
+async def fast_unjail_node(sender, wallet_password):
+    send_discord_notification(discord_webhook_url, "NOTi: xx Mainnet Jailed detected, attempting to unjail..")
+    try:
+        result = await sender.unjail()
+        print(f"Unjail transaction {result['hash']} included at height {result['height']} "
+              f"in {result['timings']['total']:.1f}s, gas used {result['gas_used']}")
+    except (UnjailError, aiohttp.ClientError, asyncio.TimeoutError, KeyError, ValueError) as e:
+        print(f"Fast unjail failed: {e}, falling back to the CLI")
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, unjail_node, node_binary, wallet_name, wallet_password)
+
+async def unjail_and_notify(unjail_sender, wallet_password):
+    loop = asyncio.get_running_loop()
+    try:
+        if unjail_sender:
+            await fast_unjail_node(unjail_sender, wallet_password)
+        else:
+            await loop.run_in_executor(None, unjail_node, node_binary, wallet_name, wallet_password)
+        await loop.run_in_executor(None, send_discord_notification, discord_webhook_url, "Noti: xx Mainnet unjailed executed, please verify...")
+    except Exception as e:
+        await loop.run_in_executor(None, send_discord_notification, discord_webhook_url, f"Error: unjail failed: {e}")
+
+async def prepare_unjail(sender):
+    # Builds the transaction template now, so the unjail itself only signs and broadcasts
+    try:
+        if not sender.prepared:
+            await sender.prepare()
+        print(f"Unjail transaction prepared for {sender.state['account_address']}, gas {sender.state['gas']}")
+    except (UnjailError, ValueError) as e:
+        print(f"Could not prepare the unjail transaction, it will be retried when needed: {e}")
+
+async def detect_stalls(watch, wallet_password, unjail_sender=None):
+    loop = asyncio.get_running_loop()
+    last_jail_check = 0
+    last_signing_check = 0
+    missed_blocks = MissedBlockTracker()
+    # The unjail runs as its own task, so stalls are still detected while it waits for inclusion
+    unjail_task = None
+    while True:
+        await asyncio.sleep(1)
+        try:
+            stalled_for = time.monotonic() - watch.last_progress
+            if stalled_for > watch.deadline():
+                # Give the restarted node a full deadline before the next restart
+                watch.last_progress = time.monotonic()
+                print(f"No new block for {stalled_for:.0f}s (deadline {watch.deadline():.0f}s) after height {watch.height}")
+                await loop.run_in_executor(None, restart_service, systemd_service)
+                await loop.run_in_executor(None, send_discord_notification, discord_webhook_url,
+                                           f"Monitoring: Gravity Mainnet Node stalled at height {watch.height} for {stalled_for:.0f}s, service restart attempted.")
+                continue
+
+            # Only a node that is producing blocks reports a voting power worth acting on
+            producing = time.monotonic() - watch.last_block < watch.deadline()
+            if is_validator and producing and time.monotonic() - last_jail_check > jail_check_seconds:
+                last_jail_check = time.monotonic()
+                voting_power = await loop.run_in_executor(None, check_voting_power, rpc_url, wallet_name)
+                if voting_power == 0 and (unjail_task is None or unjail_task.done()):
+                    unjail_task = asyncio.create_task(unjail_and_notify(unjail_sender, wallet_password))
+
+            if is_validator and watch.height and time.monotonic() - last_signing_check > signing_check_seconds:
+                last_signing_check = time.monotonic()
+                await loop.run_in_executor(None, missed_blocks.check)
+        except Exception as e:
+            await loop.run_in_executor(None, send_discord_notification, discord_webhook_url, f"Error: {e}")
+
+async def watch_blocks(wallet_password):
+    watch = BlockWatch()
+    connected = asyncio.Event()
+    async with aiohttp.ClientSession() as session:
+        unjail_sender = None
+        if is_validator and fast_unjail:
+            unjail_sender = UnjailSender(node_binary, wallet_name, chain_id, unjail_fees, rpc_url, api_url, session,
+                                         password=wallet_password, keyring_backend=keyring_backend, gas=unjail_gas,
+                                         cache_path=unjail_cache_file)
+            await prepare_unjail(unjail_sender)
+        await asyncio.gather(
+            follow_websocket(session, rpc_url, watch, connected),
+            poll_while_disconnected(session, rpc_url, watch, connected),
+            detect_stalls(watch, wallet_password, unjail_sender),
+        )
+
 # ***** Main Logic *****
 def main():
     wallet_password = getpass.getpass("Wallet Password: ")
 
+    if use_websocket:
+        asyncio.run(watch_blocks(wallet_password))
+        return
+
+    missed_blocks = MissedBlockTracker()
+
     while True:
         try:
             blocks_producing = check_block_production(rpc_url)
@@ -99,6 +360,8 @@ def main():
                 if needs_unjail:
                     unjail_node(node_binary, wallet_name, wallet_password)
                     send_discord_notification(discord_webhook_url, "Noti: xx Mainnet unjailed executed, please verify...")
+                elif voting_power is not None:
+                    missed_blocks.check()
 
         except Exception as e:
             send_discord_notification(discord_webhook_url, f"Error: {e}")
@@ -0,0 +1,294 @@
+# pip3 install numpy
+#
+# Columnar history of the Subsquid worker pings, for uptime and jail reports.
+#
+# Every poll of the pings feed adds one row to a chunk: the poll time, and for each
+# peer a uint16 cell holding the seconds since its last ping (15 bits) and whether
+# it is jailed (top bit). Chunks are directories of raw little-endian column files
+# that are appended to and memory-mapped by numpy:
+#   peers.txt                    peer ids, the line number is the peer's index
+#   chunks/<start>/columns.u4    indexes of the peers in this chunk's cells
+#   chunks/<start>/times.u4      poll times (unix seconds)
+#   chunks/<start>/cells.u2      one row of cells per poll
+#   chunks/<start>/previous.u4   time of the poll before the chunk, 0 if none
+#   chunks/<start>/summary-<threshold>.npz   statistics of the whole chunk, once it is closed
+# A new chunk starts every UTC day and whenever a peer joins, so a closed chunk's
+# summary covers whole days and queries over months only add up the summaries
+# and scan the chunks cut by the window's ends.
+import os
+import sys
+import time
+import argparse
+import datetime
+
+import numpy as np
+
+ABSENT = 0x7FFF # cell of a peer that is not in the feed
+JAILED = 0x8000
+MAX_AGE = 0x7FFE
+# A poll counts for the time since the previous one, up to this many seconds
+MAX_WEIGHT = 1200
+# Ping gap histogram bins, in seconds
+GAP_BINS = np.array([0, 15, 30, 60, 120, 300, 600, 1800, 3600, 6 * 3600, 86400])
+GAP_LABELS = ["<15s", "<30s", "<1m", "<2m", "<5m", "<10m", "<30m", "<1h", "<6h", "<1d", ">=1d"]
+_GAP_LOOKUP = (np.searchsorted(GAP_BINS, np.arange(GAP_BINS[-1] + 1), side="right") - 1).astype(np.uint8)
+# Summaries are built for this threshold when a chunk is closed; other thresholds build theirs on first use
+DEFAULT_THRESHOLD = 60
+
+class PingHistory:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(os.path.join(directory, "chunks"), exist_ok=True)
+        self.peers_path = os.path.join(directory, "peers.txt")
+        self.peers = []
+        if os.path.exists(self.peers_path):
+            with open(self.peers_path, "r") as f:
+                self.peers = f.read().split()
+        self.peer_index = {peer_id: index for index, peer_id in enumerate(self.peers)}
+        self.chunk = None # (path, start, columns, position of each peer in the row)
+        self.last_time = 0
+
+    # Add the pings of one poll: peer_id -> {"last_ping": ms, "jailed": bool}
+    def record(self, poll_time, pings):
+        poll_time = int(poll_time)
+        new_peers = [peer_id for peer_id in pings if peer_id not in self.peer_index]
+        if new_peers:
+            with open(self.peers_path, "a") as f:
+                for peer_id in new_peers:
+                    self.peer_index[peer_id] = len(self.peers)
+                    self.peers.append(peer_id)
+                    f.write(peer_id + "\n")
+
+        chunk = self.chunk or self._open_last_chunk()
+        if (chunk is None or _day(chunk[1]) != _day(poll_time)
+                or any(self.peer_index[peer_id] not in chunk[3] for peer_id in pings)):
+            closing = chunk
+            chunk = self._new_chunk(poll_time, sorted(set(self.peer_index[p] for p in pings) | set(chunk[2] if chunk else [])))
+            if closing:
+                path, _, times, cells, previous = self._load_chunk(closing[1])
+                if len(times):
+                    self._summary(path, times, cells, previous, DEFAULT_THRESHOLD)
+        path, _, columns, position = chunk
+        self.last_time = poll_time
+
+        row = np.full(len(columns), ABSENT, dtype="<u2")
+        for peer_id, ping in pings.items():
+            age = min(max(poll_time - int(ping.get("last_ping", 0)) // 1000, 0), MAX_AGE)
+            row[position[self.peer_index[peer_id]]] = age | (JAILED if ping.get("jailed") else 0)
+        # Cells first, so that a poll time always has its row
+        with open(os.path.join(path, "cells.u2"), "ab") as f:
+            f.write(row.tobytes())
+        with open(os.path.join(path, "times.u4"), "ab") as f:
+            f.write(np.array([poll_time], dtype="<u4").tobytes())
+
+    def _new_chunk(self, start, columns):
+        path = os.path.join(self.directory, "chunks", str(start))
+        os.makedirs(path, exist_ok=True)
+        np.array(columns, dtype="<u4").tofile(os.path.join(path, "columns.u4"))
+        np.array([self.last_time], dtype="<u4").tofile(os.path.join(path, "previous.u4"))
+        self.chunk = (path, start, columns, {column: i for i, column in enumerate(columns)})
+        return self.chunk
+
+    def _open_last_chunk(self):
+        starts = self._chunk_starts()
+        if not starts:
+            return None
+        path = os.path.join(self.directory, "chunks", str(starts[-1]))
+        _, columns, times, _, _ = self._load_chunk(starts[-1])
+        columns = columns.tolist()
+        self.last_time = int(times[-1]) if len(times) else 0
+        self.chunk = (path, starts[-1], columns, {column: i for i, column in enumerate(columns)})
+        return self.chunk
+
+    def _chunk_starts(self):
+        return sorted(int(name) for name in os.listdir(os.path.join(self.directory, "chunks")) if name.isdigit())
+
+    def _load_chunk(self, start):
+        path = os.path.join(self.directory, "chunks", str(start))
+        columns = np.fromfile(os.path.join(path, "columns.u4"), dtype="<u4")
+        previous = int(np.fromfile(os.path.join(path, "previous.u4"), dtype="<u4")[0])
+        times = _map(os.path.join(path, "times.u4"), "<u4")
+        cells = _map(os.path.join(path, "cells.u2"), "<u2")
+        # A poll interrupted between the two writes has cells but no time
+        rows = min(len(times), len(cells) // max(len(columns), 1))
+        return path, columns, times[:rows], cells[:rows * len(columns)].reshape(rows, len(columns)), previous
+
+    # Statistics of every peer over [start, end): observed, up and jailed seconds, uptime,
+    # longest outage and a histogram of the gaps between pings
+    def stats(self, start, end, threshold=DEFAULT_THRESHOLD):
+        peers = len(self.peers)
+        total = {'observed': np.zeros(peers), 'up': np.zeros(peers), 'jailed': np.zeros(peers),
+                 'gaps': np.zeros((peers, len(GAP_LABELS)), dtype=np.int64)}
+        # Outage runs are joined across chunks: the run still open at the end of the last chunk,
+        # and the longest run of each peer
+        open_run = np.zeros(peers)
+        longest = np.zeros(peers)
+
+        starts = self._chunk_starts()
+        for index, chunk_start in enumerate(starts):
+            chunk_end = starts[index + 1] if index + 1 < len(starts) else None
+            if chunk_start >= end or (chunk_end is not None and chunk_end <= start):
+                continue
+            path, columns, times, cells, previous = self._load_chunk(chunk_start)
+            if len(times) == 0:
+                continue
+            closed = chunk_end is not None
+            if closed and start <= int(times[0]) and int(times[-1]) < end:
+                summary = self._summary(path, times, cells, previous, threshold)
+            else:
+                # Times are in order, so the window is a slice of the rows
+                first, last = np.searchsorted(times, [start, end])
+                previous = int(times[first - 1]) if first > 0 else previous
+                summary = _chunk_stats(times[first:last], cells[first:last], previous, threshold)
+
+            for key in ('observed', 'up', 'jailed', 'gaps'):
+                total[key][columns] += summary[key]
+            # A run that lasts the whole chunk continues the open run, otherwise the open run
+            # ends with the chunk's leading run and the chunk's trailing run starts a new one
+            lead, trail, inner, whole = summary['lead'], summary['trail'], summary['longest'], summary['whole']
+            joined = open_run[columns] + lead
+            longest[columns] = np.maximum.reduce([longest[columns], joined, inner])
+            open_run[columns] = np.where(whole, joined, trail)
+
+        observed = total['observed']
+        with np.errstate(invalid="ignore", divide="ignore"):
+            uptime = np.where(observed > 0, total['up'] / observed, np.nan)
+        return {'peers': self.peers, 'observed': observed, 'up': total['up'], 'jailed': total['jailed'],
+                'uptime': uptime, 'longest_outage': longest, 'gaps': total['gaps']}
+
+    def _summary(self, path, times, cells, previous, threshold):
+        summary_path = os.path.join(path, f"summary-{threshold}.npz")
+        if os.path.exists(summary_path):
+            with np.load(summary_path) as data:
+                return dict(data)
+        summary = _chunk_stats(times, cells, previous, threshold)
+        temp_path = summary_path + ".tmp.npz"
+        np.savez(temp_path, **summary)
+        os.replace(temp_path, summary_path)
+        return summary
+
+def _chunk_stats(times, cells, previous, threshold):
+    width = cells.shape[1]
+    if len(times) == 0:
+        zeros = np.zeros(width)
+        return {'observed': zeros, 'up': zeros, 'jailed': zeros, 'lead': zeros, 'trail': zeros,
+                'longest': zeros, 'whole': np.zeros(width, dtype=bool),
+                'gaps': np.zeros((width, len(GAP_LABELS)), dtype=np.int64)}
+
+    # Each poll counts for the time since the previous poll; float32 is exact for the seconds of a day
+    weights = np.minimum(np.diff(times.astype(np.int64), prepend=previous or int(times[0])), MAX_WEIGHT).astype(np.float32)
+    # Jailed cells have the top bit set and absent cells are 0x7FFF, so one comparison finds the peers that are up
+    present = cells != ABSENT
+    jailed = cells >= JAILED
+    up = cells <= threshold
+    down = present & ~up
+
+    stats = {
+        'observed': (weights @ present).astype(np.float64),
+        'up': (weights @ up).astype(np.float64),
+        'jailed': (weights @ jailed).astype(np.float64),
+    }
+    stats.update(_runs(down, weights))
+
+    # Gaps between the distinct last pings seen by consecutive polls, binned through a lookup table
+    ages = cells & ABSENT
+    last_ping = (times - times[0]).astype(np.int32)[:, None] - ages.astype(np.int32)
+    gap = last_ping[1:] - last_ping[:-1]
+    valid = ages < MAX_AGE
+    counted = valid[1:] & valid[:-1] & (gap > 0)
+    codes = _GAP_LOOKUP[np.clip(gap, 0, len(_GAP_LOOKUP) - 1)].astype(np.int32)
+    codes += np.arange(width, dtype=np.int32) * len(GAP_LABELS)
+    # Gaps that don't count go to one extra bin, which is dropped
+    codes[~counted] = width * len(GAP_LABELS)
+    counts = np.bincount(codes.ravel(), minlength=width * len(GAP_LABELS) + 1)[:-1]
+    stats['gaps'] = counts.reshape(width, len(GAP_LABELS))
+    return stats
+
+# Down runs of every peer: the longest, the one the chunk starts with, the one it ends with, and
+# whether the peer was down for the whole chunk, all in seconds. Peers are up in almost every poll,
+# so the runs are found from their first and last polls instead of accumulating over the whole matrix.
+def _runs(down, weights):
+    polls, width = down.shape
+    first = down.copy()
+    first[1:] &= ~down[:-1]
+    last = down.copy()
+    last[:-1] &= ~down[1:]
+    # nonzero is in row order; ordering by column pairs the k-th first poll of a peer with its k-th last poll
+    first_rows, first_columns = np.nonzero(first)
+    last_rows, last_columns = np.nonzero(last)
+    order = np.lexsort((first_rows, first_columns))
+    first_rows, columns = first_rows[order], first_columns[order]
+    last_rows = last_rows[np.lexsort((last_rows, last_columns))]
+
+    elapsed = np.concatenate(([0.0], np.cumsum(weights, dtype=np.float64)))
+    lengths = elapsed[last_rows + 1] - elapsed[first_rows]
+    longest = np.zeros(width)
+    np.maximum.at(longest, columns, lengths)
+    lead = np.zeros(width)
+    starts = first_rows == 0
+    lead[columns[starts]] = lengths[starts]
+    trail = np.zeros(width)
+    ends = last_rows == polls - 1
+    trail[columns[ends]] = lengths[ends]
+    whole = np.zeros(width, dtype=bool)
+    whole[columns[starts & ends]] = True
+    return {'lead': lead, 'trail': trail, 'longest': longest, 'whole': whole}
+
+def _map(path, dtype):
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r")
+
+def _day(timestamp):
+    return timestamp // 86400
+
+def _duration(seconds):
+    if seconds >= 86400:
+        return f"{seconds / 86400:.1f}d"
+    if seconds >= 3600:
+        return f"{seconds / 3600:.1f}h"
+    return f"{seconds / 60:.0f}m"
+
+def main():
+    parser = argparse.ArgumentParser(description="Uptime, jail time and outages of Subsquid workers from the recorded pings")
+    parser.add_argument("--dir", required=True, help="History directory of submonitor.py (HISTORY_DIR)")
+    parser.add_argument("--days", type=float, default=30, help="Window ending now, in days")
+    parser.add_argument("--start", help="Window start, YYYY-MM-DD (UTC), instead of --days")
+    parser.add_argument("--end", help="Window end, YYYY-MM-DD (UTC), exclusive")
+    parser.add_argument("--threshold", type=int, default=DEFAULT_THRESHOLD, help="Seconds since the last ping after which a worker is down")
+    parser.add_argument("--peer", action="append", help="Only these peer ids")
+    parser.add_argument("--gaps", action="store_true", help="Print the ping gap histogram")
+    parser.add_argument("--csv", help="Write the statistics of every peer to a CSV file")
+    args = parser.parse_args()
+
+    def parse_day(value):
+        return int(datetime.datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=datetime.timezone.utc).timestamp())
+    end = parse_day(args.end) if args.end else int(time.time()) + 1
+    start = parse_day(args.start) if args.start else int(end - args.days * 86400)
+
+    history = PingHistory(args.dir)
+    started = time.perf_counter()
+    stats = history.stats(start, end, args.threshold)
+    elapsed = time.perf_counter() - started
+
+    selected = [i for i, peer_id in enumerate(stats['peers']) if stats['observed'][i] > 0 and (not args.peer or peer_id in args.peer)]
+    selected.sort(key=lambda i: stats['uptime'][i])
+    print(f"{len(selected)} workers, {datetime.datetime.fromtimestamp(start, datetime.timezone.utc):%Y-%m-%d %H:%M} to "
+          f"{datetime.datetime.fromtimestamp(end, datetime.timezone.utc):%Y-%m-%d %H:%M} UTC, computed in {elapsed * 1000:.0f} ms")
+    print(f"{'peer':<56}{'uptime':>9}{'observed':>10}{'jailed':>9}{'longest outage':>16}")
+    for i in selected:
+        print(f"{stats['peers'][i]:<56}{stats['uptime'][i]:>9.2%}{_duration(stats['observed'][i]):>10}"
+              f"{_duration(stats['jailed'][i]):>9}{_duration(stats['longest_outage'][i]):>16}")
+        if args.gaps:
+            print("    gaps " + "  ".join(f"{label} {count}" for label, count in zip(GAP_LABELS, stats['gaps'][i]) if count))
+
+    if args.csv:
+        with open(args.csv, "w") as f:
+            f.write("peer_id,uptime,observed_seconds,jailed_seconds,longest_outage_seconds," + ",".join(f"gaps{label}" for label in GAP_LABELS) + "\n")
+            for i in selected:
+                f.write(f"{stats['peers'][i]},{stats['uptime'][i]:.6f},{stats['observed'][i]:.0f},{stats['jailed'][i]:.0f},"
+                        f"{stats['longest_outage'][i]:.0f}," + ",".join(str(c) for c in stats['gaps'][i]) + "\n")
+        print(f"Wrote {args.csv}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+# pip3 install requests aiohttp
+#
+# Replays a stubbed Subsquid pings feed through submonitor's scheduler on a simulated clock,
+# to check how soon peers going stale, jailed or missing are notified and how many checks it
+# takes, compared with checking every CHECK_INTERVAL.
+#
+# The feed is served over HTTP from a local stub that sets an ETag and answers a matching
+# If-None-Match with 304, so the real fetch path is exercised. Hours of feed replay in seconds:
+#   python3 replay.py --hours 3 --peers 2000
+import os
+import sys
+import json
+import hashlib
+import argparse
+import threading
+import http.server
+
+import submonitor
+
+PING_PERIOD = 20 # Seconds between the pings of a healthy peer
+WATCHED = [("peer-a", "alpha"), ("peer-b", "bravo"), ("peer-c", "charlie")]
+# Scripted incidents: (peer, kind, start, end) in seconds since the start of the replay
+INCIDENTS = [
+    ("peer-b", "stale", 1800, 2700),
+    ("peer-c", "jailed", 3600, 4200),
+    ("peer-a", "missing", 5000, 5400),
+    ("peer-b", "stale", 7300, 7390),
+]
+START = 1_700_000_000 # Simulated wall clock at the start of the replay
+
+# Simulated wall clock shared with submonitor and the stub feed
+now = [float(START)]
+
+def incident(peer_id, kind, elapsed):
+    return any(peer == peer_id and what == kind and start <= elapsed < end for peer, what, start, end in INCIDENTS)
+
+# Last ping of a peer at a time: every PING_PERIOD seconds with a per-peer phase, frozen while it is stale
+def last_ping(peer_id, index, elapsed):
+    for peer, what, start, end in INCIDENTS:
+        if peer == peer_id and what == "stale" and start <= elapsed < end:
+            elapsed = start
+    phase = index % PING_PERIOD
+    return (START + ((elapsed - phase) // PING_PERIOD) * PING_PERIOD + phase) * 1000
+
+def feed_at(elapsed, filler):
+    peers = [peer_id for peer_id, _ in WATCHED] + [f"filler-{i}" for i in range(filler)]
+    pings = []
+    for index, peer_id in enumerate(peers):
+        if incident(peer_id, "missing", elapsed):
+            continue
+        pings.append({'peer_id': peer_id, 'last_ping': int(last_ping(peer_id, index, elapsed)),
+                      'jailed': incident(peer_id, "jailed", elapsed), 'version': "1.0.0"})
+    return json.dumps(pings).encode()
+
+class StubFeed(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body in one write, a keep-alive connection otherwise waits on delayed ACKs
+    wbufsize = 1 << 16
+    filler = 0
+
+    def do_GET(self):
+        body = feed_at(int(now[0] - START), self.filler)
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class StubServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # submonitor stops reading the feed once its peers were found and drops the connection
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+# Start of the message notifying each kind of incident
+MESSAGES = {'stale': "exceeded last ping threshold", 'jailed': "is jailed", 'missing': "is missing from the pings feed"}
+
+# When an incident first becomes visible to a check: a stale peer once its last ping is older than the threshold
+def visible_at(peer, kind, start):
+    if kind == "stale":
+        index = [peer_id for peer_id, _ in WATCHED].index(peer)
+        return last_ping(peer, index, start) / 1000 - START + submonitor.PING_THRESHOLD
+    return start
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a stubbed pings feed through submonitor's scheduler")
+    parser.add_argument("--hours", type=float, default=2.5, help="Simulated hours to replay")
+    parser.add_argument("--peers", type=int, default=500, help="Unwatched peers in the feed, for its size")
+    args = parser.parse_args()
+
+    StubFeed.filler = args.peers
+    server = StubServer(("127.0.0.1", 0), StubFeed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    submonitor.JSON_URL = f"http://127.0.0.1:{server.server_port}/workers/pings"
+    submonitor.PEERS_INFO = WATCHED
+    submonitor.HISTORY_DIR = ""
+    submonitor.clock = lambda: now[0]
+    notifications = []
+    submonitor.send_discord_notification = lambda webhook_url, message: notifications.append((now[0] - START, message))
+
+    # Silence the per-check output, the summary is printed at the end
+    stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    checks = 0
+    try:
+        while now[0] - START < args.hours * 3600:
+            delay = submonitor.check_peers_and_notify()
+            checks += 1
+            now[0] += delay if delay is not None else submonitor.MIN_CHECK_INTERVAL * 6
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+        server.shutdown()
+
+    duration = args.hours * 3600
+    print(f"Replayed {args.hours:g}h of a {args.peers + len(WATCHED)}-peer feed: {checks} checks "
+          f"({duration / submonitor.CHECK_INTERVAL:.0f} at a fixed {submonitor.CHECK_INTERVAL}s interval)")
+    print(f"{'incident':<26}{'visible at':>11}{'notified at':>13}{'delay':>8}")
+    worst = 0
+    for peer, kind, start, end in INCIDENTS:
+        if start >= duration:
+            continue
+        visible = visible_at(peer, kind, start)
+        label = f"{peer} {kind}"
+        if visible >= end:
+            print(f"{label:<26}{'never':>11}{'-':>13}{'-':>8}")
+            continue
+        notified = next((t for t, message in notifications
+                         if f"({peer})" in message and MESSAGES[kind] in message and visible <= t <= end), None)
+        if notified is None:
+            print(f"{label:<26}{visible:>10.0f}s{'missed':>13}{'-':>8}")
+            worst = float("inf")
+            continue
+        worst = max(worst, notified - visible)
+        print(f"{label:<26}{visible:>10.0f}s{notified:>12.0f}s{notified - visible:>7.0f}s")
+    print(f"{len(notifications)} notifications:")
+    for elapsed, message in notifications:
+        print(f"  {elapsed:>6.0f}s {message}")
+    # A healthy peer is checked within PING_THRESHOLD + CHECK_GRACE of its last ping, so any incident
+    # should be notified within that plus the shortest interval; non-zero if one was missed or later
+    bound = submonitor.PING_THRESHOLD + submonitor.CHECK_GRACE + submonitor.MIN_CHECK_INTERVAL
+    print(f"Longest delay {worst:.0f}s, expected at most {bound}s")
+    sys.exit(0 if worst <= bound else 1)
+
+if __name__ == "__main__":
+    main()
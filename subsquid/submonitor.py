@@ -1,8 +1,17 @@
-# pip3 install requests
+# pip3 install requests aiohttp
+import os
+import sys
 import requests
+import urllib3
 import datetime
 import time
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "misc"))
+from nodemon.notify import NotificationDispatcher, BackgroundDispatcher, DiscordChannel
+from nodemon.jsonstream import index_array
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "cosmos", "cosmoinstaller"))
+from modules.httpclient import get_client
+
 # Configuration section
 JSON_URL = "https://scheduler.testnet.subsquid.io/workers/pings"
 PEERS_INFO = [
@@ -13,15 +22,44 @@ PEERS_INFO = [
     # Add more peers as needed
 ]
 DISCORD_WEBHOOK_URL = "your_discord_webhook"
-CHECK_INTERVAL = 600 # Time between checks in seconds
-
-# Function to fetch JSON data from the provided URL
-def fetch_json_data(url):
-    response = requests.get(url)
-    if response.status_code == 200:
-        return response.json()
-    else:
-        print("Failed to fetch data")
+CHECK_INTERVAL = 600 # Longest time between checks in seconds
+MIN_CHECK_INTERVAL = 10 # Shortest time between checks, while a peer is about to exceed the threshold
+PING_THRESHOLD = 60 # Seconds since the last ping after which a peer is stale
+CHECK_GRACE = 5 # Seconds after a peer could exceed the threshold before it is checked
+HISTORY_DIR = "" # Directory to record the pings of every peer in for uptime reports (pinghistory.py), empty to disable
+
+# Clock of the checks, replay.py swaps in a simulated one to replay a pings feed faster than real time
+clock = time.time
+
+# Compression urllib3 can decode here: gzip and deflate, and br/zstd when brotli/zstandard are installed
+ACCEPT_ENCODING = urllib3.util.make_headers(accept_encoding=True)['accept-encoding']
+
+# Last snapshot of the feed with its validators, reused when the scheduler answers 304 Not Modified
+feed_cache = {}
+
+# Function to fetch the pings of the watched peers, parsed while the feed downloads so
+# that only their records are kept, and the download stops once all of them were found;
+# all peers are kept when peer_ids is None
+def fetch_watched_pings(url, peer_ids):
+    key = (url, None if peer_ids is None else frozenset(peer_ids))
+    cached = feed_cache.get(key)
+    headers = {'Accept-Encoding': ACCEPT_ENCODING}
+    if cached and cached['etag']:
+        headers['If-None-Match'] = cached['etag']
+    if cached and cached['last_modified']:
+        headers['If-Modified-Since'] = cached['last_modified']
+    try:
+        with get_client().get(url, stream=True, headers=headers) as response:
+            if response.status_code == 304 and cached:
+                print("Feed not modified since the last check")
+                return cached['pings']
+            response.raise_for_status()
+            pings = index_array(response.iter_content(65536), "peer_id", None if peer_ids is None else set(peer_ids))
+            feed_cache[key] = {'etag': response.headers.get("ETag"), 'last_modified': response.headers.get("Last-Modified"),
+                               'pings': pings}
+            return pings
+    except (requests.RequestException, ValueError) as e:
+        print(f"Failed to fetch data: {e}")
         return None
 
 # Function to convert  epoch_seconds to humanreadle time + timezone
@@ -40,38 +78,96 @@ def convert_epoch_to_cet_human_readable(last_ping_epoch):
 
     return human_readable_datetime
 
-# Function to send a Discord notification
+# Function to send a Discord notification, queued and sent from a background thread
+notification_queues = {}
+
 def send_discord_notification(webhook_url, message):
-    data = {"content": message}
-    response = requests.post(webhook_url, json=data)
-    if response.status_code == 204:
-        print("Notification sent successfully")
-    else:
-        print("Failed to send notification")
-
-# Main operational function
+    if webhook_url not in notification_queues:
+        notification_queues[webhook_url] = BackgroundDispatcher(NotificationDispatcher([DiscordChannel(webhook_url)]))
+    notification_queues[webhook_url].notify("Subsquid", message)
+    print("Notification queued")
+
+# State of every peer at the last check, so that only changes are notified
+peer_states = {}
+
+def peer_state(peer_data, current_time):
+    if not peer_data:
+        return {'listed': False, 'jailed': False, 'stale': False}
+    return {'listed': True, 'jailed': bool(peer_data.get("jailed", False)),
+            'stale': current_time - peer_data.get("last_ping", 0) > PING_THRESHOLD * 1000}
+
+# Messages for the changes between two states of a peer; a peer seen for the first time is compared to a healthy one
+def state_changes(peer_id, peer_name, old, new, times):
+    old = old or {'listed': True, 'jailed': False, 'stale': False}
+    peer = f"Peer {peer_name} ({peer_id})"
+    messages = []
+    if old['listed'] != new['listed']:
+        messages.append(f"{peer} is listed in the pings feed again" if new['listed'] else f"{peer} is missing from the pings feed")
+    if new['listed'] and old['stale'] != new['stale']:
+        messages.append(f"{peer} exceeded last ping threshold | {times}" if new['stale'] else f"{peer} is pinging again | {times}")
+    if new['listed'] and old['jailed'] != new['jailed']:
+        messages.append(f"{peer} is jailed | {times}" if new['jailed'] else f"{peer} is no longer jailed | {times}")
+    return messages
+
+# Back-off of the peers that are down, doubled on every check they are still down
+peer_backoff = {}
+
+# Seconds until the next check: a healthy peer is checked as soon as it could exceed the ping threshold,
+# while a peer that is stale, jailed or missing is checked less and less often until it recovers;
+# replay.py runs it against a stubbed feed with scripted incidents and reports the detection delays
+def next_check_delay(pings, current_time):
+    delays = [CHECK_INTERVAL]
+    for peer_id, _ in PEERS_INFO:
+        state = peer_states.get(peer_id)
+        if state and state['listed'] and not state['stale'] and not state['jailed']:
+            peer_backoff.pop(peer_id, None)
+            edge = pings[peer_id].get("last_ping", 0) / 1000 + PING_THRESHOLD + CHECK_GRACE
+            delays.append(edge - current_time / 1000)
+        else:
+            peer_backoff[peer_id] = min(CHECK_INTERVAL, peer_backoff.get(peer_id, MIN_CHECK_INTERVAL / 2) * 2)
+            delays.append(peer_backoff[peer_id])
+    return max(MIN_CHECK_INTERVAL, min(delays))
+
+# History of every peer's pings, opened on the first poll when HISTORY_DIR is set
+ping_history = None
+
+def record_history(current_time, pings):
+    global ping_history
+    try:
+        if ping_history is None:
+            from pinghistory import PingHistory # needs numpy, only imported when the history is enabled
+            ping_history = PingHistory(HISTORY_DIR)
+        ping_history.record(current_time // 1000, pings)
+    except (ImportError, OSError, ValueError) as e:
+        print(f"Failed to record the ping history: {e}")
+
+# Main operational function, returns the seconds until the next check
 def check_peers_and_notify():
-    data = fetch_json_data(JSON_URL)
-    if data is not None:
-        current_time = int(time.time() * 1000) # Current time in milliseconds
+    # The history needs the whole feed, otherwise only the watched peers are parsed
+    watched = None if HISTORY_DIR else [peer_id for peer_id, _ in PEERS_INFO]
+    pings = fetch_watched_pings(JSON_URL, watched)
+    if pings is not None:
+        current_time = int(clock() * 1000) # Current time in milliseconds
+        if HISTORY_DIR:
+            record_history(current_time, pings)
+        current_human = convert_epoch_to_cet_human_readable(current_time)
         for peer_id, peer_name in PEERS_INFO:
-            peer_data = next((item for item in data if item["peer_id"] == peer_id), None)
+            peer_data = pings.get(peer_id)
+            state = peer_state(peer_data, current_time)
+            times = f"current time: {current_human}"
             if peer_data:
-                last_ping = peer_data.get("last_ping", 0)
-                jailed = peer_data.get("jailed", False)
-
-                human_date = convert_epoch_to_cet_human_readable(last_ping)
-                current_human = convert_epoch_to_cet_human_readable(current_time)
-                print(f"Node: {peer_name} - Jailed: {jailed} | Last Ping: {human_date} | current time: {current_human} ")
-
-                message = ""
-                if current_time - last_ping > 60000: # Check if last ping is more than 60 seconds ago
-                    message += f"Peer {peer_name} ({peer_id}) exceeded last ping threshold | Last Ping: {human_date} | current time: {current_human} "
-                if jailed:
-                    message += f"Peer {peer_name} ({peer_id}) is jailed | Last Ping: {human_date} | current time: {current_human}"
+                human_date = convert_epoch_to_cet_human_readable(peer_data.get("last_ping", 0))
+                times = f"Last Ping: {human_date} | {times}"
+                print(f"Node: {peer_name} - Jailed: {state['jailed']} | {times} ")
+            else:
+                print(f"Node: {peer_name} - not in the pings feed")
 
-                if message:
-                    send_discord_notification(DISCORD_WEBHOOK_URL, message)
+            messages = state_changes(peer_id, peer_name, peer_states.get(peer_id), state, times)
+            peer_states[peer_id] = state
+            if messages:
+                send_discord_notification(DISCORD_WEBHOOK_URL, " ".join(messages))
+        return next_check_delay(pings, current_time)
+    return None
 
 # Main function to encapsulate the loop
 def main():
@@ -81,10 +177,12 @@ def main():
             current_datetime = now.strftime('%Y-%m-%d %H:%M:%S')
             print(current_datetime)
 
-            check_peers_and_notify()
-            print(f"Sleeping {CHECK_INTERVAL} secs")
+            delay = check_peers_and_notify()
+            if delay is None:
+                delay = MIN_CHECK_INTERVAL * 6 # the feed was unavailable
+            print(f"Sleeping {delay:.0f} secs")
             print("___________________________________________________________________________")
-            time.sleep(CHECK_INTERVAL)
+            time.sleep(delay)
         except Exception as e:
             print(f"An error occurred: {e}")
             time.sleep(60) # Wait a minute before trying again